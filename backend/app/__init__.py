@@ -3,27 +3,59 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from config import config
 from flask_cors import CORS 
+from app.session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.logger.setLevel(app.config['LOG_LEVEL'])
     
+    from app.services.auth_tokens import init_auth_tokens
+    init_auth_tokens(app)
+
     db.init_app(app)
     migrate.init_app(app, db)
 
+    from app.services.database import log_pool_settings, init_read_replica
+    init_read_replica(app)
+    log_pool_settings(app)
+
     with app.app_context():
-        from app.models import Account, Student, Teacher, Topic, Declaration
+        from app.models import Account, Student, Teacher, Topic, Declaration, TableVersion
+
+    from app.services.topic_cache import init_topic_cache
+    init_topic_cache(app)
+
+    from app.services.teacher_identity import init_teacher_identity_cache
+    init_teacher_identity_cache(app)
+
+    from app.services.change_bus import init_change_bus
+    init_change_bus(app)
+
+    from app.services.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+    
+    from app.services.passwords import init_passwords
+    init_passwords(app)
+
+    from app.services.usos_import import init_usos_import
+    init_usos_import(app)
     
-    from app.routes import health_bp, topics, export_bp, users_bp
+    from app.routes import health_bp, topics, export_bp, users_bp, imports_bp, auth_bp
     app.register_blueprint(health_bp)
     app.register_blueprint(topics.topics_bp)
     app.register_blueprint(export_bp)
     app.register_blueprint(users_bp)
+    app.register_blueprint(imports_bp)
+    app.register_blueprint(auth_bp)
 
-    CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]}}, supports_credentials=True)
+    CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"], "expose_headers": ["X-Next-Cursor", "ETag", "Server-Timing", "X-N-Plus-One", "X-Read-Primary-Until"]}}, supports_credentials=True)
 
     return app
     
\ No newline at end of file
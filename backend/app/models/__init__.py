@@ -3,5 +3,6 @@ from app.models.student import Student
 from app.models.teacher import Teacher
 from app.models.topic import Topic
 from app.models.declaration import Declaration
+from app.models.table_version import TableVersion
 
-__all__ = ['Account', 'Student', 'Teacher', 'Topic', 'Declaration']
\ No newline at end of file
+__all__ = ['Account', 'Student', 'Teacher', 'Topic', 'Declaration', 'TableVersion']
\ No newline at end of file
@@ -1,3 +1,4 @@
+from flask import current_app
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
 import enum
@@ -12,6 +13,11 @@ class UserType(enum.Enum):
 
 class Account(db.Model):
     __tablename__ = 'account'
+    __table_args__ = (
+        # /api/users: prefix search on the name and the role filter, both paged by id
+        db.Index('ix_account_full_name_id', 'full_name', 'id'),
+        db.Index('ix_account_user_type_id', 'user_type', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(150), nullable=False)
@@ -23,7 +29,9 @@ class Account(db.Model):
     teacher = db.relationship('Teacher', backref='account', uselist=False)
     
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        # Logins go through app.services.passwords, which also upgrades old hashes
+        method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt') if current_app else 'scrypt'
+        self.password = generate_password_hash(password, method=method)
     
     def check_password(self, password):
         return check_password_hash(self.password, password)
@@ -0,0 +1,12 @@
+from app import db
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_version'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Bumped on every commit that writes to `table_name`, used to build ETags
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name} - {self.version}>'
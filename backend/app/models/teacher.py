@@ -15,6 +15,14 @@ class Position(enum.Enum):
     ADIUNKT = "ADIUNKT"
     PROFESOR_UCZELNI = "PROFESOR_UCZELNI"    
 
+def get_max_teams_for_position(position):
+    """Zwraca maksymalną liczbę zespołów dla danego stanowiska."""
+    # ASYSTENT (Assistant position) has limit of 1 team
+    if position == Position.ASYSTENT:
+        return 1
+    # ADIUNKT, PROFESOR_UCZELNI itp.
+    return 2
+
 class Teacher(db.Model):
     __tablename__ = 'teacher'
     
@@ -23,6 +31,8 @@ class Teacher(db.Model):
     title = db.Column(db.Enum(Title), nullable=False)  
     position = db.Column(db.Enum(Position), nullable=False)
     is_declaration_approved = db.Column(db.Boolean, default=False)
+    # Pending and approved topics, checked against get_max_teams_for_position; see app/services/team_limits.py
+    active_topic_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     topics = db.relationship('Topic', backref='teacher', lazy=True)
@@ -9,8 +9,19 @@ class TopicStatus(enum.Enum):
     ODRZUCONY = "ODRZUCONY"
     OCZEKUJACY = "OCZEKUJACY"
 
+# Team size of a standard topic, other sizes need a justification
+STANDARD_TEAM_SIZE = 4
+MAX_TEAM_SIZE = 10
+
 class Topic(db.Model):
     __tablename__ = 'topic'
+    __table_args__ = (
+        # Keyset pagination of the listing on (creation_date, id), optionally narrowed by a filter
+        db.Index('ix_topic_creation_date_id', 'creation_date', 'id'),
+        db.Index('ix_topic_status_creation_date_id', 'status', 'creation_date', 'id'),
+        db.Index('ix_topic_is_open_creation_date_id', 'is_open', 'creation_date', 'id'),
+        db.Index('ix_topic_teacher_id_creation_date_id', 'teacher_id', 'creation_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -22,7 +33,10 @@ class Topic(db.Model):
     status = db.Column(db.Enum(TopicStatus), default=TopicStatus.OCZEKUJACY, nullable=False)
     topic_justification = db.Column(db.Text, nullable=True)
     rejection_reason = db.Column(db.Text, nullable=True)
-
+    is_standard = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    max_members = db.Column(db.Integer, nullable=False, default=STANDARD_TEAM_SIZE, server_default=str(STANDARD_TEAM_SIZE))
+    # Number of students of the topic, moved by app.services.enrollment together with student.topic_id
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     declaration = db.relationship('Declaration', backref='topic', uselist=False)
@@ -31,28 +45,40 @@ class Topic(db.Model):
     
     def __repr__(self):
         return f'<Topic {self.title}>'
+
+    @staticmethod
+    def supervisor_dict(teacher_id, account_id, full_name, title):
+        return {
+            'id': teacher_id,
+            'accountId': account_id,
+            'fullName': full_name,
+            'title': title.value if title else '',
+            'avatar': 'https://ui-avatars.com/api/?name=Michal+Slimak&background=random'
+        }
     
-    def to_dict(self):
+    def to_dict(self, supervisor=None):
         # find name in account model
+        # `supervisor` can be passed in when the teacher is already known, to skip loading it
+        if supervisor is None and self.teacher:
+            supervisor = self.supervisor_dict(
+                self.teacher.id,
+                self.teacher.account.id if self.teacher.account else None,
+                self.teacher.account.full_name if self.teacher.account else '',
+                self.teacher.title
+            )
 
         return {
             'id': self.id,
             'title': self.title,
             'description': self.description,
             'isOpen': self.is_open,
-            'isStandard': True, # Default, not in DB
-            'maxMembers': 4,    # Default, not in DB
+            'isStandard': self.is_standard,
+            'maxMembers': self.max_members,
             'status': self.status.value,
             'creationDate': self.creation_date.isoformat().split('T')[0],
             'topicJustification': self.topic_justification,
             'rejectionReason': self.rejection_reason,
-            'supervisor': {
-                'id': self.teacher.id,
-                'accountId': self.teacher.account.id if self.teacher and self.teacher.account else None,
-                'fullName': self.teacher.account.full_name if self.teacher and self.teacher.account else '',
-                'title': self.teacher.title.value if self.teacher and self.teacher.title else '',
-                'avatar': 'https://ui-avatars.com/api/?name=Michal+Slimak&background=random'
-            } if self.teacher else None,
+            'supervisor': supervisor,
             'team': [{
                 'id': s.id,
                 'accountId': s.account.id if s.account else None,
@@ -2,5 +2,7 @@ from app.routes.health import health_bp
 from app.routes.topics import topics_bp
 from app.routes.export import export_bp
 from app.routes.users import users_bp
+from app.routes.imports import imports_bp
+from app.routes.auth import auth_bp
 
-__all__ = ['health_bp', 'topics_bp', 'export_bp', 'users_bp']
\ No newline at end of file
+__all__ = ['health_bp', 'topics_bp', 'export_bp', 'users_bp', 'imports_bp', 'auth_bp']
\ No newline at end of file
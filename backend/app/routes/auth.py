@@ -0,0 +1,80 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import select, update
+from app import db
+from app.models.account import Account
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.services.passwords import verify_password, PasswordHasherBusy
+from app.services.auth_tokens import Principal, authenticated, current_principal, issue_token
+
+
+auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+
+
+@auth_bp.route('/login', methods=['POST'])
+def login():
+    """
+    Log in with a login and password.
+    Expects JSON: { "login": "...", "password": "..." }
+    Returns the account with its role and teacher / student id, and a signed
+    token to send as "Authorization: Bearer <token>".
+    """
+    data = request.get_json(silent=True) or {}
+    login_name = data.get('login')
+    password = data.get('password')
+    if not isinstance(login_name, str) or not isinstance(password, str) or not login_name or not password:
+        return jsonify({'error': 'login and password are required'}), 400
+
+    row = db.session.execute(
+        select(Account.id, Account.full_name, Account.user_type, Account.password,
+               Teacher.id.label('teacher_id'), Student.id.label('student_id'))
+        .outerjoin(Teacher, Teacher.account_id == Account.id)
+        .outerjoin(Student, Student.account_id == Account.id)
+        .where(Account.login == login_name)
+    ).first()
+    # Give the connection back before the check, which may wait for a free worker
+    db.session.rollback()
+
+    try:
+        matches, new_hash = verify_password(row.password if row else None, password)
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many logins, try again'}), 503, {'Retry-After': '1'}
+    if not matches:
+        return jsonify({'error': 'Invalid login or password'}), 401
+
+    if new_hash:
+        # Only if the password was not changed in the meantime. Run on the connection, so the
+        # session hooks do not drop the topic and teacher caches, which hold no passwords
+        accounts = Account.__table__
+        db.session.connection().execute(
+            update(accounts).where(accounts.c.id == row.id, accounts.c.password == row.password)
+            .values(password=new_hash)
+        )
+        db.session.commit()
+
+    token, expires_at = issue_token(Principal(row.id, row.user_type, row.teacher_id, row.student_id))
+    return jsonify({
+        'id': row.id,
+        'login': login_name,
+        'fullName': row.full_name,
+        'role': row.user_type.value,
+        'teacherId': row.teacher_id,
+        'studentId': row.student_id,
+        'token': token,
+        'expiresAt': expires_at
+    }), 200
+
+
+@auth_bp.route('/me', methods=['GET'])
+@authenticated()
+def me():
+    """The principal of the request's token, read without a database query."""
+    principal = current_principal()
+    if principal is None:
+        return jsonify({'error': 'Authentication required'}), 401
+    return jsonify({
+        'id': principal.account_id,
+        'role': principal.role.value,
+        'teacherId': principal.teacher_id,
+        'studentId': principal.student_id
+    }), 200
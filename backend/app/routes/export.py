@@ -1,74 +1,106 @@
 import datetime
-from io import BytesIO
-from flask import Blueprint, send_file
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from app.models.student import Student
-from app.models.topic import TopicStatus
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+from app.services.reports import (
+    students_by_topic_csv, students_by_topic_ndjson, stream_file, STUDENTS_BY_TOPIC_MIMETYPES
+)
+from app.services.export_jobs import open_artifact, open_cached_artifact, submit_export, get_job
 
 
 export_bp = Blueprint('export', __name__, url_prefix='/api/export')
 
+# Text formats are generated row by row while the response is being sent
+STREAMED_FORMATS = {
+    'csv': students_by_topic_csv,
+    'ndjson': students_by_topic_ndjson,
+}
+
+
+def _export_filename(export_format):
+    return f"studenci_tematy_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+
+
+def _artifact_response(f, export_format):
+    return Response(
+        stream_file(f),
+        mimetype=STUDENTS_BY_TOPIC_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={_export_filename(export_format)}'},
+        direct_passthrough=True
+    )
+
+
+def _job_accepted(job):
+    return jsonify(job.to_dict()), 202, {
+        'Location': url_for('export.get_export_job', job_id=job.id),
+        'Retry-After': '1'
+    }
+
+
 @export_bp.route('/students-by-topic', methods=['GET'])
 def export_students_by_topic():
-    try:
-        students = Student.query.order_by(
-            Student.topic_id.nullslast(), 
-            Student.index_number
-        ).all()
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Studenci wg tematów"
-        
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        
-        headers = ["Topic ID", "Temat", "Nr indeksu", "Imię i Nazwisko", "Temat zatwierdzony przez KPK", "Prowadzący zatwierdził deklarację","Student zatwierdził deklarację"]
-        ws.append(headers)
-        
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        current_topic_id = None
-        
-        for student in students:
-            if current_topic_id is not None and current_topic_id != student.topic_id:
-                ws.append([])
-            
-            current_topic_id = student.topic_id
-            
-            row_data = [
-                student.topic_id if student.topic_id else "Brak tematu",
-                student.topic.title if student.topic else "Nie przypisany",
-                student.index_number,
-                student.account.full_name if student.account else "",
-                "Tak" if student.topic and student.topic.status == TopicStatus.ZATWIERDZONY else "Nie",
-                "Tak" if student.topic and student.topic.teacher and student.topic.teacher.is_declaration_approved else "Nie",
-                "Tak" if student.is_declaration_approved else "Nie"
-            ]
-
-            ws.append(row_data)
-        
+    """
+    Export students grouped by topic.
+    Query params: format=xlsx (default) / csv / ndjson
+    The XLSX file is cached and reused until the underlying data changes. When
+    it has to be built, an export job is queued and returned with 202 as by
+    POST /students-by-topic/jobs; the file is then downloaded from the job.
+    """
+    export_format = request.args.get('format', 'xlsx').lower()
+    if export_format not in STUDENTS_BY_TOPIC_MIMETYPES:
+        return {"error": f"Unsupported format: {export_format}"}, 400
 
-        column_widths = [12, 60, 12, 30, 30, 30, 30]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[chr(64 + i)].width = width
-        
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        
-        filename = f"studenci_tematy_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        return send_file(
-            buffer,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
+    if export_format in STREAMED_FORMATS:
+        return Response(
+            stream_with_context(STREAMED_FORMATS[export_format]()),
+            mimetype=STUDENTS_BY_TOPIC_MIMETYPES[export_format],
+            headers={'Content-Disposition': f'attachment; filename={_export_filename(export_format)}'}
         )
+
+    try:
+        f = open_cached_artifact(export_format)
+        if f is None:
+            return _job_accepted(submit_export(export_format))
+        return _artifact_response(f, export_format)
         
     except Exception as e:
-        return {"error": str(e)}, 500
\ No newline at end of file
+        return {"error": str(e)}, 500
+
+
+@export_bp.route('/students-by-topic/jobs', methods=['POST'])
+def create_export_job():
+    """
+    Queue an export in the background worker pool.
+    Expects JSON (optional): { "format": "xlsx" | "csv" | "ndjson" }
+    Returns the job; poll GET /api/export/jobs/<id> until status is "done".
+    """
+    data = request.get_json(silent=True) or {}
+    export_format = str(data.get('format', 'xlsx')).lower()
+    if export_format not in STUDENTS_BY_TOPIC_MIMETYPES:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+
+    return _job_accepted(submit_export(export_format))
+
+
+@export_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_export_job(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    response = job.to_dict()
+    if job.status == 'done':
+        response['download_url'] = url_for('export.download_export_job', job_id=job.id)
+    return jsonify(response)
+
+
+@export_bp.route('/jobs/<job_id>/file', methods=['GET'])
+def download_export_job(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'done':
+        return jsonify({'error': 'Export is not ready', 'status': job.status}), 409
+
+    f = open_artifact(job.path)
+    if f is None:
+        return jsonify({'error': 'Export file has expired, create a new job'}), 410
+    return _artifact_response(f, job.format)
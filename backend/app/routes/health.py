@@ -1,10 +1,50 @@
-from flask import Blueprint, jsonify
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
+from sqlalchemy import text
+from app import db
+from app.services.metrics import render_metrics
 
 health_bp = Blueprint('health', __name__, url_prefix='/api')
 
 @health_bp.route('/health', methods=['GET'])
 def health_check():
+    """
+    Liveness check. With ?deep=1 also times a database round-trip and
+    returns 503 when it fails or exceeds HEALTH_DB_MAX_LATENCY_MS, so the
+    load balancer can take a degraded worker out of rotation.
+    """
+    if request.args.get('deep') not in ('1', 'true'):
+        return jsonify({
+            'status': 'healthy',
+            'message': 'API is running'
+        }), 200
+
+    started = time.perf_counter()
+    try:
+        db.session.execute(text('SELECT 1'))
+        db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'unhealthy',
+            'message': 'Database is unreachable',
+            'error': str(e)
+        }), 503
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    if latency_ms > current_app.config['HEALTH_DB_MAX_LATENCY_MS']:
+        return jsonify({
+            'status': 'degraded',
+            'message': 'Database responds slowly',
+            'db_latency_ms': round(latency_ms, 2)
+        }), 503
     return jsonify({
         'status': 'healthy',
-        'message': 'API is running'
-    }), 200
\ No newline at end of file
+        'message': 'API is running',
+        'db_latency_ms': round(latency_ms, 2)
+    }), 200
+
+@health_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Metrics of this worker process in the Prometheus text format."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
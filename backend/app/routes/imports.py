@@ -0,0 +1,68 @@
+import hmac
+from flask import Blueprint, current_app, jsonify, request
+from app.models.account import UserType
+from app.services.auth_tokens import authenticated, current_principal
+from app.services.usos_import import import_usos, InvalidImportFile, FORMATS, DEFAULT_BATCH_SIZE
+
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/api/admin/import')
+
+CONTENT_TYPE_FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json': 'json'
+}
+
+
+def _import_token_valid():
+    """The shared import token of scripts, in the X-Import-Token header."""
+    token = current_app.config.get('USOS_IMPORT_TOKEN')
+    given = request.headers.get('X-Import-Token')
+    return bool(token) and given is not None and hmac.compare_digest(given.encode(), token.encode())
+
+
+@imports_bp.route('/usos', methods=['POST'])
+def import_usos_dump():
+    """
+    Import students and teachers from a USOS dump, see app/services/usos_import.py.
+    The dump is the request body (text/csv, application/x-ndjson or application/json)
+    or a multipart upload in the `file` field. Requires an administrator's token
+    or the X-Import-Token header.
+    Query params: format (csv, jsonl, json), batch_size, delimiter
+    Returns the import report with throughput and per-row errors.
+    """
+    if _import_token_valid():
+        return _import()
+    return _import_as_admin()
+
+
+@authenticated(UserType.ADMIN)
+def _import_as_admin():
+    if current_principal() is None:
+        return jsonify({'error': 'Forbidden'}), 403
+    return _import()
+
+
+def _import():
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        default_format = (upload.filename or '').rsplit('.', 1)[-1].lower()
+    else:
+        # Read straight from the request body, the dump is never held in memory
+        stream = request.stream
+        default_format = CONTENT_TYPE_FORMATS.get(request.mimetype)
+
+    fmt = request.args.get('format', default_format)
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    batch_size = request.args.get('batch_size', DEFAULT_BATCH_SIZE, type=int)
+    if not batch_size or batch_size < 1:
+        return jsonify({'error': 'batch_size must be a positive integer'}), 400
+
+    try:
+        report = import_usos(stream, fmt, batch_size=batch_size, delimiter=request.args.get('delimiter', ','))
+    except InvalidImportFile as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(report), 200
@@ -1,38 +1,81 @@
+import math
 from datetime import datetime
-from flask import Blueprint, jsonify, request
-from app.models.topic import Topic, TopicStatus
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from sqlalchemy import func, or_, select, tuple_, update
+from app.models.topic import Topic, TopicStatus, STANDARD_TEAM_SIZE, MAX_TEAM_SIZE
 from app import db
 from app.models.teacher import Teacher
 from app.models.student import Student
 from app.models.declaration import Declaration, Status
-from app.models.account import Account
+from app.models.account import Account, UserType
+from app.services.topic_cache import topic_dict, topic_dicts
+from app.services.teacher_identity import teacher_identity
+from app.services.topic_search import topic_search_statement, highlight
+from app.services.auth_tokens import authenticated, current_principal
+from app.services.change_bus import get_change_bus, publish_on_commit, stream_events, topic_status_event
+from app.services.team_limits import (
+    TeamLimitExceeded, apply_load_changes, lock_topic, lock_topic_rows, reserve_new_topic, set_topic_status,
+    status_change_deltas
+)
+from app.services.declarations import declare_batch, MAX_BATCH_DECLARATIONS
+from app.services.enrollment import EnrollmentError, join_topic, leave_topic
+from app.services.change_markers import conditional, TOPIC_LISTING_TABLES, PENDING_TOPICS_TABLES
+from app.services.pagination import (
+    DEFAULT_PAGE_LIMIT, InvalidPageRequest, parse_limit, encode_cursor, decode_datetime_cursor
+)
 from datetime import datetime
 
 
 topics_bp = Blueprint('topics', __name__, url_prefix='/api/topics')
 
+# Ids per UPDATE ... WHERE id IN (...) in bulk operations
+BULK_CHUNK_SIZE = 500
+
+def _pending_topic_rows():
+    """
+    Pending topics as plain tuples, in a single query:
+    (id, title, description, status, topic_justification, creation_date,
+     teacher_title, teacher_full_name, student_count)
+    """
+    student_counts = db.session.query(
+        Student.topic_id,
+        func.count(Student.id).label('student_count')
+    ).group_by(Student.topic_id).subquery()
+
+    return db.session.query(
+        Topic.id,
+        Topic.title,
+        Topic.description,
+        Topic.status,
+        Topic.topic_justification,
+        Topic.creation_date,
+        Teacher.title,
+        Account.full_name,
+        func.coalesce(student_counts.c.student_count, 0)
+    ).outerjoin(Teacher, Topic.teacher_id == Teacher.id) \
+     .outerjoin(Account, Teacher.account_id == Account.id) \
+     .outerjoin(student_counts, student_counts.c.topic_id == Topic.id) \
+     .filter(Topic.status == TopicStatus.OCZEKUJACY) \
+     .order_by(Topic.id) \
+     .all()
+
 @topics_bp.route('/pending', methods=['GET'])
+@conditional(*PENDING_TOPICS_TABLES)
 def get_pending_topics():
     try:
-        pending_topics = Topic.query.filter_by(status=TopicStatus.OCZEKUJACY).all()
         response_list = []
-        for topic in pending_topics:
-            teacher_title = None
-            teacher_full_name = None
-            if topic.teacher:
-                teacher_title = topic.teacher.title.value
-                teacher_full_name = topic.teacher.account.full_name
-        
+        for (topic_id, title, description, status, justification, creation_date,
+             teacher_title, teacher_full_name, student_count) in _pending_topic_rows():
             response_list.append({
-                'id': topic.id,
-                'title': topic.title,
-                'description': topic.description,
-                'status': topic.status.value, 
-                'topic_justification': topic.topic_justification,
-                'creation_date': topic.creation_date.isoformat() if topic.creation_date else None,
-                'teacher_title': teacher_title,
+                'id': topic_id,
+                'title': title,
+                'description': description,
+                'status': status.value, 
+                'topic_justification': justification,
+                'creation_date': creation_date.isoformat() if creation_date else None,
+                'teacher_title': teacher_title.value if teacher_title else None,
                 'teacher_full_name': teacher_full_name,
-                'student_count': len(topic.students)
+                'student_count': student_count
             })
         return jsonify({
             'count': len(response_list),
@@ -45,94 +88,322 @@ def get_pending_topics():
             'message': str(e)
         }), 500
 
+def _apply_topic_filters(query, args):
+    """Applies the optional status / is_open / q filters of the topic listing."""
+    status = args.get('status')
+    if status:
+        try:
+            query = query.filter(Topic.status == TopicStatus(status))
+        except ValueError:
+            raise InvalidPageRequest(f'Unknown status: {status}')
+
+    is_open = args.get('is_open')
+    if is_open:
+        if is_open.lower() not in ('true', 'false', '1', '0'):
+            raise InvalidPageRequest('is_open must be true or false')
+        query = query.filter(Topic.is_open == (is_open.lower() in ('true', '1')))
+
+    text = args.get('q', '').strip()
+    if text:
+        query = query.filter(or_(
+            Topic.title.icontains(text, autoescape=True),
+            Topic.description.icontains(text, autoescape=True)
+        ))
+    return query
+
 @topics_bp.route('', methods=['GET'])
+@conditional(*TOPIC_LISTING_TABLES)
 def get_topics():
+    """
+    List topics, newest first.
+    Optional query params:
+    - supervisor_id: account id of the supervisor
+    - status: ZATWIERDZONY / ODRZUCONY / OCZEKUJACY
+    - is_open: true / false
+    - q: text searched in title and description
+    - limit: page size; when set, the token for the next page is returned in the X-Next-Cursor header
+    - cursor: value of X-Next-Cursor from the previous page
+    """
     supervisor_id = request.args.get('supervisor_id')
     query = Topic.query
     if supervisor_id:
         # supervisor_id is the account_id, need to find the teacher first
-        teacher = Teacher.query.filter_by(account_id=supervisor_id).first()
+        teacher = teacher_identity(supervisor_id)
         if teacher:
-            query = query.filter_by(teacher_id=teacher.id)
+            query = query.filter_by(teacher_id=teacher.teacher_id)
         else:
             # No teacher found for this account, return empty list
             return jsonify([])
-    
-    topics = query.all()
-    return jsonify([t.to_dict() for t in topics])
+
+    cursor = request.args.get('cursor')
+    try:
+        limit = parse_limit(request.args.get('limit'), default=DEFAULT_PAGE_LIMIT if cursor else None)
+        query = _apply_topic_filters(query, request.args)
+        if cursor:
+            # Keyset condition on the (creation_date, id) sort key, served by the composite indexes
+            query = query.filter(tuple_(Topic.creation_date, Topic.id) < tuple_(*decode_datetime_cursor(cursor)))
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Only the sort key is selected, topic_dicts() serializes from the cache and loads the rest
+    query = query.with_entities(Topic.id, Topic.creation_date).order_by(Topic.creation_date.desc(), Topic.id.desc())
+    if limit is None:
+        return jsonify(topic_dicts([row.id for row in query.all()]))
+
+    rows = query.limit(limit + 1).all()
+    response = jsonify(topic_dicts([row.id for row in rows[:limit]]))
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(last.creation_date, last.id)
+    return response
+
+@topics_bp.route('/search', methods=['GET'])
+@conditional(*TOPIC_LISTING_TABLES)
+def search_topics():
+    """
+    Full-text search in topic title, description and justification.
+    Query params:
+    - q: search words (required); every word must match, as a word prefix
+    - status, is_open: same filters as the listing
+    - limit: page size (default 50), offset: number of results to skip
+    Response: { "query", "results": [topic + "rank" + "snippet"], "nextOffset" }
+    The snippet is HTML-escaped with matches wrapped in <mark> tags.
+    """
+    try:
+        limit = parse_limit(request.args.get('limit'), default=DEFAULT_PAGE_LIMIT)
+        try:
+            offset = int(request.args.get('offset') or 0)
+        except ValueError:
+            raise InvalidPageRequest('offset must be an integer')
+        if offset < 0:
+            raise InvalidPageRequest('offset must not be negative')
+        statement = topic_search_statement(request.args.get('q'), db.session.get_bind().dialect.name)
+        statement = _apply_topic_filters(statement, {
+            'status': request.args.get('status'),
+            'is_open': request.args.get('is_open')
+        })
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = db.session.execute(statement.limit(limit + 1).offset(offset)).all()
+    page = rows[:limit]
+    topics = {t['id']: t for t in topic_dicts([row.id for row in page])}
+    return jsonify({
+        'query': request.args.get('q'),
+        'results': [
+            {**topics[row.id], 'rank': row.rank, 'snippet': highlight(row.snippet)}
+            for row in page if row.id in topics
+        ],
+        'nextOffset': offset + limit if len(rows) > limit else None
+    })
+
+def _team_limit_response(teacher_ids):
+    return jsonify({
+        'error': 'Team limit reached',
+        'message': 'The supervisor already has the maximum number of teams for their position',
+        'teacherIds': teacher_ids
+    }), 409
+
+
+def _event_id(value):
+    """Non-negative event id from a query parameter or header, or None."""
+    try:
+        event_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return event_id if event_id >= 0 else None
+
+
+def _too_many_subscribers():
+    return jsonify({'error': 'Too many subscribers'}), 503, {'Retry-After': '5'}
+
+
+@topics_bp.route('/changes', methods=['GET'])
+def get_topic_changes():
+    """
+    Long poll for topic status and declaration changes.
+    Query params: after (id of the last seen event), timeout (seconds to wait).
+    Without `after` returns at once with the current lastEventId to start from.
+    `reset` tells the client it missed events and has to reload the topics.
+    """
+    bus = get_change_bus()
+    if 'after' not in request.args:
+        return jsonify({'events': [], 'lastEventId': bus.last_id, 'reset': False}), 200
+
+    after = _event_id(request.args.get('after'))
+    if after is None:
+        return jsonify({'error': 'after must be a non-negative integer'}), 400
+    try:
+        timeout = float(request.args.get('timeout', current_app.config['CHANGES_MAX_WAIT_SECONDS']))
+    except ValueError:
+        timeout = math.nan
+    if math.isnan(timeout):
+        return jsonify({'error': 'timeout must be a number'}), 400
+    timeout = min(max(timeout, 0), current_app.config['CHANGES_MAX_WAIT_SECONDS'])
+
+    if not bus.attach(current_app.config['CHANGES_MAX_SUBSCRIBERS']):
+        return _too_many_subscribers()
+    try:
+        events, reset = bus.wait(after, timeout)
+    finally:
+        bus.detach()
+    return jsonify({
+        'events': [{'id': event_id, **data} for event_id, data in events],
+        'lastEventId': events[-1][0] if events else (bus.last_id if reset else after),
+        'reset': reset
+    }), 200
+
+
+@topics_bp.route('/events', methods=['GET'])
+def stream_topic_changes():
+    """
+    The same changes as /changes as a server-sent events stream.
+    Resumes after the Last-Event-ID header (or `after` query param) when given.
+    The stream holds no database connection while it waits.
+    """
+    bus = get_change_bus()
+    after = _event_id(request.headers.get('Last-Event-ID', request.args.get('after')))
+    if after is None:
+        after = bus.last_id
+    if not bus.attach(current_app.config['CHANGES_MAX_SUBSCRIBERS']):
+        return _too_many_subscribers()
+
+    stream = stream_events(
+        bus, after,
+        current_app.config['SSE_HEARTBEAT_SECONDS'],
+        current_app.config['SSE_MAX_DURATION_SECONDS']
+    )
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Called by the server when the stream ends or the client goes away
+    response.call_on_close(bus.detach)
+    return response
+
 
 @topics_bp.route('/<int:id>', methods=['GET'])
 def get_topic(id):
-    topic = Topic.query.get_or_404(id)
-    return jsonify(topic.to_dict())
+    data = topic_dict(id)
+    if data is None:
+        abort(404)
+    return jsonify(data)
 
 @topics_bp.route('', methods=['POST'])
+@authenticated(UserType.TEACHER)
 def create_topic():
     data = request.get_json()
     
-    # Require supervisor_id from request
-    supervisor_id = data.get('supervisor_id')
-    if not supervisor_id:
-        return jsonify({'error': 'supervisor_id is required'}), 400
+    principal = current_principal()
+    if principal is not None:
+        supervisor_id = principal.account_id
+    else:
+        # Without a token, require supervisor_id from request
+        supervisor_id = data.get('supervisor_id')
+        if not supervisor_id:
+            return jsonify({'error': 'supervisor_id is required'}), 400
     
-    teacher = Teacher.query.filter_by(account_id=supervisor_id).first()
+    max_members = data.get('maxMembers', STANDARD_TEAM_SIZE)
+    if isinstance(max_members, bool) or not isinstance(max_members, int) \
+            or not 1 <= max_members <= MAX_TEAM_SIZE:
+        return jsonify({'error': f'maxMembers must be an integer between 1 and {MAX_TEAM_SIZE}'}), 400
+    # A standard topic has a team of STANDARD_TEAM_SIZE, other sizes need a justification
+    is_standard = data.get('isStandard', max_members == STANDARD_TEAM_SIZE)
+    if not isinstance(is_standard, bool):
+        return jsonify({'error': 'isStandard must be true or false'}), 400
+    if is_standard != (max_members == STANDARD_TEAM_SIZE):
+        return jsonify({'error': f'Only topics with maxMembers {STANDARD_TEAM_SIZE} are standard'}), 400
+    if not is_standard and not (data.get('topicJustification') or '').strip():
+        return jsonify({'error': 'topicJustification is required for a non-standard topic'}), 400
+    
+    teacher = teacher_identity(supervisor_id)
     if not teacher:
         return jsonify({'error': 'Teacher not found for the given supervisor_id'}), 404
     
+    try:
+        # Taken before the insert, the counter row serializes concurrent submissions
+        reserve_new_topic(teacher.teacher_id)
+    except TeamLimitExceeded:
+        db.session.rollback()
+        return _team_limit_response([teacher.teacher_id])
+    
     new_topic = Topic(
         title=data['title'],
         description=data.get('description', ''),
         status=TopicStatus.OCZEKUJACY,
         is_open=True,
-        teacher_id=teacher.id,
-        topic_justification=data.get('topicJustification', '')
+        teacher_id=teacher.teacher_id,
+        topic_justification=data.get('topicJustification', ''),
+        rejection_reason=None,
+        is_standard=is_standard,
+        max_members=max_members,
+        # A new topic has no team and no declaration, nothing to load
+        students=[],
+        declaration=None
     )
     
     db.session.add(new_topic)
+    db.session.flush()
+    # Serialized before the commit expires the object, the supervisor comes from the identity cache
+    response = new_topic.to_dict(supervisor=Topic.supervisor_dict(
+        teacher.teacher_id, teacher.account_id, teacher.full_name, teacher.title
+    ))
     db.session.commit()
     
-    return jsonify(new_topic.to_dict()), 201
+    return jsonify(response), 201
 
 @topics_bp.route('/supervisor/me', methods=['GET'])
+@authenticated(UserType.TEACHER)
 def get_me():
-    supervisor_id = request.args.get('supervisor_id')
-    teacher = Teacher.query.filter_by(account_id=supervisor_id).first()
+    principal = current_principal()
+    supervisor_id = principal.account_id if principal else request.args.get('supervisor_id')
+    teacher = teacher_identity(supervisor_id)
     if not teacher:
         return jsonify({'error': 'No teacher found'}), 404
         
     return jsonify({
-        'id': teacher.id,
-        'fullName': teacher.account.full_name if teacher.account else 'Michał Ślimak',
+        'id': teacher.teacher_id,
+        'fullName': teacher.full_name or 'Michał Ślimak',
         'title': teacher.title.value if teacher.title else 'dr',
         'position': teacher.position.name if teacher.position else 'ADIUNKT',
         'avatar': 'https://ui-avatars.com/api/?name=Michal+Slimak&background=random'
     })
 
 @topics_bp.route('/<int:topic_id>/declare', methods=['POST'])
+@authenticated(UserType.STUDENT, UserType.TEACHER)
 def handle_declaration(topic_id):
     """
     Handle declaration for a topic. Automatically creates declaration and approves based on user type.
-    Request body: { "user_id": int (account id, required) }
+    The user comes from the Authorization token, or without one from
+    the request body: { "user_id": int (account id, required) }
     - If student: creates/updates their declaration and marks as approved
     - If teacher: approves the topic declaration and all students
     """
     try:
-        data = request.get_json() or {}
-        user_id = data.get('user_id')
-        
-        if not user_id:
-            return jsonify({'error': 'user_id is required'}), 400
-        
-        # Get the account and topic
-        account = Account.query.get(user_id)
-        if not account:
-            return jsonify({'error': 'User not found'}), 404
+        principal = current_principal()
+        if principal is not None:
+            # The token already tells the role, no account lookup
+            user_id = principal.account_id
+            student = db.session.get(Student, principal.student_id) if principal.student_id else None
+            teacher_id = principal.teacher_id
+        else:
+            data = request.get_json() or {}
+            user_id = data.get('user_id')
+            
+            if not user_id:
+                return jsonify({'error': 'user_id is required'}), 400
+            
+            # Get the account
+            account = Account.query.get(user_id)
+            if not account:
+                return jsonify({'error': 'User not found'}), 404
+            student = account.student
+            teacher_id = account.teacher.id if account.teacher else None
         
         topic = Topic.query.get_or_404(topic_id)
         
         # Handle STUDENT declaration
-        if account.student:
-            student = account.student
+        if student:
             
             # Validate student is in the topic
             if student.topic_id != topic_id:
@@ -170,11 +441,20 @@ def handle_declaration(topic_id):
             }), 200
         
         # Handle TEACHER declaration approval
-        elif account.teacher:
+        elif teacher_id:
             # Validate teacher is the supervisor of this topic
-            if topic.teacher_id != account.teacher.id:
+            if topic.teacher_id != teacher_id:
                 return jsonify({'error': 'Teacher is not the supervisor of this topic'}), 403
             
+            # Update topic status to approved, if the supervisor has a free team slot.
+            # Re-read locked, a concurrent rejection must not be applied on a stale status
+            topic = lock_topic(topic_id)
+            try:
+                set_topic_status(topic, TopicStatus.ZATWIERDZONY)
+            except TeamLimitExceeded:
+                db.session.rollback()
+                return _team_limit_response([topic.teacher_id])
+            
             # Create topic declaration if it doesn't exist
             if not topic.teacher_declaration_id:
                 topic_declaration = Declaration(
@@ -191,9 +471,6 @@ def handle_declaration(topic_id):
                 student.is_declaration_approved = True
                 approved_students.append(student.id)
             
-            # Update topic status to approved
-            topic.status = TopicStatus.ZATWIERDZONY
-            
             db.session.commit()
             
             return jsonify({
@@ -218,27 +495,122 @@ def handle_declaration(topic_id):
 
 
 
+@topics_bp.route('/declarations:batch', methods=['POST'])
+@authenticated(UserType.COORDINATOR, UserType.ADMIN)
+def handle_declarations_batch():
+    """
+    Handle many declarations in one request, e.g. at the declaration deadline.
+    Declares on behalf of the accounts in the body, so it always requires a
+    coordinator's or administrator's token.
+    Request body: { "items": [{ "user_id": int, "topic_id": int }, ...] }
+    Each item follows the rules of POST /<topic_id>/declare. Items are applied
+    together in one transaction; the response has one result per item:
+    { "user_id", "topic_id", "status": "ok" | "error", "error"?, "user_type"?, "declaration"? }
+    """
+    if current_principal() is None:
+        return jsonify({'error': 'Authentication required'}), 401
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not items or not isinstance(items, list):
+        return jsonify({'error': 'items is required'}), 400
+    if len(items) > MAX_BATCH_DECLARATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_DECLARATIONS} items per request'}), 400
+
+    try:
+        results = declare_batch(items)
+        return jsonify({
+            'count': len(results),
+            'succeeded': sum(1 for r in results if r['status'] == 'ok'),
+            'results': results
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to handle declarations', 'message': str(e)}), 500
+
+
+def _acting_student_id():
+    """
+    (student_id, None) of the student making the request, from the token or
+    without one from the body { "user_id": int (account id) }, else (None, error response).
+    """
+    principal = current_principal()
+    if principal is not None:
+        if not principal.student_id:
+            return None, (jsonify({'error': 'User is not a student'}), 403)
+        return principal.student_id, None
+
+    user_id = (request.get_json(silent=True) or {}).get('user_id')
+    if not user_id:
+        return None, (jsonify({'error': 'user_id is required'}), 400)
+    account = db.session.get(Account, user_id)
+    if not account:
+        return None, (jsonify({'error': 'User not found'}), 404)
+    if not account.student:
+        return None, (jsonify({'error': 'User is not a student'}), 403)
+    return account.student.id, None
+
+
+def _change_team(change, topic_id, message):
+    student_id, error = _acting_student_id()
+    if error:
+        return error
+    try:
+        change(student_id, topic_id)
+        db.session.commit()
+    except EnrollmentError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    return jsonify({
+        'message': message,
+        'topic': topic_dict(topic_id)
+    }), 200
+
+
+@topics_bp.route('/<int:topic_id>/join', methods=['POST'])
+@authenticated(UserType.STUDENT)
+def join_topic_team(topic_id):
+    """
+    Adds the student to the team of an open topic, 409 when the topic is full,
+    closed or the student already has a topic. Concurrent joins never take
+    more than maxMembers places, see app.services.enrollment.
+    """
+    return _change_team(join_topic, topic_id, 'Joined the topic')
+
+
+@topics_bp.route('/<int:topic_id>/leave', methods=['POST'])
+@authenticated(UserType.STUDENT)
+def leave_topic_team(topic_id):
+    """Removes the student from the team of the topic, 409 when they are not a member."""
+    return _change_team(leave_topic, topic_id, 'Left the topic')
+
+
 @topics_bp.route('/<int:topic_id>/approve', methods=['PATCH'])
 def approve_topic(topic_id):
     """
     Approve a single topic.
     Changes status to ZATWIERDZONY.
     """
-    topic = Topic.query.get(topic_id)
+    # Locked, so a concurrent status change cannot move the counter twice
+    topic = lock_topic(topic_id)
     if not topic:
         return jsonify({'error': 'Topic not found'}), 404
     
     try:
-        topic.status = TopicStatus.ZATWIERDZONY
+        set_topic_status(topic, TopicStatus.ZATWIERDZONY)
         topic.rejection_reason = None 
         
         db.session.commit()
         
         return jsonify({
             'message': 'Topic approved successfully',
-            'topic': topic.to_dict()
+            'topic': topic_dict(topic_id)
         }), 200
         
+    except TeamLimitExceeded as e:
+        db.session.rollback()
+        return _team_limit_response([e.teacher_id])
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -247,34 +619,77 @@ def approve_topic(topic_id):
         }), 500
 
 
+def _bulk_topic_ids(data):
+    """Validated, de-duplicated topic_ids of a bulk request, or None."""
+    topic_ids = data.get('topic_ids') if isinstance(data, dict) else None
+    if not topic_ids or not isinstance(topic_ids, list):
+        return None
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in topic_ids):
+        return None
+    return list(dict.fromkeys(topic_ids))
+
+
+def _bulk_set_status(topic_ids, status, rejection_reason):
+    """
+    Sets status and rejection_reason of the given topics with set-based UPDATEs,
+    BULK_CHUNK_SIZE ids at a time, and moves the supervisors' team counters.
+    Returns the ids of the topics that exist. Raises TeamLimitExceeded when a
+    supervisor would go over the limit, the caller rolls everything back.
+    """
+    returning = db.session.get_bind().dialect.update_returning
+    updated_ids = []
+    previous = []
+    for start in range(0, len(topic_ids), BULK_CHUNK_SIZE):
+        chunk = topic_ids[start:start + BULK_CHUNK_SIZE]
+        # Old statuses, locked until the commit so the counters move once per change
+        lock_topic_rows(chunk)
+        previous.extend(db.session.execute(
+            select(Topic.teacher_id, Topic.status).where(Topic.id.in_(chunk)).with_for_update()
+        ).all())
+        stmt = update(Topic).where(Topic.id.in_(chunk)).values(
+            status=status,
+            rejection_reason=rejection_reason
+        ).execution_options(synchronize_session=False)
+        if returning:
+            updated_ids.extend(db.session.execute(stmt.returning(Topic.id)).scalars())
+        else:
+            db.session.execute(stmt)
+            updated_ids.extend(db.session.execute(select(Topic.id).where(Topic.id.in_(chunk))).scalars())
+    apply_load_changes(status_change_deltas(previous, status))
+    publish_on_commit(db.session, [topic_status_event(topic_id, status) for topic_id in updated_ids])
+    return updated_ids
+
+
 @topics_bp.route('/approve-bulk', methods=['PATCH'])
 def approve_topics_bulk():
     """
-    Approve multiple topics at once.
+    Approve multiple topics at once and clear their rejection reasons.
     Expects JSON: { "topic_ids": [1, 2, 3] }
+    Returns the updated topics.
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
     if data is None:
         return jsonify({'message': 'No topics provided'}), 400
     
     try:
-        topic_ids = data.get('topic_ids', [])
+        topic_ids = _bulk_topic_ids(data)
         
         if not topic_ids:
             return jsonify({'message': 'No topics provided'}), 400
 
-        updated_count = Topic.query.filter(Topic.id.in_(topic_ids)).update(
-            {Topic.status: TopicStatus.ZATWIERDZONY},
-            synchronize_session=False
-        )
+        updated_ids = _bulk_set_status(topic_ids, TopicStatus.ZATWIERDZONY, None)
         
         db.session.commit()
         
         return jsonify({
-            'message': f'Successfully approved {updated_count} topics',
-            'count': updated_count
+            'message': f'Successfully approved {len(updated_ids)} topics',
+            'count': len(updated_ids),
+            'topics': topic_dicts(sorted(updated_ids))
         }), 200
         
+    except TeamLimitExceeded as e:
+        db.session.rollback()
+        return _team_limit_response([e.teacher_id])
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -283,6 +698,45 @@ def approve_topics_bulk():
         }), 500
 
 
+@topics_bp.route('/reject-bulk', methods=['PATCH'])
+def reject_topics_bulk():
+    """
+    Reject multiple topics at once with the same reason.
+    Expects JSON: { "topic_ids": [1, 2, 3], "rejection_reason": "Reason here..." }
+    Returns the updated topics.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({'message': 'No topics provided'}), 400
+    
+    try:
+        topic_ids = _bulk_topic_ids(data)
+        
+        if not topic_ids:
+            return jsonify({'message': 'No topics provided'}), 400
+
+        reason = data.get('rejection_reason')
+        if not reason:
+            return jsonify({'error': 'Rejection reason is required'}), 400
+
+        updated_ids = _bulk_set_status(topic_ids, TopicStatus.ODRZUCONY, reason)
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'Successfully rejected {len(updated_ids)} topics',
+            'count': len(updated_ids),
+            'topics': topic_dicts(sorted(updated_ids))
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to reject topics in bulk',
+            'message': str(e)
+        }), 500
+
+
 @topics_bp.route('/<int:topic_id>/reject', methods=['PATCH'])
 def reject_topic(topic_id):
     """
@@ -290,7 +744,7 @@ def reject_topic(topic_id):
     Expects JSON: { "rejection_reason": "Reason here..." }
     Changes status to ODRZUCONY and saves the reason.
     """
-    topic = Topic.query.get(topic_id)
+    topic = lock_topic(topic_id)
     if not topic:
         return jsonify({'error': 'Topic not found'}), 404
     
@@ -301,14 +755,14 @@ def reject_topic(topic_id):
         if not reason:
             return jsonify({'error': 'Rejection reason is required'}), 400
             
-        topic.status = TopicStatus.ODRZUCONY
+        set_topic_status(topic, TopicStatus.ODRZUCONY)
         topic.rejection_reason = reason
         
         db.session.commit()
         
         return jsonify({
             'message': 'Topic rejected successfully',
-            'topic': topic.to_dict()
+            'topic': topic_dict(topic_id)
         }), 200
         
     except Exception as e:
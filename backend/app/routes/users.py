@@ -1,28 +1,134 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import select, tuple_
+from app import db
 from app.models.account import Account, UserType
+from app.services.change_markers import conditional, USER_LISTING_TABLES
+from app.services.pagination import (
+    decode_cursor, encode_cursor, parse_limit, InvalidPageRequest, DEFAULT_PAGE_LIMIT
+)
 
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+# Rows fetched from the database per round-trip while streaming
+FETCH_BATCH_SIZE = 1000
+# Users serialized into one chunk of the streamed response
+STREAM_BATCH_SIZE = 500
+
+
+def _parse_role(raw):
+    if not raw:
+        return None
+    try:
+        return UserType(raw.upper())
+    except ValueError:
+        raise InvalidPageRequest(f'Unknown role: {raw}')
+
+
+def _decode_users_cursor(token, by_name):
+    """Cursor of the last user of a page, (full_name, id) when searching by name, (id,) otherwise."""
+    values = decode_cursor(token)
+    try:
+        if by_name:
+            full_name, user_id = values
+            return str(full_name), int(user_id)
+        (user_id,) = values
+        return (int(user_id),)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def _stream_json_array(items):
+    """Yields a JSON array in chunks, without building the whole document in memory."""
+    dumps = current_app.json.dumps
+    yield '['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= STREAM_BATCH_SIZE:
+            yield ('' if first else ',') + ','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else ',') + ','.join(chunk)
+    yield ']'
+
 
 @users_bp.route('', methods=['GET'])
+@conditional(*USER_LISTING_TABLES)
 def list_users():
     """
-    Returns all users with minimal fields needed by frontend:
+    Returns users with minimal fields needed by frontend:
     - user_id: Account.id
     - name: Account.full_name
     - role: Account.user_type (enum value)
 
     Example response item:
     { "user_id": 1, "name": "Jan Kowalski", "role": "STUDENT" }
+
+    Optional query params:
+    - role: STUDENT / TEACHER / KPK_MEMBER / COORDINATOR / PROGRAM_SUPERVISOR / ADMIN
+    - q: beginning of the full name; results are then ordered by name
+    - limit: page size; when set, the token for the next page is returned in the X-Next-Cursor header
+    - cursor: value of X-Next-Cursor from the previous page
+    Without limit all matching users are returned, ordered by id.
     """
-    accounts = Account.query.all()
+    prefix = request.args.get('q') or None
+    cursor = request.args.get('cursor')
+    query = select(Account.id, Account.full_name, Account.user_type)
+    try:
+        limit = parse_limit(request.args.get('limit'), default=DEFAULT_PAGE_LIMIT if cursor else None)
+        role = _parse_role(request.args.get('role'))
+        if role is not None:
+            query = query.where(Account.user_type == role)
+        if prefix:
+            # The range lets the database use ix_account_full_name_id, startswith keeps it exact
+            query = query.where(
+                Account.full_name >= prefix,
+                Account.full_name < prefix + '\U0010ffff',
+                Account.full_name.startswith(prefix, autoescape=True)
+            )
+        if cursor and prefix:
+            query = query.where(tuple_(Account.full_name, Account.id) > tuple_(*_decode_users_cursor(cursor, True)))
+        elif cursor:
+            query = query.where(Account.id > _decode_users_cursor(cursor, False)[0])
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = query.order_by(Account.full_name, Account.id) if prefix else query.order_by(Account.id)
 
-    def serialize(account: Account):
+    def serialize(row):
         return {
-            'user_id': account.id,
-            'name': account.full_name,
-            'role': account.user_type.value if isinstance(account.user_type, UserType) else str(account.user_type)
+            'user_id': row.id,
+            'name': row.full_name,
+            'role': row.user_type.value if isinstance(row.user_type, UserType) else str(row.user_type)
         }
 
-    return jsonify([serialize(a) for a in accounts])
+    def stream_all(session, result):
+        try:
+            yield from result
+        finally:
+            session.close()
+
+    headers = {}
+    if limit is None:
+        # Executed here, so it is counted before the headers are sent and routed like every read
+        # of the request. The session is then taken out of db.session: the teardown after the view
+        # leaves it and its connection open, and it is closed once the body is streamed
+        session = db.session()
+        result = session.execute(query.execution_options(yield_per=FETCH_BATCH_SIZE))
+        db.session.registry.clear()
+        rows = stream_all(session, result)
+    else:
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            headers['X-Next-Cursor'] = encode_cursor(last.full_name, last.id) if prefix else encode_cursor(last.id)
+
+    return Response(
+        stream_with_context(_stream_json_array(serialize(row) for row in rows)),
+        mimetype='application/json',
+        headers=headers
+    )
@@ -0,0 +1,8 @@
+from app.services.topic_loading import topic_dict_options
+from app.services.versioned_cache import VersionedLRUCache
+from app.services.topic_cache import TopicCache, topic_dict, topic_dicts, topics_to_dicts
+from app.services.teacher_identity import TeacherIdentity, teacher_identity
+from app.services.change_bus import ChangeBus, get_change_bus
+
+__all__ = ['topic_dict_options', 'VersionedLRUCache', 'TopicCache', 'topic_dict', 'topic_dicts', 'topics_to_dicts',
+           'TeacherIdentity', 'teacher_identity', 'ChangeBus', 'get_change_bus']
\ No newline at end of file
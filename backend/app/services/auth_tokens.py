@@ -0,0 +1,97 @@
+"""
+Stateless signed session tokens.
+
+A token issued at login carries the account id, role, teacher / student id
+and expiry, signed with SECRET_KEY. Endpoints decorated with @authenticated
+get the principal from the Authorization header without touching the
+database. A token stays valid until it expires, role changes take effect at
+the next login.
+"""
+import functools
+import secrets
+import time
+from collections import namedtuple
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, URLSafeSerializer
+from app.models.account import UserType
+
+TOKEN_SALT = 'auth-token'
+
+Principal = namedtuple('Principal', ['account_id', 'role', 'teacher_id', 'student_id'])
+
+
+def init_auth_tokens(app):
+    """
+    Checks SECRET_KEY at startup. Without it the debug server gets a random key
+    of its own process (tokens end with a restart), anything else refuses to start.
+    """
+    if app.config.get('SECRET_KEY'):
+        return
+    if not app.debug:
+        raise RuntimeError('SECRET_KEY is not set, session tokens cannot be signed')
+    app.config['SECRET_KEY'] = secrets.token_hex(32)
+    app.logger.warning('SECRET_KEY is not set, using a random key, tokens are valid until the server restarts')
+
+
+def _serializer():
+    secret = current_app.config.get('SECRET_KEY')
+    if not secret:
+        raise RuntimeError('SECRET_KEY is not set, tokens cannot be signed')
+    return URLSafeSerializer(secret, salt=TOKEN_SALT)
+
+
+def issue_token(principal):
+    """Returns (token, expiry as unix time) for `principal`."""
+    expires_at = int(time.time() + current_app.config['AUTH_TOKEN_TTL_SECONDS'])
+    token = _serializer().dumps({
+        'id': principal.account_id,
+        'role': principal.role.value,
+        'tid': principal.teacher_id,
+        'sid': principal.student_id,
+        'exp': expires_at
+    })
+    return token, expires_at
+
+
+def read_token(token):
+    """The Principal of a valid, unexpired token, otherwise None."""
+    try:
+        payload = _serializer().loads(token)
+        if payload['exp'] < time.time():
+            return None
+        return Principal(payload['id'], UserType(payload['role']), payload['tid'], payload['sid'])
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def current_principal():
+    """Principal of the request, None when it came without a token."""
+    return g.get('principal')
+
+
+def authenticated(*roles):
+    """
+    Reads the Bearer token of the request into g.principal, 401 when it is
+    invalid or expired, 403 when the role is not one of `roles` (if given).
+    Requests without a token pass with no principal, so endpoints can fall back
+    to the ids in the request, unless AUTH_REQUIRE_TOKEN is set.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() != 'bearer' or not token:
+                if current_app.config['AUTH_REQUIRE_TOKEN']:
+                    return jsonify({'error': 'Authentication required'}), 401
+                g.principal = None
+                return view(*args, **kwargs)
+
+            principal = read_token(token.strip())
+            if principal is None:
+                return jsonify({'error': 'Invalid or expired token'}), 401
+            if roles and principal.role not in roles:
+                return jsonify({'error': 'Forbidden'}), 403
+            g.principal = principal
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from collections import deque
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.student import Student
+from app.models.topic import Topic
+from app.services.serving import cooperative, COOPERATIVE_MAX_SUBSCRIBERS, THREADED_MAX_SUBSCRIBERS
+
+
+class ChangeBus:
+    """
+    In-process log of topic changes that clients follow with a cursor.
+
+    Subscribers do not get a queue of their own: all of them wait on one
+    condition and read the shared, bounded log from their last seen id, so an
+    idle subscriber costs the thread or, under serve.py, the greenlet serving
+    it and nothing else. `subscribers` counts the connected long polls and
+    streams from attach() to detach(), see CHANGES_MAX_SUBSCRIBERS. Only
+    commits of this process are seen; with several worker processes a client
+    gets the changes of the worker it is connected to.
+    """
+
+    def __init__(self, buffer_size=1000):
+        self._events = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self.waiting = 0
+        self.subscribers = 0
+
+    @property
+    def last_id(self):
+        with self._condition:
+            return self._last_id
+
+    def attach(self, limit):
+        """Counts a new subscriber, False when `limit` subscribers are already connected."""
+        with self._condition:
+            if self.subscribers >= limit:
+                return False
+            self.subscribers += 1
+            return True
+
+    def detach(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def publish(self, events):
+        if not events:
+            return
+        with self._condition:
+            for data in events:
+                self._last_id += 1
+                self._events.append((self._last_id, data))
+            self._condition.notify_all()
+
+    def _since(self, after):
+        """
+        Events with an id greater than `after` and whether the client has to
+        reload, because it missed events that already left the buffer or it
+        has an id of a previous server run.
+        """
+        oldest = self._events[0][0] if self._events else self._last_id + 1
+        if after > self._last_id or after < oldest - 1:
+            return [], True
+        return [(event_id, data) for event_id, data in self._events if event_id > after], False
+
+    def since(self, after):
+        with self._condition:
+            return self._since(after)
+
+    def wait(self, after, timeout):
+        """Blocks until there are events after `after` or `timeout` seconds pass."""
+        with self._condition:
+            self.waiting += 1
+            try:
+                self._condition.wait_for(lambda: self._last_id != after, timeout)
+            finally:
+                self.waiting -= 1
+            return self._since(after)
+
+
+def init_change_bus(app):
+    if app.config['CHANGES_MAX_SUBSCRIBERS'] is None:
+        app.config['CHANGES_MAX_SUBSCRIBERS'] = (
+            COOPERATIVE_MAX_SUBSCRIBERS if cooperative() else THREADED_MAX_SUBSCRIBERS
+        )
+    app.extensions['change_bus'] = ChangeBus(buffer_size=app.config['CHANGE_BUS_BUFFER'])
+
+
+def get_change_bus():
+    return current_app.extensions['change_bus']
+
+
+def topic_status_event(topic_id, status):
+    return {'type': 'topic_status', 'topicId': topic_id, 'status': status.value}
+
+
+def publish_on_commit(session, events):
+    """
+    Queues events for changes the flush hooks do not see, such as bulk UPDATE
+    statements. They are published when the session commits.
+    """
+    session.info.setdefault('bus_events', []).extend(events)
+
+
+def format_sse(event_id, data):
+    return f"id: {event_id}\nevent: {data['type']}\ndata: {json.dumps(data)}\n\n"
+
+
+def _pending_events(session):
+    events = []
+    for obj in session.new:
+        if isinstance(obj, Topic):
+            events.append({'type': 'topic_created', 'topicId': obj.id, 'status': obj.status.value})
+    for obj in session.dirty:
+        if isinstance(obj, Topic):
+            state = inspect(obj)
+            if state.attrs.status.history.has_changes():
+                events.append(topic_status_event(obj.id, obj.status))
+            if state.attrs.teacher_declaration_id.history.has_changes() and obj.teacher_declaration_id:
+                events.append({'type': 'declaration', 'topicId': obj.id, 'userType': 'teacher'})
+        elif isinstance(obj, Student):
+            state = inspect(obj)
+            history = state.attrs.topic_id.history
+            for topic_id, joined in [(t, False) for t in history.deleted] + [(t, True) for t in history.added]:
+                if topic_id is not None:
+                    events.append({'type': 'team', 'topicId': topic_id, 'studentId': obj.id, 'joined': joined})
+            changed = (state.attrs.is_declaration_approved.history.has_changes()
+                       or state.attrs.declaration_id.history.has_changes())
+            if changed and obj.topic_id is not None:
+                events.append({
+                    'type': 'declaration',
+                    'topicId': obj.topic_id,
+                    'userType': 'student',
+                    'studentId': obj.id,
+                    'approved': bool(obj.is_declaration_approved)
+                })
+    return events
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    if not current_app:
+        return
+    events = _pending_events(session)
+    if events:
+        publish_on_commit(session, events)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    events = session.info.pop('bus_events', None)
+    if events and current_app and 'change_bus' in current_app.extensions:
+        get_change_bus().publish(events)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('bus_events', None)
+
+
+def stream_events(bus, after, heartbeat, max_duration):
+    """
+    Server-sent events from the bus, starting after id `after`. Sends a
+    comment every `heartbeat` seconds and ends after `max_duration`, the
+    browser's EventSource then reconnects with Last-Event-ID.
+    """
+    yield 'retry: 2000\n\n'
+    deadline = time.monotonic() + max_duration
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, reset = bus.wait(after, min(heartbeat, remaining))
+        if reset:
+            after = bus.last_id
+            yield f"id: {after}\nevent: reset\ndata: {{}}\n\n"
+        elif events:
+            after = events[-1][0]
+            yield ''.join(format_sse(event_id, data) for event_id, data in events)
+        else:
+            yield ': keep-alive\n\n'
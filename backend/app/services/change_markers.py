@@ -0,0 +1,105 @@
+import hashlib
+from functools import wraps
+from flask import current_app, g, make_response, request
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.table_version import TableVersion
+
+# Tables behind each conditional listing
+TOPIC_LISTING_TABLES = ('topic', 'student', 'teacher', 'account', 'declaration')
+PENDING_TOPICS_TABLES = ('topic', 'student', 'teacher', 'account')
+USER_LISTING_TABLES = ('account',)
+
+
+def _touched(session):
+    return session.info.setdefault('touched_tables', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed_tables(session, flush_context):
+    touched = _touched(session)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        touched.add(obj.__table__.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _record_bulk_tables(orm_execute_state):
+    # INSERT / UPDATE / DELETE statements executed without going through a flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name != TableVersion.__tablename__:
+            _touched(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_table_versions(session):
+    # Flush first, so changes flushed by the commit itself are recorded too
+    session.flush()
+    touched = session.info.pop('touched_tables', None)
+    if not touched:
+        return
+    for table_name in sorted(touched):
+        result = session.execute(
+            update(TableVersion.__table__)
+            .where(TableVersion.__table__.c.table_name == table_name)
+            .values(version=TableVersion.__table__.c.version + 1)
+        )
+        if result.rowcount == 0:
+            session.execute(insert(TableVersion.__table__).values(table_name=table_name, version=1))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_touched_tables(session):
+    session.info.pop('touched_tables', None)
+
+
+def table_markers(tables):
+    """(table, version, max id) for each table, read in a single statement."""
+    metadata_tables = db.metadata.tables
+    versions = [
+        select(TableVersion.version).where(TableVersion.table_name == t).scalar_subquery()
+        for t in tables
+    ]
+    max_ids = [select(func.max(metadata_tables[t].c.id)).scalar_subquery() for t in tables]
+    row = db.session.execute(select(*versions, *max_ids)).one()
+    return [(t, row[i] or 0, row[len(tables) + i]) for i, t in enumerate(tables)]
+
+
+def etag_markers(tables):
+    """Markers of `tables` the ETag of this request was built from, None for untagged requests."""
+    return g.get('_etag_markers', {}).get(tuple(tables))
+
+
+def compute_etag(tables):
+    markers = table_markers(tables)
+    # Kept for the body, so cached data can be checked against the same markers
+    g.setdefault('_etag_markers', {})[tuple(tables)] = markers
+    payload = f'{request.full_path}|{markers}'
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def conditional(*tables):
+    """
+    Adds a weak ETag built from the change markers of `tables` to a GET view
+    and answers If-None-Match with 304 without calling the view at all.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Apps without the database (e.g. blueprint-only unit tests) are served as usual
+            if 'sqlalchemy' not in current_app.extensions:
+                return view(*args, **kwargs)
+
+            etag = compute_etag(tables)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return wrapper
+    return decorator
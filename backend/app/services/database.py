@@ -0,0 +1,86 @@
+import math
+import time
+import sqlalchemy as sa
+from flask import current_app, g, request
+from app import db
+from app.session import REPLICA_BIND_KEY
+
+# Set after a successful write, reads of that client go to the primary until it expires
+READ_PRIMARY_COOKIE = 'read_primary_until'
+# Same value as the cookie, for cross-origin clients that do not send cookies: they echo it back
+READ_PRIMARY_HEADER = 'X-Read-Primary-Until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def pool_settings(engine):
+    """Effective connection pool settings of an engine, as far as its pool class has them."""
+    pool = engine.pool
+    settings = {'url': engine.url.render_as_string(hide_password=True), 'pool': type(pool).__name__}
+    if hasattr(pool, 'size'):
+        settings.update(
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            pool_timeout=pool.timeout()
+        )
+    settings.update(pool_recycle=pool._recycle, pool_pre_ping=pool._pre_ping)
+    return settings
+
+
+def log_pool_settings(app):
+    """
+    Logs the pool settings at startup, so a deployment shows what it actually runs with.
+    create_app() sets the logger to LOG_LEVEL, INFO by default, so they show up without further configuration.
+    """
+    with app.app_context():
+        settings = {key or 'primary': pool_settings(engine) for key, engine in db.engines.items()}
+    for name, engine_settings in settings.items():
+        app.logger.info('Database pool (%s): %s', name,
+                        ', '.join(f'{key}={value}' for key, value in engine_settings.items()))
+    return settings
+
+
+def has_replica():
+    return REPLICA_BIND_KEY in db.engines
+
+
+def _recently_wrote():
+    until = request.headers.get(READ_PRIMARY_HEADER) or request.cookies.get(READ_PRIMARY_COOKIE, 0)
+    try:
+        return float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def _route_reads():
+    if (request.method in SAFE_METHODS
+            and request.blueprint in current_app.config['REPLICA_BLUEPRINTS']
+            and not _recently_wrote()):
+        g._use_replica = True
+
+
+def _mark_write(response):
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        window = current_app.config['READ_YOUR_WRITES_SECONDS']
+        until = f'{time.time() + window:.3f}'
+        response.set_cookie(READ_PRIMARY_COOKIE, until, max_age=math.ceil(window), samesite='Lax')
+        response.headers[READ_PRIMARY_HEADER] = until
+    return response
+
+
+def init_read_replica(app):
+    """
+    Sends safe requests of REPLICA_BLUEPRINTS to the read replica. After a
+    successful write the client gets a cookie and an X-Read-Primary-Until
+    header that keep its reads on the primary for READ_YOUR_WRITES_SECONDS,
+    so it sees its own changes despite replication lag. The frontend runs on
+    another origin and sends no cookies, it echoes the header instead.
+    """
+    uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if not uri:
+        return
+    # Registered next to the primary engine rather than in SQLALCHEMY_BINDS,
+    # no model is bound to it and create_all() must not touch it
+    with app.app_context():
+        db.engines[REPLICA_BIND_KEY] = sa.create_engine(uri, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.before_request(_route_reads)
+    app.after_request(_mark_write)
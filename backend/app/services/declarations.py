@@ -0,0 +1,133 @@
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, selectinload
+from app import db
+from app.models.account import Account
+from app.models.declaration import Declaration, Status
+from app.models.topic import Topic, TopicStatus
+from app.services.team_limits import lock_topic_rows, set_topic_status, TeamLimitExceeded
+
+MAX_BATCH_DECLARATIONS = 1000
+
+
+def _insert_declarations(count, submission_date):
+    """
+    Inserts `count` submitted declarations with a single multi-row INSERT and returns their ids.
+    The rows are identical, so the order of the returned ids does not matter.
+    """
+    if count == 0:
+        return []
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        return db.session.execute(
+            insert(Declaration).returning(Declaration.id),
+            [{'status': Status.ZLOZONA, 'submission_date': submission_date}] * count
+        ).scalars().all()
+
+    declarations = [Declaration(status=Status.ZLOZONA, submission_date=submission_date) for _ in range(count)]
+    db.session.add_all(declarations)
+    db.session.flush()
+    return [d.id for d in declarations]
+
+
+def declare_batch(items):
+    """
+    Applies many declarations at once, with the same rules as
+    POST /api/topics/<id>/declare for each (user_id, topic_id) pair.
+    Everything is preloaded in a few queries and committed once.
+    Returns one result dict per item, in order.
+    """
+    now = datetime.now()
+    results = [None] * len(items)
+    valid = []
+    for i, item in enumerate(items):
+        user_id = item.get('user_id') if isinstance(item, dict) else None
+        topic_id = item.get('topic_id') if isinstance(item, dict) else None
+        if not isinstance(user_id, int) or not isinstance(topic_id, int):
+            results[i] = {'user_id': user_id, 'topic_id': topic_id, 'status': 'error',
+                          'error': 'user_id and topic_id are required'}
+        else:
+            valid.append((i, user_id, topic_id))
+
+    user_ids = {user_id for _, user_id, _ in valid}
+    topic_ids = {topic_id for _, _, topic_id in valid}
+    accounts = {a.id: a for a in Account.query.options(
+        joinedload(Account.student),
+        joinedload(Account.teacher)
+    ).filter(Account.id.in_(user_ids))} if user_ids else {}
+    if topic_ids:
+        # Locked, teacher declarations move the team counters from these statuses
+        lock_topic_rows(topic_ids)
+    topics = {t.id: t for t in Topic.query.options(
+        selectinload(Topic.students)
+    ).filter(Topic.id.in_(topic_ids)).with_for_update().populate_existing()} if topic_ids else {}
+    declaration_ids = {a.student.declaration_id for a in accounts.values() if a.student and a.student.declaration_id}
+    declarations = {d.id: d for d in Declaration.query.filter(
+        Declaration.id.in_(declaration_ids)
+    )} if declaration_ids else {}
+
+    # Students and topics that get a newly inserted declaration
+    new_for_students = {}
+    new_for_topics = {}
+
+    for i, user_id, topic_id in valid:
+        result = {'user_id': user_id, 'topic_id': topic_id}
+        results[i] = result
+        account = accounts.get(user_id)
+        topic = topics.get(topic_id)
+        if not account:
+            result.update(status='error', error='User not found')
+        elif not topic:
+            result.update(status='error', error='Topic not found')
+
+        elif account.student:
+            student = account.student
+            if student.topic_id != topic_id:
+                result.update(status='error', error='Student is not assigned to this topic')
+                continue
+            if student.declaration_id:
+                declaration = declarations[student.declaration_id]
+                declaration.status = Status.ZLOZONA
+                declaration.submission_date = now
+            else:
+                new_for_students[student.id] = student
+            student.is_declaration_approved = True
+            result.update(status='ok', user_type='student', _student=student)
+
+        elif account.teacher:
+            if topic.teacher_id != account.teacher.id:
+                result.update(status='error', error='Teacher is not the supervisor of this topic')
+                continue
+            try:
+                # First, a refused slot leaves nothing of this item behind
+                set_topic_status(topic, TopicStatus.ZATWIERDZONY)
+            except TeamLimitExceeded:
+                result.update(status='error', error='Teacher has reached the team limit')
+                continue
+            if not topic.teacher_declaration_id:
+                new_for_topics[topic.id] = topic
+            for student in topic.students:
+                student.is_declaration_approved = True
+            result.update(status='ok', user_type='teacher', _topic=topic,
+                          students_approved=[s.id for s in topic.students])
+
+        else:
+            result.update(status='error', error='User is neither a student nor a teacher')
+
+    new_ids = _insert_declarations(len(new_for_students) + len(new_for_topics), now)
+    for student, declaration_id in zip(new_for_students.values(), new_ids):
+        student.declaration_id = declaration_id
+    for topic, declaration_id in zip(new_for_topics.values(), new_ids[len(new_for_students):]):
+        topic.teacher_declaration_id = declaration_id
+
+    # Read before the commit, which expires the loaded objects
+    for result in results:
+        student = result.pop('_student', None)
+        topic = result.pop('_topic', None)
+        if student is not None:
+            result['declaration'] = {'id': student.declaration_id, 'status': Status.ZLOZONA.value, 'is_approved': True}
+        elif topic is not None:
+            result['declaration'] = {'id': topic.teacher_declaration_id, 'status': Status.ZLOZONA.value}
+            result['topic_status'] = TopicStatus.ZATWIERDZONY.value
+
+    db.session.commit()
+    return results
@@ -0,0 +1,102 @@
+"""
+Students joining and leaving topic teams.
+
+Topic.member_count mirrors the number of students of a topic and is moved
+with a conditional UPDATE of the topic row before the student is touched, so
+a join succeeds only while member_count < max_members. The UPDATE locks the
+topic row (SQLite: the database) until the commit, so concurrent joins are
+serialized by the database and a topic is never overfilled.
+"""
+from sqlalchemy import func, select, update
+from app import db
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+
+
+class EnrollmentError(Exception):
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _execute(stmt):
+    # On the connection: the student change flushed afterwards invalidates the cached topics
+    return db.session.connection().execute(stmt)
+
+
+def _join_refused(topic_id):
+    """Why the conditional UPDATE of a join matched no row."""
+    topic = db.session.execute(
+        select(Topic.is_open, Topic.status).where(Topic.id == topic_id)
+    ).first()
+    if topic is None:
+        return EnrollmentError('Topic not found', 404)
+    if not topic.is_open or topic.status == TopicStatus.ODRZUCONY:
+        return EnrollmentError('Topic is not open')
+    return EnrollmentError('Topic is full')
+
+
+def _locked_student(student_id):
+    student = db.session.get(Student, student_id, with_for_update=True, populate_existing=True)
+    if student is None:
+        raise EnrollmentError('Student not found', 404)
+    return student
+
+
+def join_topic(student_id, topic_id):
+    """
+    Adds the student to the team of an open topic with a free place.
+    Raises EnrollmentError, the caller rolls back; commits are left to the caller.
+    """
+    topics = Topic.__table__
+    result = _execute(
+        update(topics).where(
+            topics.c.id == topic_id,
+            topics.c.is_open.is_(True),
+            topics.c.status != TopicStatus.ODRZUCONY,
+            topics.c.member_count < topics.c.max_members
+        ).values(member_count=topics.c.member_count + 1)
+    )
+    if result.rowcount == 0:
+        raise _join_refused(topic_id)
+
+    # Read after the topic row is locked, so a concurrent join of the same student is seen
+    student = _locked_student(student_id)
+    if student.topic_id == topic_id:
+        raise EnrollmentError('Student is already a member of this topic')
+    if student.topic_id is not None:
+        raise EnrollmentError('Student is already a member of another topic')
+    student.topic_id = topic_id
+    student.is_declaration_approved = False
+    db.session.flush()
+
+
+def leave_topic(student_id, topic_id):
+    """Removes the student from the team of the topic. Raises EnrollmentError, the caller rolls back."""
+    topics = Topic.__table__
+    result = _execute(
+        update(topics).where(topics.c.id == topic_id, topics.c.member_count > 0)
+        .values(member_count=topics.c.member_count - 1)
+    )
+    if result.rowcount == 0 and db.session.get(Topic, topic_id) is None:
+        raise EnrollmentError('Topic not found', 404)
+
+    student = _locked_student(student_id)
+    if student.topic_id != topic_id:
+        raise EnrollmentError('Student is not a member of this topic')
+    if result.rowcount == 0:
+        raise EnrollmentError('Topic member count is out of date, recount required', 500)
+    student.topic_id = None
+    student.is_declaration_approved = False
+    db.session.flush()
+
+
+def recount_members():
+    """Recomputes every member_count from the students, after assigning students around this module."""
+    topics = Topic.__table__
+    students = Student.__table__
+    members = select(func.count()).select_from(students) \
+        .where(students.c.topic_id == topics.c.id).scalar_subquery()
+    _execute(update(topics).values(member_count=members))
@@ -0,0 +1,230 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.session import use_replica
+from app.services.metrics import get_metrics
+from app.services.reports import students_by_topic_fingerprint, STUDENTS_BY_TOPIC_WRITERS
+
+# Job files are removed this many seconds after their last update
+JOB_TTL = 3600
+JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+# Format -> id of the queued or running job of this process
+_active = {}
+_lock = threading.Lock()
+_executor = None
+
+
+class ExportJob:
+    """
+    A students-by-topic export running in the worker pool of the process
+    that queued it. Its state is a JSON file in EXPORT_CACHE_DIR/jobs, next to
+    the generated files, so any worker process can report and serve it.
+    """
+
+    def __init__(self, export_format):
+        self.id = uuid.uuid4().hex
+        self.format = export_format
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.fingerprint = None
+        self.path = None
+        self.cached = False
+        self.error = None
+
+    @classmethod
+    def from_state(cls, state):
+        job = cls.__new__(cls)
+        job.__dict__.update(state)
+        return job
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def save(self):
+        """Writes the job file atomically, readers never see a partial one."""
+        jobs_dir = _jobs_dir()
+        os.makedirs(jobs_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=jobs_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.__dict__, f)
+            os.replace(tmp_path, _job_file(self.id))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'format': self.format,
+            'status': self.status,
+            'fingerprint': self.fingerprint,
+            'cached': self.cached,
+            'error': self.error,
+            'duration': self.duration
+        }
+
+
+def _jobs_dir():
+    return os.path.join(current_app.config['EXPORT_CACHE_DIR'], 'jobs')
+
+
+def _job_file(job_id):
+    return os.path.join(_jobs_dir(), f'{job_id}.json')
+
+
+def artifact_path(fingerprint, export_format):
+    return os.path.join(current_app.config['EXPORT_CACHE_DIR'], f'students-by-topic-{fingerprint}.{export_format}')
+
+
+def _evict_old_artifacts(cache_dir, keep):
+    files = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.startswith('students-by-topic-')]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def open_artifact(path):
+    """
+    A generated file opened for reading, None when it is gone. Open it in the
+    view: the response keeps working when another request evicts the file.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        # Recently served files are evicted last
+        os.utime(path)
+    except OSError:
+        pass
+    return f
+
+
+def open_cached_artifact(export_format):
+    """The cached report of the current data, opened as by open_artifact(); None when it has to be built."""
+    return open_artifact(artifact_path(students_by_topic_fingerprint(), export_format))
+
+
+def get_or_build_artifact(export_format):
+    """
+    Returns (path, fingerprint, cached) for the report in the given format.
+    The file is reused as long as the underlying data has not changed.
+    """
+    fingerprint = students_by_topic_fingerprint()
+    path = artifact_path(fingerprint, export_format)
+    if os.path.exists(path):
+        os.utime(path)
+        return path, fingerprint, True
+
+    cache_dir = current_app.config['EXPORT_CACHE_DIR']
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            STUDENTS_BY_TOPIC_WRITERS[export_format](f)
+        # A commit during the build moves the markers: the file may mix old and new
+        # rows, so it is kept under a name of its own and never served from cache
+        if students_by_topic_fingerprint() != fingerprint:
+            path = artifact_path(uuid.uuid4().hex, export_format)
+            fingerprint = None
+        # Atomic, so concurrent readers never see a partially written file
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    _evict_old_artifacts(cache_dir, current_app.config['EXPORT_CACHE_MAX_FILES'])
+    return path, fingerprint, False
+
+
+def _run_job(app, job):
+    with app.app_context(), use_replica():
+        job.started_at = time.time()
+        job.status = 'running'
+        job.save()
+        try:
+            job.path, job.fingerprint, job.cached = get_or_build_artifact(job.format)
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            # Before the job shows as finished to its pollers
+            get_metrics().export_finished(job.format, job.status, job.duration)
+            with _lock:
+                if _active.get(job.format) == job.id:
+                    del _active[job.format]
+            job.save()
+
+
+def _get_executor(app):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=app.config['EXPORT_WORKERS'],
+            thread_name_prefix='export'
+        )
+    return _executor
+
+
+def _prune_jobs(now):
+    jobs_dir = _jobs_dir()
+    if not os.path.isdir(jobs_dir):
+        return
+    for name in os.listdir(jobs_dir):
+        path = os.path.join(jobs_dir, name)
+        try:
+            if now - os.path.getmtime(path) > JOB_TTL:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def submit_export(export_format):
+    """
+    Queues an export and returns its job. An export of the same format that
+    this process still has queued or running is returned instead of starting a new one.
+    """
+    app = current_app._get_current_object()
+    with _lock:
+        _prune_jobs(time.time())
+        job = get_job(_active[export_format]) if export_format in _active else None
+        if job is not None and not job.finished:
+            return job
+        job = ExportJob(export_format)
+        job.save()
+        _active[export_format] = job.id
+    _get_executor(app).submit(_run_job, app, job)
+    return job
+
+
+def get_job(job_id):
+    """The job with `job_id`, queued by any worker process; None when it is unknown or expired."""
+    if not JOB_ID.fullmatch(job_id):
+        return None
+    try:
+        with open(_job_file(job_id), encoding='utf-8') as f:
+            return ExportJob.from_state(json.load(f))
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,127 @@
+import functools
+import json
+import logging
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_request_log = logging.getLogger('app.slow_requests')
+
+# Bound parameters and IN lists, so repeated statements share one shape
+_PARAMS = re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|%s")
+_PARAM_LISTS = re.compile(r"\?(\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """SQL with every parameter replaced by ? and IN lists collapsed to a single ?."""
+    shape = _PARAMS.sub('?', statement)
+    shape = _PARAM_LISTS.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class RequestStats:
+    """SQL statements and database time of a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.statements += 1
+        self.db_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes executed more than `threshold` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+def _current_stats():
+    if not has_request_context():
+        return None
+    return g.get('_request_stats')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats() is not None:
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    started = conn.info.get('_query_started')
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+def _start_request():
+    g._request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = g.get('_request_stats')
+    if stats is None:
+        return response
+    config = current_app.config
+    total = time.perf_counter() - stats.started
+
+    # Headers go out before a streamed body runs, they cover the view only
+    response.headers['Server-Timing'] = ', '.join([
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statements} queries"',
+        f'app;dur={(total - stats.db_time) * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}'
+    ])
+    response.headers['Timing-Allow-Origin'] = '*'
+    repeated = stats.repeated(config['N_PLUS_ONE_THRESHOLD'])
+    if repeated:
+        response.headers['X-N-Plus-One'] = str(len(repeated))
+
+    report = functools.partial(
+        _log_request, stats, config['SLOW_REQUEST_MS'], config['N_PLUS_ONE_THRESHOLD'], {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code
+        }
+    )
+    if response.is_streamed:
+        # The body keeps recording into g._request_stats while it is streamed,
+        # the request is logged once the server closes the response
+        response.call_on_close(report)
+    else:
+        g.pop('_request_stats', None)
+        report()
+    return response
+
+
+def _log_request(stats, slow_request_ms, n_plus_one_threshold, details):
+    """Logs a slow request or one with repeated statements to app.slow_requests."""
+    total = time.perf_counter() - stats.started
+    repeated = stats.repeated(n_plus_one_threshold)
+    if total * 1000 < slow_request_ms and not repeated:
+        return
+    slow_request_log.warning(json.dumps({
+        'event': 'slow_request' if total * 1000 >= slow_request_ms else 'n_plus_one',
+        **details,
+        'duration_ms': round(total * 1000, 2),
+        'db_ms': round(stats.db_time * 1000, 2),
+        'statements': stats.statements,
+        'repeated_statements': [{'statement': shape, 'count': count} for shape, count in repeated],
+    }, ensure_ascii=False))
+
+
+def init_instrumentation(app):
+    """Counts SQL statements and database time per request, see Server-Timing and the app.slow_requests log."""
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
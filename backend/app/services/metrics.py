@@ -0,0 +1,174 @@
+import threading
+import time
+from flask import current_app, g, request
+from app import db
+
+# Prometheus default buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, count, total) in sorted(self._series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _labels(self.label_names, label_values, ('le', _number(bound)))
+                lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+            labels = _labels(self.label_names, label_values)
+            lines.append(f'{self.name}_count{labels} {count}')
+            lines.append(f'{self.name}_sum{labels} {_number(total)}')
+        return lines
+
+
+class Counter:
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{_labels(self.label_names, label_values)} {value}')
+        return lines
+
+
+def _gauge(name, help_text, value):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {_number(value)}']
+
+
+class Metrics:
+    """
+    Request, connection pool and export job metrics of this process.
+    With several worker processes every worker reports its own values,
+    Prometheus tells them apart by the scraped instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Request latency by route.', ('blueprint', 'route', 'method'))
+        self.requests = Counter(
+            'http_requests_total', 'Finished requests by route and status.', ('blueprint', 'route', 'method', 'status'))
+        self.export_duration = Histogram(
+            'export_job_duration_seconds', 'Background export job run time.', ('format', 'status'), EXPORT_BUCKETS)
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, blueprint, route, method, status, duration):
+        with self._lock:
+            self.in_flight -= 1
+            self.request_duration.observe((blueprint, route, method), duration)
+            self.requests.inc((blueprint, route, method, str(status)))
+
+    def export_finished(self, export_format, status, duration):
+        with self._lock:
+            self.export_duration.observe((export_format, status), duration)
+
+    def render(self, engine=None):
+        with self._lock:
+            lines = _gauge('http_requests_in_flight', 'Requests being handled.', self.in_flight)
+            lines += self.request_duration.render()
+            lines += self.requests.render()
+            lines += self.export_duration.render()
+        if engine is not None:
+            lines += _pool_metrics(engine.pool)
+        return '\n'.join(lines) + '\n'
+
+
+def _pool_metrics(pool):
+    # Only QueuePool keeps these numbers, SQLite in-memory databases use a StaticPool
+    if not hasattr(pool, 'checkedout'):
+        return []
+    return (
+        _gauge('db_pool_size', 'Configured connection pool size.', pool.size())
+        + _gauge('db_pool_checked_out', 'Connections currently in use.', pool.checkedout())
+        + _gauge('db_pool_checked_in', 'Idle connections in the pool.', pool.checkedin())
+        + _gauge('db_pool_overflow', 'Connections open beyond the pool size.', max(pool.overflow(), 0))
+    )
+
+
+def get_metrics():
+    return current_app.extensions['metrics']
+
+
+def _start_request():
+    g._metrics_started = time.perf_counter()
+    get_metrics().request_started()
+
+
+def _record_status(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exc):
+    started = g.pop('_metrics_started', None)
+    if started is None:
+        return
+    rule = request.url_rule
+    get_metrics().request_finished(
+        request.blueprint or '',
+        rule.rule if rule is not None else 'unmatched',
+        request.method,
+        g.pop('_metrics_status', 500),
+        time.perf_counter() - started
+    )
+
+
+def init_metrics(app):
+    app.extensions['metrics'] = Metrics()
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
+
+
+def render_metrics():
+    return get_metrics().render(db.engine)
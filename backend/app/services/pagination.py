@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def parse_limit(raw, default=None):
+    """Parses the `limit` query parameter. Returns `default` when it is missing."""
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be positive')
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+def encode_cursor(*values):
+    """Encodes the sort key of the last row of a page into an opaque token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+    if not isinstance(values, list):
+        raise InvalidPageRequest('Invalid cursor')
+    return values
+
+
+def decode_datetime_cursor(token):
+    """Decodes a (datetime, id) cursor produced by encode_cursor."""
+    values = decode_cursor(token)
+    try:
+        created, row_id = values
+        return datetime.fromisoformat(created), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
@@ -0,0 +1,94 @@
+"""
+Password verification off the request threads.
+
+Hashes are checked in a small worker pool, PASSWORD_HASH_WORKERS threads by
+default half of the cores; hashlib's scrypt and pbkdf2 release the GIL, so the
+pool bounds the CPU spent on hashing while the other endpoints keep running.
+Under serve.py the workers stay native threads, see app/services/serving.py.
+At most PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE checks are admitted at a
+time, further logins wait up to PASSWORD_HASH_WAIT_SECONDS and are then
+turned away with PasswordHasherBusy.
+
+A hash made with other parameters than PASSWORD_HASH_METHOD is replaced by a
+new one after a successful check, in the same worker task.
+"""
+import functools
+import threading
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.services.serving import cpu_executor
+
+
+class PasswordHasherBusy(Exception):
+    """All verification slots stayed taken for PASSWORD_HASH_WAIT_SECONDS."""
+
+
+@functools.lru_cache(maxsize=8)
+def _method_prefix(method):
+    """Method part of hashes made with `method`, e.g. 'scrypt' -> 'scrypt:32768:8:1'."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+@functools.lru_cache(maxsize=8)
+def _dummy_hash(method):
+    return generate_password_hash('dummy password', method=method)
+
+
+def needs_rehash(pwhash, method):
+    return pwhash.split('$', 1)[0] != _method_prefix(method)
+
+
+class PasswordPool:
+    """Worker threads for hash checks, started on the first login."""
+
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = cpu_executor(self.workers, 'password')
+            return self._executor
+
+
+def init_passwords(app):
+    app.extensions['password_pool'] = PasswordPool(
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_QUEUE']
+    )
+
+
+def _verify(pwhash, password, method):
+    """(password matches, new hash or None) - runs in the pool."""
+    if pwhash is None:
+        # Unknown login, spend the same time as for a known one
+        check_password_hash(_dummy_hash(method), password)
+        return False, None
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if needs_rehash(pwhash, method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+def verify_password(pwhash, password):
+    """
+    Checks `password` against `pwhash` (None for an unknown login) in the
+    worker pool. Returns (matches, new hash to store or None).
+    """
+    pool = current_app.extensions['password_pool']
+    if not pool.slots.acquire(timeout=current_app.config['PASSWORD_HASH_WAIT_SECONDS']):
+        raise PasswordHasherBusy()
+    try:
+        return pool.executor.submit(_verify, pwhash, password, current_app.config['PASSWORD_HASH_METHOD']).result()
+    finally:
+        pool.slots.release()
+
+
+def hash_password(password):
+    """Hash of `password` with the configured PASSWORD_HASH_METHOD, computed in the calling thread."""
+    return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
@@ -0,0 +1,154 @@
+import csv
+import hashlib
+import io
+import json
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from app import db
+from app.models.account import Account
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.topic import Topic, TopicStatus
+from app.services.change_markers import table_markers
+
+# Bump when the layout of the report changes, so cached artifacts are not reused
+REPORT_VERSION = 1
+FETCH_BATCH_SIZE = 1000
+STREAM_CHUNK_SIZE = 64 * 1024
+
+STUDENTS_BY_TOPIC_HEADERS = ["Topic ID", "Temat", "Nr indeksu", "Imię i Nazwisko", "Temat zatwierdzony przez KPK", "Prowadzący zatwierdził deklarację", "Student zatwierdził deklarację"]
+STUDENTS_BY_TOPIC_WIDTHS = [12, 60, 12, 30, 30, 30, 30]
+# Tables read by students_by_topic_rows
+STUDENTS_BY_TOPIC_TABLES = ('student', 'topic', 'teacher', 'account')
+# NDJSON keys, in the same order and with the same meaning as STUDENTS_BY_TOPIC_HEADERS
+STUDENTS_BY_TOPIC_FIELDS = ["topic_id", "topic_title", "index_number", "full_name", "topic_approved", "teacher_declaration_approved", "student_declaration_approved"]
+
+
+def students_by_topic_rows():
+    """
+    Yields one report row per student, ordered by topic and index number.
+    Rows come from a single joined query fetched in batches of FETCH_BATCH_SIZE.
+    """
+    query = db.session.query(
+        Student.topic_id,
+        Topic.title,
+        Student.index_number,
+        Account.full_name,
+        Topic.status,
+        Teacher.is_declaration_approved,
+        Student.is_declaration_approved
+    ).outerjoin(Topic, Student.topic_id == Topic.id) \
+     .outerjoin(Teacher, Topic.teacher_id == Teacher.id) \
+     .outerjoin(Account, Student.account_id == Account.id) \
+     .order_by(Student.topic_id.nullslast(), Student.index_number) \
+     .yield_per(FETCH_BATCH_SIZE)
+
+    for topic_id, topic_title, index_number, full_name, topic_status, teacher_approved, student_approved in query:
+        yield [
+            topic_id if topic_id else "Brak tematu",
+            topic_title if topic_id else "Nie przypisany",
+            index_number,
+            full_name or "",
+            "Tak" if topic_status == TopicStatus.ZATWIERDZONY else "Nie",
+            "Tak" if teacher_approved else "Nie",
+            "Tak" if student_approved else "Nie"
+        ]
+
+
+def write_students_by_topic_xlsx(fileobj):
+    """Writes the report with a write-only workbook, so rows are never all held in memory."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Studenci wg tematów")
+
+    for i, width in enumerate(STUDENTS_BY_TOPIC_WIDTHS, 1):
+        ws.column_dimensions[chr(64 + i)].width = width
+
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header = []
+    for title in STUDENTS_BY_TOPIC_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        header.append(cell)
+    ws.append(header)
+
+    current_topic_id = None
+    for row in students_by_topic_rows():
+        # Blank row between topics
+        if current_topic_id is not None and current_topic_id != row[0]:
+            ws.append([])
+        current_topic_id = row[0]
+        ws.append(row)
+
+    wb.save(fileobj)
+
+
+def students_by_topic_csv(rows_per_chunk=500):
+    """Yields the report as UTF-8 CSV, a chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(STUDENTS_BY_TOPIC_HEADERS)
+    for i, row in enumerate(students_by_topic_rows(), 1):
+        writer.writerow(row)
+        if i % rows_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def students_by_topic_ndjson(rows_per_chunk=500):
+    """Yields the report as newline-delimited JSON objects keyed by STUDENTS_BY_TOPIC_FIELDS."""
+    lines = []
+    for row in students_by_topic_rows():
+        lines.append(json.dumps(dict(zip(STUDENTS_BY_TOPIC_FIELDS, row)), ensure_ascii=False))
+        if len(lines) == rows_per_chunk:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def students_by_topic_fingerprint():
+    """
+    Key of the data behind the report, from the change markers of
+    STUDENTS_BY_TOPIC_TABLES: a single small query, the report is not read.
+    Equal fingerprints mean an export would produce the same file.
+    """
+    markers = table_markers(STUDENTS_BY_TOPIC_TABLES)
+    return hashlib.sha256(f'students-by-topic:{REPORT_VERSION}|{markers}'.encode()).hexdigest()
+
+
+def write_chunks(chunks, fileobj):
+    for chunk in chunks:
+        fileobj.write(chunk)
+
+
+# Writers producing the report in each format into a binary file object
+STUDENTS_BY_TOPIC_WRITERS = {
+    'xlsx': write_students_by_topic_xlsx,
+    'csv': lambda f: write_chunks(students_by_topic_csv(), f),
+    'ndjson': lambda f: write_chunks(students_by_topic_ndjson(), f),
+}
+
+STUDENTS_BY_TOPIC_MIMETYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def stream_file(f, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields an open binary file in chunks and closes it. Open the file before
+    the view returns: a removed file stays readable through its open handle.
+    """
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
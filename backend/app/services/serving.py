@@ -0,0 +1,35 @@
+"""
+Serving modes.
+
+run.py and thread based WSGI servers hold one thread per connection, so
+every client idling on the change feed ties up a thread. serve.py runs the
+app on gevent instead: the standard library is monkey patched, a connection
+is a greenlet and ChangeBus subscribers wait on a cooperative condition, so
+thousands of them cost little memory and no OS threads.
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Default CHANGES_MAX_SUBSCRIBERS: every subscriber holds a thread / a greenlet
+THREADED_MAX_SUBSCRIBERS = 100
+COOPERATIVE_MAX_SUBSCRIBERS = 5000
+
+
+def cooperative():
+    """True in a process monkey patched by gevent, see serve.py."""
+    if 'gevent.monkey' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+
+def cpu_executor(max_workers, thread_name_prefix):
+    """
+    Executor for CPU bound work such as password hashing. Under gevent the
+    standard executor runs its tasks in greenlets, which would block every
+    connection of the process; gevent's executor keeps them on native threads.
+    """
+    if cooperative():
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
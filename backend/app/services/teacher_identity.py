@@ -0,0 +1,118 @@
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models.account import Account
+from app.models.teacher import Teacher
+from app.services.versioned_cache import VersionedLRUCache
+from app.session import reads_from_replica
+
+# Tables the cached identities are read from
+IDENTITY_TABLES = ('teacher', 'account')
+
+TeacherIdentity = namedtuple('TeacherIdentity', ['teacher_id', 'account_id', 'title', 'full_name', 'position'])
+
+
+class TeacherIdentityCache(VersionedLRUCache):
+    """TeacherIdentity tuples keyed by account id."""
+
+
+def init_teacher_identity_cache(app):
+    app.extensions['teacher_identity_cache'] = TeacherIdentityCache(
+        max_size=app.config['TEACHER_CACHE_SIZE'],
+        ttl=app.config['TEACHER_CACHE_TTL']
+    )
+
+
+def get_teacher_identity_cache():
+    return current_app.extensions['teacher_identity_cache']
+
+
+def teacher_identity(account_id):
+    """
+    Teacher data of an account, from the cache when possible.
+    None when the account id is invalid or the account is not a teacher.
+    """
+    try:
+        account_id = int(account_id)
+    except (TypeError, ValueError):
+        return None
+
+    cache = get_teacher_identity_cache()
+    identity = cache.get(account_id)
+    if identity is not None:
+        return identity
+
+    version = cache.version(account_id)
+    row = db.session.execute(
+        select(Teacher.id, Teacher.account_id, Teacher.title, Account.full_name, Teacher.position)
+        .join(Account, Teacher.account_id == Account.id)
+        .where(Teacher.account_id == account_id)
+    ).first()
+    if row is None:
+        return None
+    identity = TeacherIdentity(*row)
+    if not reads_from_replica():
+        cache.put(account_id, version, identity)
+    return identity
+
+
+def _changed_account_ids(session):
+    """Account ids whose cached identity is affected by the pending flush."""
+    account_ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Teacher):
+            history = inspect(obj).attrs.account_id.history
+            account_ids.update(a for a in (obj.account_id, *history.deleted) if a is not None)
+        elif isinstance(obj, Account) and obj.id is not None:
+            account_ids.add(obj.id)
+    # A new teacher is not cached yet, only missing lookups were made for its account
+    return account_ids
+
+
+def _invalidate(account_ids):
+    if 'teacher_identity_cache' not in current_app.extensions:
+        return
+    cache = get_teacher_identity_cache()
+    if account_ids is None:
+        cache.invalidate_all()
+    elif account_ids:
+        cache.invalidate(account_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    if not current_app:
+        return
+    account_ids = _changed_account_ids(session)
+    pending = session.info.setdefault('changed_account_ids', set())
+    if pending is not None:
+        pending.update(account_ids)
+    _invalidate(account_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    # Invalidate again once the change is visible, like the topic cache does
+    if 'changed_account_ids' not in session.info:
+        return
+    account_ids = session.info.pop('changed_account_ids')
+    if current_app:
+        _invalidate(account_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('changed_account_ids', None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_statement(orm_execute_state):
+    if not current_app:
+        return
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name in IDENTITY_TABLES:
+            _invalidate(None)
+            orm_execute_state.session.info['changed_account_ids'] = None
@@ -0,0 +1,113 @@
+"""
+Supervisor team limits (get_max_teams_for_position).
+
+Teacher.active_topic_count holds the number of a teacher's pending and
+approved topics. Every status change goes through this module, which moves
+the counter in the same transaction with a conditional UPDATE that fails when
+the limit would be exceeded. The check is a single row update, so concurrent
+submissions for one teacher are serialized by the database and cannot
+overshoot the limit.
+"""
+from sqlalchemy import case, func, select, update
+from app import db
+from app.models.teacher import Teacher, Position, get_max_teams_for_position
+from app.models.topic import Topic, TopicStatus
+
+# Statuses that take one of the teacher's team slots
+ACTIVE_STATUSES = (TopicStatus.OCZEKUJACY, TopicStatus.ZATWIERDZONY)
+
+
+class TeamLimitExceeded(Exception):
+
+    def __init__(self, teacher_id):
+        super().__init__(f'Teacher {teacher_id} has reached the team limit')
+        self.teacher_id = teacher_id
+
+
+def _slots(status):
+    return 1 if status in ACTIVE_STATUSES else 0
+
+
+def _max_teams():
+    """get_max_teams_for_position as an SQL expression over teacher.position."""
+    teachers = Teacher.__table__
+    return case(*[(teachers.c.position == p, get_max_teams_for_position(p)) for p in Position])
+
+
+def _execute(stmt):
+    # On the connection, so the session hooks do not drop the teacher and topic caches,
+    # which do not contain the counter
+    return db.session.connection().execute(stmt)
+
+
+def change_load(teacher_id, delta):
+    """
+    Moves a teacher's counter by `delta`. Raises TeamLimitExceeded when an
+    increase would go over the teacher's limit, the caller rolls back.
+    """
+    if not teacher_id or not delta:
+        return
+    teachers = Teacher.__table__
+    stmt = update(teachers).where(teachers.c.id == teacher_id) \
+        .values(active_topic_count=teachers.c.active_topic_count + delta)
+    if delta > 0:
+        result = _execute(stmt.where(teachers.c.active_topic_count + delta <= _max_teams()))
+        if result.rowcount == 0:
+            raise TeamLimitExceeded(teacher_id)
+    else:
+        _execute(stmt.where(teachers.c.active_topic_count + delta >= 0))
+
+
+def apply_load_changes(deltas):
+    """Applies {teacher_id: delta}, releases first and in id order, so concurrent batches do not deadlock."""
+    for teacher_id in sorted(deltas, key=lambda t: (deltas[t] > 0, t)):
+        change_load(teacher_id, deltas[teacher_id])
+
+
+def status_change_deltas(rows, new_status):
+    """{teacher_id: delta} for (teacher_id, old status) rows moving to `new_status`."""
+    deltas = {}
+    for teacher_id, old_status in rows:
+        delta = _slots(new_status) - _slots(old_status)
+        if teacher_id and delta:
+            deltas[teacher_id] = deltas.get(teacher_id, 0) + delta
+    return deltas
+
+
+def lock_topic_rows(topic_ids):
+    """
+    Locks topics about to change status until the commit, so the statuses read
+    afterwards cannot go stale. PostgreSQL locks them with the FOR UPDATE of the
+    read; SQLite ignores FOR UPDATE, there a no-op UPDATE takes the write lock.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        topics = Topic.__table__
+        _execute(update(topics).where(topics.c.id.in_(topic_ids)).values(status=topics.c.status))
+
+
+def lock_topic(topic_id):
+    """The topic, locked and re-read from the database, or None."""
+    lock_topic_rows([topic_id])
+    return db.session.get(Topic, topic_id, with_for_update=True, populate_existing=True)
+
+
+def set_topic_status(topic, status):
+    """Sets the status of a topic loaded with lock_topic and moves its teacher's counter."""
+    change_load(topic.teacher_id, _slots(status) - _slots(topic.status))
+    topic.status = status
+
+
+def reserve_new_topic(teacher_id):
+    """Takes a slot for a new pending topic."""
+    change_load(teacher_id, _slots(TopicStatus.OCZEKUJACY))
+
+
+def recount_loads():
+    """Recomputes every counter from the topics, after loading data around this module."""
+    topics = Topic.__table__
+    teachers = Teacher.__table__
+    active = select(func.count()).select_from(topics).where(
+        topics.c.teacher_id == teachers.c.id,
+        topics.c.status.in_(ACTIVE_STATUSES)
+    ).scalar_subquery()
+    _execute(update(teachers).values(active_topic_count=active))
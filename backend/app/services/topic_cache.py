@@ -0,0 +1,176 @@
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.account import Account
+from app.models.declaration import Declaration
+from app.models.student import Student
+from app.models.teacher import Teacher
+from app.models.topic import Topic
+from app.services.change_markers import etag_markers
+from app.services.topic_loading import topic_dict_options
+from app.services.versioned_cache import VersionedLRUCache
+from app.session import reads_from_replica
+
+# Topics reloaded per query when filling the cache
+LOAD_BATCH_SIZE = 500
+# Tables read by Topic.to_dict()
+CACHED_TABLES = ('topic', 'student', 'teacher', 'account', 'declaration')
+
+
+class TopicCache(VersionedLRUCache):
+    """
+    Topic.to_dict() results keyed by topic id. The flush and commit hooks
+    below invalidate the topics a write touches, writes of other processes
+    drop the whole cache through the change markers, see synced_topic_cache().
+    """
+
+
+def init_topic_cache(app):
+    app.extensions['topic_cache'] = TopicCache(
+        max_size=app.config['TOPIC_CACHE_SIZE'],
+        ttl=app.config['TOPIC_CACHE_TTL']
+    )
+
+
+def get_topic_cache():
+    return current_app.extensions['topic_cache']
+
+
+def synced_topic_cache():
+    """
+    The topic cache. In a response tagged with the change markers of
+    CACHED_TABLES it is first emptied if they moved since the last sync, so a
+    cached body is never older than its ETag. Untagged responses rely on the TTL.
+    """
+    cache = get_topic_cache()
+    markers = etag_markers(CACHED_TABLES)
+    if markers is not None:
+        cache.sync(markers)
+    return cache
+
+
+def topic_dict(topic_id):
+    """Serialized topic, from the cache when possible. None when the topic does not exist."""
+    cache = synced_topic_cache()
+    data = cache.get(topic_id)
+    if data is not None:
+        return data
+
+    version = cache.version(topic_id)
+    topic = db.session.get(Topic, topic_id, options=topic_dict_options(), populate_existing=True)
+    if topic is None:
+        return None
+    data = topic.to_dict()
+    # Only primary reads are cached, a lagging replica could put back data older than an invalidation
+    if not reads_from_replica():
+        cache.put(topic_id, version, data)
+    return data
+
+
+def topic_dicts(topic_ids):
+    """
+    Serializes topics by id, keeping the order and skipping missing ids.
+    Cached topics cost nothing, the rest are loaded with their relations in batches.
+    """
+    cache = synced_topic_cache()
+    result = {}
+    versions = {}
+    for topic_id in topic_ids:
+        data = cache.get(topic_id)
+        if data is None:
+            versions[topic_id] = cache.version(topic_id)
+        else:
+            result[topic_id] = data
+
+    missing = list(versions)
+    store = not reads_from_replica()
+    for start in range(0, len(missing), LOAD_BATCH_SIZE):
+        batch = missing[start:start + LOAD_BATCH_SIZE]
+        loaded = Topic.query.options(*topic_dict_options()).populate_existing().filter(Topic.id.in_(batch))
+        for topic in loaded:
+            data = topic.to_dict()
+            if store:
+                cache.put(topic.id, versions[topic.id], data)
+            result[topic.id] = data
+
+    return [result[topic_id] for topic_id in topic_ids if topic_id in result]
+
+
+def topics_to_dicts(topics):
+    """Serializes already loaded topics, keeping their order."""
+    return topic_dicts([topic.id for topic in topics])
+
+
+def _changed_topic_ids(session):
+    """
+    Topic ids whose serialization is affected by the pending flush.
+    Returns None when the change can affect any topic.
+    """
+    topic_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Topic):
+            if obj.id is not None:
+                topic_ids.add(obj.id)
+        elif isinstance(obj, Student):
+            history = inspect(obj).attrs.topic_id.history
+            topic_ids.update(t for t in (obj.topic_id, *history.deleted) if t is not None)
+        elif isinstance(obj, Account):
+            # New accounts are not referenced by any cached topic yet
+            if obj in session.deleted or inspect(obj).attrs.full_name.history.has_changes():
+                return None
+        elif isinstance(obj, (Teacher, Declaration)):
+            if obj not in session.new:
+                return None
+    return topic_ids
+
+
+def _invalidate(session, topic_ids):
+    if 'topic_cache' not in current_app.extensions:
+        return
+    cache = get_topic_cache()
+    if topic_ids is None:
+        cache.invalidate_all()
+    elif topic_ids:
+        cache.invalidate(topic_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    if not current_app:
+        return
+    topic_ids = _changed_topic_ids(session)
+    pending = session.info.setdefault('changed_topic_ids', set())
+    if topic_ids is None or pending is None:
+        session.info['changed_topic_ids'] = None
+    else:
+        pending.update(topic_ids)
+    _invalidate(session, topic_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    # Invalidate again once the data is visible to other sessions, in case a
+    # reader cached the old state between the flush and the commit
+    if 'changed_topic_ids' not in session.info:
+        return
+    topic_ids = session.info.pop('changed_topic_ids')
+    if current_app:
+        _invalidate(session, topic_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('changed_topic_ids', None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _on_bulk_statement(orm_execute_state):
+    # Bulk INSERT / UPDATE / DELETE statements bypass the flush, so their rows are unknown
+    if not current_app:
+        return
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name in CACHED_TABLES:
+            _invalidate(orm_execute_state.session, None)
+            orm_execute_state.session.info['changed_topic_ids'] = None
@@ -0,0 +1,24 @@
+from sqlalchemy.orm import configure_mappers, joinedload, selectinload
+from app.models.topic import Topic
+from app.models.teacher import Teacher
+from app.models.student import Student
+
+
+def topic_dict_options():
+    """
+    Loader options for everything Topic.to_dict() touches.
+    Many-to-one hops are joined into the topic query, the team collection
+    is fetched with one extra SELECT ... IN for the whole page, so a listing
+    costs two queries no matter how many topics or students it contains.
+    """
+    # Topic.teacher and Student.account are backrefs, they only exist once mappers are configured
+    configure_mappers()
+    return (
+        joinedload(Topic.teacher).joinedload(Teacher.account),
+        joinedload(Topic.declaration),
+        selectinload(Topic.students).options(
+            joinedload(Student.account),
+            joinedload(Student.declaration)
+        )
+    )
+
@@ -0,0 +1,112 @@
+import html
+import re
+from sqlalchemy import DDL, event, func, literal_column, or_, select, table, column, literal
+from app.models.topic import Topic
+from app.services.pagination import InvalidPageRequest
+
+# Private use characters mark the matches, the snippet is HTML-escaped before they become <mark> tags
+MATCH_START = '\ue000'
+MATCH_STOP = '\ue001'
+SNIPPET_WORDS = 16
+
+# Names of the database objects of the index, which are not part of the models
+SEARCH_TABLE = 'topic_fts'
+SEARCH_INDEX = 'ix_topic_search'
+
+# SQLite: external content FTS5 table over topic, kept in sync by triggers
+SQLITE_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        title, description, topic_justification,
+        content='topic', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {SEARCH_TABLE}_ai AFTER INSERT ON topic BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, title, description, topic_justification)
+        VALUES (new.id, new.title, new.description, new.topic_justification);
+    END""",
+    f"""CREATE TRIGGER {SEARCH_TABLE}_ad AFTER DELETE ON topic BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, description, topic_justification)
+        VALUES ('delete', old.id, old.title, old.description, old.topic_justification);
+    END""",
+    f"""CREATE TRIGGER {SEARCH_TABLE}_au AFTER UPDATE OF title, description, topic_justification ON topic BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, description, topic_justification)
+        VALUES ('delete', old.id, old.title, old.description, old.topic_justification);
+        INSERT INTO {SEARCH_TABLE}(rowid, title, description, topic_justification)
+        VALUES (new.id, new.title, new.description, new.topic_justification);
+    END""",
+]
+
+# PostgreSQL: GIN index over the same expression the search query uses, maintained by the database
+POSTGRES_DOCUMENT_SQL = (
+    "coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(topic_justification, '')"
+)
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(topic_justification, '')), 'B')"
+)
+POSTGRES_SEARCH_DDL = [f"CREATE INDEX {SEARCH_INDEX} ON topic USING GIN (({POSTGRES_VECTOR_SQL}))"]
+
+# Databases created with create_all() (tests, development) get the index too, migrations create it otherwise
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Topic.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(Topic.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+event.listen(Topic.__table__, 'before_drop', DDL(f'DROP TABLE IF EXISTS {SEARCH_TABLE}').execute_if(dialect='sqlite'))
+
+
+def search_terms(query):
+    """Words of a search query; punctuation and search operators are ignored."""
+    return re.findall(r'\w+', query or '')
+
+
+def topic_search_statement(query, dialect_name):
+    """
+    SELECT of (id, rank, snippet) for topics matching all words of `query`
+    as prefixes, best matches first. Higher rank is better; databases without
+    a full-text index fall back to substring matching with rank 0.
+    """
+    terms = search_terms(query)
+    if not terms:
+        raise InvalidPageRequest('q must contain at least one word')
+
+    if dialect_name == 'sqlite':
+        fts = table(SEARCH_TABLE, column('rowid'))
+        fts_table = literal_column(SEARCH_TABLE)
+        # bm25 is lower for better matches, title matches weigh the most
+        score = func.bm25(fts_table, 10.0, 2.0, 1.0)
+        return select(
+            Topic.id,
+            (-score).label('rank'),
+            func.snippet(fts_table, -1, MATCH_START, MATCH_STOP, '…', SNIPPET_WORDS).label('snippet')
+        ).select_from(fts).join(Topic, Topic.id == fts.c.rowid) \
+         .where(fts_table.op('MATCH')(' '.join(f'"{term}"*' for term in terms))) \
+         .order_by(score, Topic.id)
+
+    if dialect_name == 'postgresql':
+        vector = literal_column(f'({POSTGRES_VECTOR_SQL})')
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        rank = func.ts_rank(vector, tsquery)
+        headline = func.ts_headline(
+            'simple', literal_column(POSTGRES_DOCUMENT_SQL), tsquery,
+            f'StartSel={MATCH_START}, StopSel={MATCH_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=1'
+        )
+        return select(Topic.id, rank.label('rank'), headline.label('snippet')) \
+            .where(vector.op('@@')(tsquery)) \
+            .order_by(rank.desc(), Topic.id)
+
+    conditions = [
+        or_(
+            Topic.title.icontains(term, autoescape=True),
+            Topic.description.icontains(term, autoescape=True),
+            Topic.topic_justification.icontains(term, autoescape=True)
+        ) for term in terms
+    ]
+    return select(Topic.id, literal(0.0).label('rank'), Topic.title.label('snippet')) \
+        .where(*conditions) \
+        .order_by(Topic.creation_date.desc(), Topic.id.desc())
+
+
+def highlight(snippet):
+    """HTML-escapes a snippet and wraps the matched words in <mark> tags."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_STOP, '</mark>')
@@ -0,0 +1,300 @@
+"""
+Bulk import of students and teachers from a USOS dump.
+
+Rows are read lazily from CSV or JSON Lines, validated a batch at a time and
+upserted with an INSERT ... ON CONFLICT per table and batch, keyed on
+account.login, student.index_number and teacher.account_id. Each batch is
+committed on its own, so a bad batch does not undo the ones before it.
+
+Columns / keys of a row:
+    type          student or teacher
+    login         account login, the identity of the person
+    full_name
+    index_number  students, 6 digits
+    title         teachers, e.g. "dr hab" or dr_hab
+    position      teachers, e.g. ADIUNKT
+
+Imported accounts get an unusable password hash, they cannot log in until a
+password is set.
+"""
+import codecs
+import csv
+import json
+import re
+import time
+import click
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.account import Account, UserType
+from app.models.student import Student
+from app.models.teacher import Teacher, Title, Position
+
+FORMATS = ('csv', 'jsonl', 'json')
+DEFAULT_BATCH_SIZE = 2000
+# Per-row errors kept in a report, the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+UNUSABLE_PASSWORD = '!'
+
+INDEX_NUMBER_PATTERN = re.compile(r'^\d{6}$')
+ROW_TYPES = {'student': UserType.STUDENT, 'teacher': UserType.TEACHER}
+
+
+class InvalidImportFile(ValueError):
+    """The dump cannot be read at all, as opposed to errors in single rows."""
+
+
+def read_rows(stream, fmt, delimiter=','):
+    """
+    Yields (line number, dict) for the rows of a binary stream. CSV and JSON
+    Lines are read incrementally; a JSON array has to be parsed as a whole.
+    """
+    if fmt not in FORMATS:
+        raise InvalidImportFile(f'Unknown format: {fmt}')
+    text = codecs.getreader('utf-8-sig')(stream)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text, delimiter=delimiter)
+        if reader.fieldnames is None:
+            return
+        if 'login' not in reader.fieldnames:
+            raise InvalidImportFile('The CSV header has no login column')
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+    else:
+        try:
+            rows = json.load(text)
+        except ValueError as e:
+            raise InvalidImportFile(f'Invalid JSON: {e}')
+        if not isinstance(rows, list):
+            raise InvalidImportFile('Expected a JSON array of rows')
+        yield from enumerate(rows, start=1)
+
+
+def _enum_value(enum_class, raw):
+    """Enum member by value or by name, case-insensitive for names."""
+    raw = str(raw or '').strip()
+    for member in enum_class:
+        if raw == member.value or raw.lower() == member.name.lower():
+            return member
+    return None
+
+
+def _clean(line, row):
+    """(normalized row, None) or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, 'Row is not an object'
+    row_type = ROW_TYPES.get(str(row.get('type') or '').strip().lower())
+    if row_type is None:
+        return None, 'type must be student or teacher'
+    login = str(row.get('login') or '').strip()
+    if not login or len(login) > 100:
+        return None, 'login is required, at most 100 characters'
+    full_name = str(row.get('full_name') or '').strip()
+    if not full_name or len(full_name) > 150:
+        return None, 'full_name is required, at most 150 characters'
+
+    cleaned = {'line': line, 'login': login, 'full_name': full_name, 'user_type': row_type}
+    if row_type == UserType.STUDENT:
+        index_number = str(row.get('index_number') or '').strip()
+        if not INDEX_NUMBER_PATTERN.match(index_number):
+            return None, 'index_number must have 6 digits'
+        cleaned['index_number'] = index_number
+    else:
+        title = _enum_value(Title, row.get('title'))
+        if title is None:
+            return None, f"Unknown title: {row.get('title')}"
+        position = _enum_value(Position, row.get('position'))
+        if position is None:
+            return None, f"Unknown position: {row.get('position')}"
+        cleaned.update(title=title, position=position)
+    return cleaned, None
+
+
+def _insert(dialect_name):
+    if dialect_name == 'sqlite':
+        return sqlite.insert
+    if dialect_name == 'postgresql':
+        return postgresql.insert
+    raise InvalidImportFile(f'Upserts are not supported on {dialect_name}')
+
+
+class UsosImport:
+    """Validates and upserts rows batch by batch, collecting a report."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.seen_logins = set()
+        self.seen_index_numbers = set()
+        self.insert = _insert(db.session.get_bind().dialect.name)
+
+    def error(self, line, login, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'login': login, 'error': message})
+
+    def run(self, rows):
+        start = time.perf_counter()
+        batch = []
+        for line, row in rows:
+            self.rows += 1
+            cleaned, message = _clean(line, row)
+            if message:
+                self.error(line, row.get('login') if isinstance(row, dict) else None, message)
+                continue
+            batch.append(cleaned)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.report(time.perf_counter() - start)
+
+    def report(self, seconds):
+        imported = self.created + self.updated
+        return {
+            'rows': self.rows,
+            'imported': imported,
+            'created': self.created,
+            'updated': self.updated,
+            'errorCount': self.error_count,
+            'errors': self.errors,
+            'seconds': round(seconds, 3),
+            'rowsPerSecond': round(self.rows / seconds, 1) if seconds else None
+        }
+
+    def _check_conflicts(self, batch):
+        """
+        Drops rows that repeat a login or index number of the file, that would
+        change the role of an existing account or take another account's index
+        number. Returns the remaining rows and the logins that already exist.
+        """
+        logins = [r['login'] for r in batch]
+        existing = dict(db.session.execute(
+            select(Account.login, Account.user_type).where(Account.login.in_(logins))
+        ).all())
+        index_owners = dict(db.session.execute(
+            select(Student.index_number, Account.login).join(Account, Account.id == Student.account_id)
+            .where(Student.index_number.in_([r['index_number'] for r in batch if 'index_number' in r]))
+        ).all())
+        student_indexes = dict(db.session.execute(
+            select(Account.login, Student.index_number).join(Student, Student.account_id == Account.id)
+            .where(Account.login.in_(logins))
+        ).all())
+
+        valid = []
+        for row in batch:
+            login, index_number = row['login'], row.get('index_number')
+            if login in self.seen_logins:
+                self.error(row['line'], login, 'Duplicate login in the file')
+            elif index_number and index_number in self.seen_index_numbers:
+                self.error(row['line'], login, 'Duplicate index_number in the file')
+            elif login in existing and existing[login] != row['user_type']:
+                self.error(row['line'], login, f'Account exists as {existing[login].value}')
+            elif index_number and index_owners.get(index_number, login) != login:
+                self.error(row['line'], login, 'index_number belongs to another account')
+            elif index_number and student_indexes.get(login, index_number) != index_number:
+                self.error(row['line'], login, 'Account has a different index_number')
+            else:
+                valid.append(row)
+            self.seen_logins.add(login)
+            if index_number:
+                self.seen_index_numbers.add(index_number)
+        return valid, existing
+
+    def _upsert_accounts(self, batch):
+        """Upserts the accounts of a batch, returns {login: account id}."""
+        table = Account.__table__
+        stmt = self.insert(table)
+        stmt = stmt.on_conflict_do_update(index_elements=['login'], set_={'full_name': stmt.excluded.full_name})
+        # Executed with the batch as parameters, so the statement is compiled once and
+        # cached; compiling a VALUES clause of a few thousand rows costs more than the insert
+        rows = [{
+            'login': r['login'],
+            'full_name': r['full_name'],
+            'password': UNUSABLE_PASSWORD,
+            'user_type': r['user_type']
+        } for r in batch]
+        if db.session.get_bind().dialect.insert_executemany_returning:
+            return dict(db.session.execute(stmt.returning(table.c.login, table.c.id), rows).all())
+        db.session.execute(stmt, rows)
+        return dict(db.session.execute(
+            select(Account.login, Account.id).where(Account.login.in_([r['login'] for r in batch]))
+        ).all())
+
+    def import_batch(self, batch):
+        try:
+            batch, existing = self._check_conflicts(batch)
+            if not batch:
+                return
+            account_ids = self._upsert_accounts(batch)
+
+            students = [{'account_id': account_ids[r['login']], 'index_number': r['index_number']}
+                        for r in batch if r['user_type'] == UserType.STUDENT]
+            if students:
+                stmt = self.insert(Student.__table__).on_conflict_do_nothing(index_elements=['index_number'])
+                db.session.execute(stmt, students)
+
+            teachers = [{'account_id': account_ids[r['login']], 'title': r['title'], 'position': r['position']}
+                        for r in batch if r['user_type'] == UserType.TEACHER]
+            if teachers:
+                stmt = self.insert(Teacher.__table__)
+                stmt = stmt.on_conflict_do_update(index_elements=['account_id'], set_={
+                    'title': stmt.excluded.title,
+                    'position': stmt.excluded.position
+                })
+                db.session.execute(stmt, teachers)
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('USOS import batch failed')
+            for row in batch:
+                self.error(row['line'], row['login'], f'Batch failed: {e}')
+            return
+        updated = sum(1 for r in batch if r['login'] in existing)
+        self.updated += updated
+        self.created += len(batch) - updated
+
+
+def import_usos(stream, fmt, batch_size=DEFAULT_BATCH_SIZE, delimiter=','):
+    """Imports a USOS dump from a binary stream, returns the report dict."""
+    return UsosImport(batch_size=batch_size).run(read_rows(stream, fmt, delimiter=delimiter))
+
+
+@click.command('import-usos')
+@click.argument('file', type=click.File('rb'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+              help='defaults to the file extension')
+@click.option('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, show_default=True)
+@click.option('--delimiter', default=',', show_default=True, help='CSV field separator')
+def import_usos_command(file, fmt, batch_size, delimiter):
+    """Import students and teachers from a USOS CSV / JSON Lines / JSON dump."""
+    fmt = fmt or file.name.rsplit('.', 1)[-1].lower()
+    try:
+        report = import_usos(file, fmt, batch_size=batch_size, delimiter=delimiter)
+    except InvalidImportFile as e:
+        raise click.ClickException(str(e))
+
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['login'] or '-'}: {error['error']}", err=True)
+    click.echo(f"{report['rows']} rows in {report['seconds']}s ({report['rowsPerSecond']} rows/s): "
+               f"{report['created']} created, {report['updated']} updated, {report['errorCount']} errors")
+
+
+def init_usos_import(app):
+    app.cli.add_command(import_usos_command)
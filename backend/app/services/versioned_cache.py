@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class VersionedLRUCache:
+    """
+    LRU cache whose entries are checked against a version on every read.
+
+    Every key has a version, and the whole cache a generation. Writers bump
+    them with invalidate() / invalidate_all(); readers take version() before
+    loading from the database and the entry is only stored if it is still
+    current, so a slow reader cannot put back data that was changed in the
+    meantime. Writes made by other worker processes are caught by sync(),
+    entries also expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_size=1000, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._generation = 0
+        self._marker = None
+        self._lock = threading.Lock()
+
+    def version(self, key):
+        with self._lock:
+            return self._generation, self._versions.get(key, 0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            version, stored_at, data = entry
+            current = (self._generation, self._versions.get(key, 0))
+            if version != current or time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, version, data):
+        with self._lock:
+            if version != (self._generation, self._versions.get(key, 0)):
+                return
+            self._entries[key] = (version, time.monotonic(), data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._entries.pop(key, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._generation += 1
+            self._versions.clear()
+            self._entries.clear()
+
+    def sync(self, marker):
+        """
+        Drops every entry when `marker`, a value read from the database that
+        changes with every write (e.g. the table change markers), differs from
+        the one seen by the previous call. Call it before version() and get().
+        """
+        with self._lock:
+            if marker == self._marker:
+                return
+            self._marker = marker
+            self._generation += 1
+            self._versions.clear()
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
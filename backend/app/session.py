@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_KEY = 'replica'
+
+
+def replica_requested():
+    return has_app_context() and g.get('_use_replica', False)
+
+
+def reads_from_replica():
+    """True when reads of the current app context actually go to a configured replica."""
+    return replica_requested() and REPLICA_BIND_KEY in current_app.extensions['sqlalchemy'].engines
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Routes reads of the current app context's session to the read replica, if one is configured."""
+    previous = g.get('_use_replica', False)
+    g._use_replica = enabled
+    try:
+        yield
+    finally:
+        g._use_replica = previous
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from the read replica while use_replica() is active.
+    Flushes always go to the primary, and without a configured replica
+    everything does.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and replica_requested():
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,271 @@
+"""
+Benchmark of the API endpoints at several data volumes.
+
+Every scale seeds a fresh SQLite file database with generate_data.generate()
+and drives the endpoints through the Flask test client. For each endpoint it
+records p50/p95 latency, SQL statements per request and peak Python memory.
+Warm runs reuse the topic, teacher and export caches filled by the previous
+request; cold runs (cold_*) clear them before every request.
+
+Run from the backend directory with:
+    python -m benchmarks.bench_endpoints --scales small,medium --output bench.json
+    python -m benchmarks.bench_endpoints --scales small --compare bench.json
+"""
+import argparse
+import json
+import os
+import secrets
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import sqlalchemy
+from flask import current_app
+from sqlalchemy import event, select
+
+# The app reads DATABASE_URL at import time, so point it at a scratch file first
+_work_dir = tempfile.mkdtemp()
+_db_file = os.path.join(_work_dir, 'bench_endpoints.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+# create_app('production') refuses to start without SECRET_KEY
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+os.environ['EXPORT_CACHE_DIR'] = os.path.join(_work_dir, 'exports')
+
+from app import create_app, db
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.services.teacher_identity import get_teacher_identity_cache
+from app.services.topic_cache import get_topic_cache
+from generate_data import generate
+
+SCALES = {
+    'small': {'students': 1000, 'teachers': 50, 'topics': 80},
+    'medium': {'students': 10000, 'teachers': 500, 'topics': 800},
+    'large': {'students': 50000, 'teachers': 2000, 'topics': 3400},
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def clear_caches():
+    """Drops the cached topics, teacher identities and generated export files."""
+    get_topic_cache().invalidate_all()
+    get_teacher_identity_cache().invalidate_all()
+    shutil.rmtree(current_app.config['EXPORT_CACHE_DIR'], ignore_errors=True)
+
+
+def build_cases(runs):
+    """
+    Returns (name, method, url factory, json factory) tuples. The factories get
+    the run number, so mutating endpoints hit a different row on every run.
+    """
+    topic_id = db.session.execute(select(Topic.id).order_by(Topic.id)).scalars().first()
+    pending = db.session.execute(
+        select(Topic.id).where(Topic.status == TopicStatus.OCZEKUJACY).order_by(Topic.id).limit(2 * runs)
+    ).scalars().all()
+    to_approve, to_reject = pending[:runs], pending[runs:]
+    declaring = db.session.execute(
+        select(Student.account_id, Student.topic_id).where(Student.topic_id.is_not(None))
+        .order_by(Student.id).limit(runs)
+    ).all()
+
+    cases = [
+        ('GET /api/topics', 'GET', lambda i: '/api/topics', None),
+        ('GET /api/topics?limit=50', 'GET', lambda i: '/api/topics?limit=50', None),
+        ('GET /api/topics/search', 'GET', lambda i: '/api/topics/search?q=temat+wygen', None),
+        ('GET /api/topics/pending', 'GET', lambda i: '/api/topics/pending', None),
+        ('GET /api/topics/<id>', 'GET', lambda i: f'/api/topics/{topic_id}', None),
+        ('GET /api/users', 'GET', lambda i: '/api/users', None),
+        ('GET /api/export/students-by-topic', 'GET', lambda i: '/api/export/students-by-topic?format=xlsx', None),
+    ]
+    if declaring:
+        cases.append(('POST /api/topics/<id>/declare', 'POST',
+                      lambda i: f'/api/topics/{declaring[i % len(declaring)][1]}/declare',
+                      lambda i: {'user_id': declaring[i % len(declaring)][0]}))
+    if to_approve:
+        cases.append(('PATCH /api/topics/<id>/approve', 'PATCH',
+                      lambda i: f'/api/topics/{to_approve[i % len(to_approve)]}/approve', None))
+    if to_reject:
+        cases.append(('PATCH /api/topics/<id>/reject', 'PATCH',
+                      lambda i: f'/api/topics/{to_reject[i % len(to_reject)]}/reject',
+                      lambda i: {'rejection_reason': 'Benchmark'}))
+    return cases
+
+
+def send(client, method, url, body):
+    """
+    One request, read to the end. A 202 of the export is followed like the
+    frontend does: the job is polled and its file downloaded.
+    """
+    response = client.open(url, method=method, json=body)
+    response.get_data()
+    if response.status_code == 202 and 'Location' in response.headers:
+        location = response.headers['Location']
+        response.close()
+        while True:
+            job = client.get(location).get_json()
+            if job['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.005)
+        response = client.get(f'{location}/file')
+        response.get_data()
+    response.close()
+    return response.status_code
+
+
+def time_runs(client, method, url, body, runs, cold):
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    statuses = set()
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for i in runs:
+            if cold:
+                clear_caches()
+            start = time.perf_counter()
+            statuses.add(send(client, method, url(i), body(i) if body else None))
+            timings.append(time.perf_counter() - start)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return timings, statuses, statements / len(timings)
+
+
+def run_case(client, method, url, body, repeats):
+    """Warm runs 0..repeats-1, cold runs repeats..2*repeats-1 and the memory run 2*repeats."""
+    timings, statuses, statements = time_runs(client, method, url, body, range(repeats), cold=False)
+    cold_timings, cold_statuses, cold_statements = time_runs(
+        client, method, url, body, range(repeats, 2 * repeats), cold=True
+    )
+
+    # Memory is traced in a separate run, tracemalloc would distort the timings
+    tracemalloc.start()
+    send(client, method, url(2 * repeats), body(2 * repeats) if body else None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'runs': repeats,
+        'status': sorted(statuses | cold_statuses),
+        'first_ms': round(timings[0] * 1000, 3),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'statements': round(statements, 2),
+        'cold_p50_ms': round(percentile(cold_timings, 50) * 1000, 3),
+        'cold_p95_ms': round(percentile(cold_timings, 95) * 1000, 3),
+        'cold_statements': round(cold_statements, 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_scale(app, name, sizes, repeats):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        counts = generate(**sizes)
+        seed_seconds = time.perf_counter() - start
+        clear_caches()
+        # Rows for the warm and cold runs of mutating cases, plus one for the memory run
+        cases = build_cases(2 * repeats + 1)
+
+    client = app.test_client()
+    results = []
+    for case, method, url, body in cases:
+        with app.app_context():
+            result = run_case(client, method, url, body, repeats)
+        result.update(scale=name, endpoint=case)
+        results.append(result)
+        print(f'{name:<7} {case:<38} p50={result["p50_ms"]:9.2f} ms  p95={result["p95_ms"]:9.2f} ms  '
+              f'statements={result["statements"]:>7}  cold p50={result["cold_p50_ms"]:9.2f} ms  '
+              f'cold statements={result["cold_statements"]:>7}  peak={result["peak_memory_kb"]:>9} KiB',
+              file=sys.stderr)
+    return {'scale': name, 'rows': counts, 'seed_seconds': round(seed_seconds, 2)}, results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['scale'], r['endpoint']): r for r in json.load(f)['results']}
+    print(f'\nCompared with {baseline_path}:', file=sys.stderr)
+    for result in results:
+        before = baseline.get((result['scale'], result['endpoint']))
+        if not before:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+        line = (f'{result["scale"]:<7} {result["endpoint"]:<38} p50 x{ratio:5.2f}  '
+                f'statements {before["statements"]} -> {result["statements"]}')
+        # Baselines from before cold runs were recorded have no cold_* values
+        if before.get('cold_p50_ms'):
+            line += f'  cold p50 x{result["cold_p50_ms"] / before["cold_p50_ms"]:5.2f}'
+        print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='small,medium', help=f'comma separated, from: {", ".join(SCALES)}')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(',') if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f'unknown scales: {", ".join(unknown)}')
+
+    app = create_app('production')
+    datasets, results = [], []
+    for name in scales:
+        dataset, scale_results = run_scale(app, name, SCALES[name], args.repeats)
+        datasets.append(dataset)
+        results.extend(scale_results)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'repeats': args.repeats,
+        },
+        'datasets': datasets,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+    with app.app_context():
+        db.drop_all()
+    os.remove(_db_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of POST /api/auth/login under concurrent logins.
+
+Seeds accounts hashed with PASSWORD_HASH_METHOD into a scratch SQLite file and
+logs in from a number of client threads. Reports logins per second and per
+core, counting the PASSWORD_HASH_WORKERS threads of the hash pool as the
+cores, next to a single-threaded check_password_hash baseline.
+
+Run from the backend directory with:
+    python -m benchmarks.bench_login --clients 1,8,32 --logins 200
+    PASSWORD_HASH_METHOD=pbkdf2:sha256:600000 python -m benchmarks.bench_login
+"""
+import argparse
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+# The app reads DATABASE_URL at import time, so point it at a scratch file first
+_work_dir = tempfile.mkdtemp()
+_db_file = os.path.join(_work_dir, 'bench_login.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+# create_app('production') refuses to start without SECRET_KEY
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+
+from werkzeug.security import check_password_hash, generate_password_hash
+from app import create_app, db
+from app.models.account import Account, UserType
+
+PASSWORD = 'benchmark password'
+
+
+def baseline(method, seconds=2.0):
+    """Single-threaded hash checks per second."""
+    pwhash = generate_password_hash(PASSWORD, method=method)
+    checks = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        check_password_hash(pwhash, PASSWORD)
+        checks += 1
+    return checks / seconds
+
+
+def run_clients(app, clients, logins, accounts):
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(logins))
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            status = client.post('/api/auth/login', json={
+                'login': f'bench{i % accounts}', 'password': PASSWORD
+            }).status_code
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', default='1,8,32', help='comma separated numbers of concurrent clients')
+    parser.add_argument('--logins', type=int, default=200, help='logins per run')
+    parser.add_argument('--accounts', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app('production')
+    # Every login is slow by design, do not log each one
+    app.config['SLOW_REQUEST_MS'] = float('inf')
+    method = app.config['PASSWORD_HASH_METHOD']
+    workers = app.config['PASSWORD_HASH_WORKERS']
+    with app.app_context():
+        db.create_all()
+        pwhash = generate_password_hash(PASSWORD, method=method)
+        db.session.add_all([Account(full_name=f'Bench {i}', login=f'bench{i}', password=pwhash,
+                                    user_type=UserType.STUDENT) for i in range(args.accounts)])
+        db.session.commit()
+
+    print(f'method={method} workers={workers} cpus={os.cpu_count()}')
+    print(f'baseline   {baseline(method):8.1f} checks/s in one thread')
+    for clients in [int(c) for c in args.clients.split(',') if c.strip()]:
+        seconds, statuses = run_clients(app, clients, args.logins, args.accounts)
+        rate = args.logins / seconds
+        print(f'clients={clients:<4} {rate:8.1f} logins/s  {rate / workers:8.1f} logins/s/core  statuses={statuses}')
+
+    with app.app_context():
+        db.drop_all()
+    os.remove(_db_file)
+
+
+if __name__ == '__main__':
+    main()
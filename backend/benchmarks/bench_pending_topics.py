@@ -0,0 +1,144 @@
+"""
+Benchmark of GET /api/topics/pending: grouped COUNT query vs. the previous
+per-topic lazy loading implementation.
+
+Run from the backend directory with:
+    python -m benchmarks.bench_pending_topics --topics 10000
+"""
+import argparse
+import os
+import secrets
+import tempfile
+import time
+
+from sqlalchemy import event, insert
+
+# The app reads DATABASE_URL at import time, so point it at a scratch file first
+_db_file = os.path.join(tempfile.mkdtemp(), 'bench_pending.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+# create_app('production') refuses to start without SECRET_KEY
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.routes.topics import _pending_topic_rows
+
+
+def legacy_pending_topics():
+    """The implementation replaced by the grouped query, kept for comparison."""
+    response_list = []
+    for topic in Topic.query.filter_by(status=TopicStatus.OCZEKUJACY).all():
+        teacher_title = None
+        teacher_full_name = None
+        if topic.teacher:
+            teacher_title = topic.teacher.title.value
+            teacher_full_name = topic.teacher.account.full_name
+        response_list.append({
+            'id': topic.id,
+            'title': topic.title,
+            'description': topic.description,
+            'status': topic.status.value,
+            'topic_justification': topic.topic_justification,
+            'creation_date': topic.creation_date.isoformat() if topic.creation_date else None,
+            'teacher_title': teacher_title,
+            'teacher_full_name': teacher_full_name,
+            'student_count': len(topic.students)
+        })
+    return response_list
+
+
+def aggregate_pending_topics():
+    return [{
+        'id': topic_id,
+        'title': title,
+        'description': description,
+        'status': status.value,
+        'topic_justification': justification,
+        'creation_date': creation_date.isoformat() if creation_date else None,
+        'teacher_title': teacher_title.value if teacher_title else None,
+        'teacher_full_name': teacher_full_name,
+        'student_count': student_count
+    } for (topic_id, title, description, status, justification, creation_date,
+           teacher_title, teacher_full_name, student_count) in _pending_topic_rows()]
+
+
+def seed(topic_count, students_per_topic):
+    teacher_count = max(1, topic_count // 2)
+    db.session.execute(insert(Account), [
+        {'id': i, 'full_name': f'Prowadzący {i}', 'login': f't{i}', 'password': 'x', 'user_type': UserType.TEACHER}
+        for i in range(1, teacher_count + 1)
+    ])
+    db.session.execute(insert(Teacher), [
+        {'id': i, 'account_id': i, 'title': Title.dr, 'position': Position.ADIUNKT}
+        for i in range(1, teacher_count + 1)
+    ])
+    statuses = list(TopicStatus)
+    db.session.execute(insert(Topic), [
+        {'id': i, 'title': f'Temat {i}', 'description': 'Opis', 'teacher_id': (i % teacher_count) + 1,
+         'status': statuses[i % len(statuses)]}
+        for i in range(1, topic_count + 1)
+    ])
+    student_count = topic_count * students_per_topic
+    db.session.execute(insert(Account), [
+        {'id': teacher_count + i, 'full_name': f'Student {i}', 'login': f's{i}', 'password': 'x',
+         'user_type': UserType.STUDENT}
+        for i in range(1, student_count + 1)
+    ])
+    db.session.execute(insert(Student), [
+        {'account_id': teacher_count + i, 'index_number': f'{i:06d}', 'topic_id': (i % topic_count) + 1}
+        for i in range(1, student_count + 1)
+    ])
+    db.session.commit()
+
+
+def measure(label, func, repeats):
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for _ in range(repeats):
+            db.session.expunge_all()
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    best = min(timings)
+    print(f'{label:<12} rows={len(result):>6}  best={best * 1000:9.1f} ms  '
+          f'statements/run={statements // repeats}')
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=10000)
+    parser.add_argument('--students-per-topic', type=int, default=3)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        seed(args.topics, args.students_per_topic)
+
+        legacy, legacy_time = measure('legacy', legacy_pending_topics, args.repeats)
+        aggregate, aggregate_time = measure('aggregate', aggregate_pending_topics, args.repeats)
+
+        assert sorted(legacy, key=lambda t: t['id']) == aggregate, 'implementations disagree'
+        print(f'speedup: {legacy_time / aggregate_time:.1f}x')
+
+        db.drop_all()
+    os.remove(_db_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark of the USOS import: a synthetic CSV dump imported into an empty
+SQLite file database, then imported again to measure the update path.
+
+Run from the backend directory with:
+    python -m benchmarks.bench_usos_import --students 50000 --teachers 2000
+"""
+import argparse
+import io
+import os
+import secrets
+import tempfile
+
+# The app reads DATABASE_URL at import time, so point it at a scratch file first
+_work_dir = tempfile.mkdtemp()
+_db_file = os.path.join(_work_dir, 'bench_usos_import.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+# create_app('production') refuses to start without SECRET_KEY
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+
+from app import create_app, db
+from app.services.usos_import import import_usos, DEFAULT_BATCH_SIZE
+
+
+def build_dump(students, teachers):
+    lines = ['type,login,full_name,index_number,title,position']
+    lines.extend(f'teacher,t{i},Prowadzący {i},,dr,ADIUNKT' for i in range(teachers))
+    lines.extend(f'student,s{i},Student {i},{100000 + i:06d},,' for i in range(students))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--teachers', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    dump = build_dump(args.students, args.teachers)
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        for run in ('insert', 'update'):
+            report = import_usos(io.BytesIO(dump), 'csv', batch_size=args.batch_size)
+            print(f"{run:<7} {report['rows']} rows in {report['seconds']:.2f}s "
+                  f"({report['rowsPerSecond']} rows/s), {report['errorCount']} errors")
+        db.drop_all()
+    os.remove(_db_file)
+
+
+if __name__ == '__main__':
+    main()
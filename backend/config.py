@@ -1,22 +1,77 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def engine_options_from_env():
+    """Connection pool settings for SQLALCHEMY_ENGINE_OPTIONS, see DB_POOL_* in the environment."""
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    }
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') 
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Level of app.logger, INFO shows the startup summary such as the pool settings
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Optional read replica for safe GET requests and exports, see app/session.py
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    REPLICA_BLUEPRINTS = ('topics', 'users', 'export')
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+    EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'zpi-exports'))
+    EXPORT_CACHE_MAX_FILES = int(os.environ.get('EXPORT_CACHE_MAX_FILES', 20))
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+    TOPIC_CACHE_SIZE = int(os.environ.get('TOPIC_CACHE_SIZE', 2000))
+    TOPIC_CACHE_TTL = float(os.environ.get('TOPIC_CACHE_TTL', 30))
+    TEACHER_CACHE_SIZE = int(os.environ.get('TEACHER_CACHE_SIZE', 5000))
+    TEACHER_CACHE_TTL = float(os.environ.get('TEACHER_CACHE_TTL', 60))
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '1') == '1'
+    SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+    HEALTH_DB_MAX_LATENCY_MS = float(os.environ.get('HEALTH_DB_MAX_LATENCY_MS', 250))
+    # Shared secret of the USOS import endpoint, the endpoint is disabled without it
+    USOS_IMPORT_TOKEN = os.environ.get('USOS_IMPORT_TOKEN')
+    # Login: hash parameters of new and upgraded hashes, see app/services/passwords.py
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+    PASSWORD_HASH_WAIT_SECONDS = float(os.environ.get('PASSWORD_HASH_WAIT_SECONDS', 5))
+    # Signed session tokens, see app/services/auth_tokens.py
+    AUTH_TOKEN_TTL_SECONDS = int(os.environ.get('AUTH_TOKEN_TTL_SECONDS', 8 * 3600))
+    # Reject requests without a token instead of trusting user ids in the request
+    AUTH_REQUIRE_TOKEN = os.environ.get('AUTH_REQUIRE_TOKEN', '0') == '1'
+    # Topic change feed, see app/services/change_bus.py
+    CHANGE_BUS_BUFFER = int(os.environ.get('CHANGE_BUS_BUFFER', 1000))
+    CHANGES_MAX_WAIT_SECONDS = float(os.environ.get('CHANGES_MAX_WAIT_SECONDS', 25))
+    # Connected long polls and streams, unset: 100 on threaded servers and 5000 under serve.py
+    CHANGES_MAX_SUBSCRIBERS = int(os.environ.get('CHANGES_MAX_SUBSCRIBERS', 0)) or None
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    SSE_MAX_DURATION_SECONDS = float(os.environ.get('SSE_MAX_DURATION_SECONDS', 300))
+    # Cooperative server, see serve.py; above CHANGES_MAX_SUBSCRIBERS so other requests are still served
+    SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('SERVER_PORT', 5000))
+    SERVER_MAX_CONNECTIONS = int(os.environ.get('SERVER_MAX_CONNECTIONS', 6000))
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env()
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_REPLICA_URI = None
+    SECRET_KEY = 'testing-secret-key'
+    # Cheap hashes keep the tests fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
     WTF_CSRF_ENABLED = False
 
 config = {
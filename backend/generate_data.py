@@ -0,0 +1,204 @@
+"""
+Synthetic data generator for load testing and benchmarks.
+
+Fills the database configured by DATABASE_URL with accounts, teachers,
+students and topics of the requested size, using batched Core inserts:
+
+    python generate_data.py --students 50000 --teachers 2000 --topics 15000 --reset
+
+Teacher team limits (get_max_teams_for_position) are respected, so the number
+of topics is capped by the total capacity of the generated teachers.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position, get_max_teams_for_position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus, STANDARD_TEAM_SIZE
+from app.models.declaration import Declaration, Status
+from app.services.team_limits import ACTIVE_STATUSES
+
+# Index numbers of generated students start here, above the ones used by seed.py
+INDEX_NUMBER_OFFSET = 500000
+
+POSITION_WEIGHTS = [(Position.ASYSTENT, 3), (Position.ADIUNKT, 5), (Position.PROFESOR_UCZELNI, 2)]
+STATUS_WEIGHTS = [(TopicStatus.OCZEKUJACY, 4), (TopicStatus.ZATWIERDZONY, 5), (TopicStatus.ODRZUCONY, 1)]
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert_batches(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(model.__table__.insert(), rows[start:start + batch_size])
+
+
+def _reset_sequences(models):
+    """
+    Moves the PostgreSQL id sequences past the ids inserted explicitly, so the
+    app's own inserts do not collide with generated rows. SQLite needs nothing.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+        ))
+
+
+def _weighted(rng, weights):
+    values, w = zip(*weights)
+    return rng.choices(values, weights=w)[0]
+
+
+def generate(students, teachers, topics, batch_size=5000, seed=0, password='password'):
+    """
+    Inserts the requested amounts of data and commits once.
+    Returns a dict with the number of created rows per table.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    # Hashing is deliberately slow, every generated account shares one hash
+    password_hash = generate_password_hash(password)
+
+    account_id = _next_id(Account)
+    teacher_id = _next_id(Teacher)
+    student_id = _next_id(Student)
+    topic_id = _next_id(Topic)
+    declaration_id = _next_id(Declaration)
+    if INDEX_NUMBER_OFFSET + student_id + students > 999999:
+        raise ValueError('Too many students for 6-digit index numbers')
+
+    accounts, teacher_rows, student_rows, topic_rows, declaration_rows = [], [], [], [], []
+
+    # --- Teachers ---
+    slots = []
+    for _ in range(teachers):
+        position = _weighted(rng, POSITION_WEIGHTS)
+        accounts.append({'id': account_id, 'full_name': f'Prowadzący {teacher_id}', 'login': f'gen.teacher{teacher_id}',
+                         'password': password_hash, 'user_type': UserType.TEACHER})
+        teacher_rows.append({'id': teacher_id, 'account_id': account_id, 'title': rng.choice(list(Title)),
+                             'position': position, 'is_declaration_approved': False})
+        slots.extend([teacher_id] * get_max_teams_for_position(position))
+        account_id += 1
+        teacher_id += 1
+
+    if topics > len(slots):
+        print(f'Only {len(slots)} topics fit the team limits of {teachers} teachers, creating {len(slots)}.')
+        topics = len(slots)
+    rng.shuffle(slots)
+
+    # --- Topics ---
+    for supervisor_id in slots[:topics]:
+        status = _weighted(rng, STATUS_WEIGHTS)
+        row = {
+            'id': topic_id,
+            'title': f'Temat wygenerowany {topic_id}',
+            'description': 'Automatycznie wygenerowany opis tematu.',
+            'is_open': rng.random() < 0.3,
+            'creation_date': now - timedelta(days=rng.randint(0, 60), seconds=rng.randint(0, 86399)),
+            'teacher_id': supervisor_id,
+            'teacher_declaration_id': None,
+            'status': status,
+            'topic_justification': None,
+            'rejection_reason': 'Wygenerowany powód odrzucenia.' if status == TopicStatus.ODRZUCONY else None
+        }
+        if status == TopicStatus.ZATWIERDZONY:
+            declaration_rows.append({'id': declaration_id, 'status': Status.ZLOZONA, 'submission_date': now})
+            row['teacher_declaration_id'] = declaration_id
+            declaration_id += 1
+        topic_rows.append(row)
+        topic_id += 1
+
+    # Team counters of the supervisors, see app.services.team_limits
+    teacher_by_id = {row['id']: row for row in teacher_rows}
+    for row in teacher_rows:
+        row['active_topic_count'] = 0
+    for row in topic_rows:
+        if row['status'] in ACTIVE_STATUSES:
+            teacher_by_id[row['teacher_id']]['active_topic_count'] += 1
+
+    # --- Students, in teams of 3-5 until topics or students run out ---
+    team_slots = []
+    for row in topic_rows:
+        team_size = rng.choice([3, 4, 5])
+        row['max_members'] = max(team_size, STANDARD_TEAM_SIZE)
+        row['is_standard'] = row['max_members'] == STANDARD_TEAM_SIZE
+        if not row['is_standard']:
+            # Teams above the standard size have to be justified, as in the topic form
+            row['topic_justification'] = f'Wygenerowane uzasadnienie zespołu {row["max_members"]}-osobowego.'
+        row['member_count'] = 0
+        team_slots.extend([row['id']] * team_size)
+    for i in range(students):
+        accounts.append({'id': account_id, 'full_name': f'Student {student_id}', 'login': f'gen.student{student_id}',
+                         'password': password_hash, 'user_type': UserType.STUDENT})
+        student_rows.append({
+            'id': student_id,
+            'account_id': account_id,
+            'index_number': f'{INDEX_NUMBER_OFFSET + student_id:06d}',
+            'topic_id': team_slots[i] if i < len(team_slots) else None,
+            'declaration_id': None,
+            'is_declaration_approved': False
+        })
+        account_id += 1
+        student_id += 1
+
+    # Team counters of the topics, see app.services.enrollment
+    topic_by_id = {row['id']: row for row in topic_rows}
+    for topic in team_slots[:students]:
+        topic_by_id[topic]['member_count'] += 1
+
+    # Parents first, so foreign keys are satisfied on every batch
+    _insert_batches(Account, accounts, batch_size)
+    _insert_batches(Teacher, teacher_rows, batch_size)
+    _insert_batches(Declaration, declaration_rows, batch_size)
+    _insert_batches(Topic, topic_rows, batch_size)
+    _insert_batches(Student, student_rows, batch_size)
+    _reset_sequences([Account, Teacher, Declaration, Topic, Student])
+    db.session.commit()
+
+    return {
+        'account': len(accounts),
+        'teacher': len(teacher_rows),
+        'topic': len(topic_rows),
+        'student': len(student_rows),
+        'declaration': len(declaration_rows)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--teachers', type=int, default=50)
+    parser.add_argument('--topics', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0, help='random seed, same seed gives the same data')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    parser.add_argument('--config', default='development')
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+            db.create_all()
+
+        start = time.perf_counter()
+        counts = generate(args.students, args.teachers, args.topics, batch_size=args.batch_size, seed=args.seed)
+        elapsed = time.perf_counter() - start
+
+    print(f'Generated in {elapsed:.2f}s:')
+    for table, count in counts.items():
+        print(f' - {table}: {count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,8 @@ from flask import current_app
 
 from alembic import context
 
+from app.services.topic_search import SEARCH_TABLE, SEARCH_INDEX
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -90,9 +92,14 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # The full-text search objects are managed by hand, see app/services/topic_search.py
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (name or '').startswith((SEARCH_TABLE, SEARCH_INDEX))
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
@@ -0,0 +1,71 @@
+"""topic full-text search
+
+Revision ID: d4a91f6c2e58
+Revises: c8e2b7f41d03
+Create Date: 2026-10-18 17:20:11.532801
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a91f6c2e58'
+down_revision = 'c8e2b7f41d03'
+branch_labels = None
+depends_on = None
+
+# Same statements as app/services/topic_search.py, copied so the migration does not change with the app
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE topic_fts USING fts5(
+        title, description, topic_justification,
+        content='topic', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER topic_fts_ai AFTER INSERT ON topic BEGIN
+        INSERT INTO topic_fts(rowid, title, description, topic_justification)
+        VALUES (new.id, new.title, new.description, new.topic_justification);
+    END""",
+    """CREATE TRIGGER topic_fts_ad AFTER DELETE ON topic BEGIN
+        INSERT INTO topic_fts(topic_fts, rowid, title, description, topic_justification)
+        VALUES ('delete', old.id, old.title, old.description, old.topic_justification);
+    END""",
+    """CREATE TRIGGER topic_fts_au AFTER UPDATE OF title, description, topic_justification ON topic BEGIN
+        INSERT INTO topic_fts(topic_fts, rowid, title, description, topic_justification)
+        VALUES ('delete', old.id, old.title, old.description, old.topic_justification);
+        INSERT INTO topic_fts(rowid, title, description, topic_justification)
+        VALUES (new.id, new.title, new.description, new.topic_justification);
+    END""",
+    # Index the existing topics
+    "INSERT INTO topic_fts(topic_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS topic_fts_au",
+    "DROP TRIGGER IF EXISTS topic_fts_ad",
+    "DROP TRIGGER IF EXISTS topic_fts_ai",
+    "DROP TABLE IF EXISTS topic_fts",
+]
+
+POSTGRES_UPGRADE = [
+    """CREATE INDEX ix_topic_search ON topic USING GIN ((
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(topic_justification, '')), 'B')
+    ))""",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_topic_search",
+]
+
+
+def _run(statements_by_dialect):
+    for statement in statements_by_dialect.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade():
+    _run({'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE})
+
+
+def downgrade():
+    _run({'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRES_DOWNGRADE})
@@ -1,9 +1,11 @@
 from app import create_app, db
 from app.models.account import Account, UserType
-from app.models.teacher import Teacher, Title, Position
+from app.models.teacher import Teacher, Title, Position, get_max_teams_for_position
 from app.models.student import Student
-from app.models.topic import Topic, TopicStatus
+from app.models.topic import Topic, TopicStatus, STANDARD_TEAM_SIZE
 from app.models.declaration import Declaration, Status
+from app.services.team_limits import recount_loads
+from app.services.enrollment import recount_members
 from werkzeug.security import generate_password_hash
 import random
 from datetime import datetime, timedelta
@@ -20,14 +22,6 @@ def reset_db():
     except Exception as e:
         print(f"Error resetting database: {e}")
 
-def get_max_teams_for_position(position):
-    """Zwraca maksymalną liczbę zespołów dla danego stanowiska."""
-    # ASYSTENT (Assistant position) has limit of 1 team
-    if position == Position.ASYSTENT:
-        return 1
-    # ADIUNKT, PROFESOR_UCZELNI itp.
-    return 2
-
 def seed_data():
     print("Seeding data...")
     
@@ -181,6 +175,8 @@ def seed_data():
         is_open=False,
         teacher_id=teacher_ms.id, 
         creation_date=datetime.now() - timedelta(days=5),
+        is_standard=False,
+        max_members=3,
         topic_justification="Projekt wymaga wysokiej specjalizacji."
     )
     db.session.add(topic_ns_small)
@@ -198,6 +194,8 @@ def seed_data():
         is_open=False,
         teacher_id=teacher_ms.id,
         creation_date=datetime.now() - timedelta(days=1),
+        is_standard=False,
+        max_members=5,
         topic_justification="Złożoność modułów AI."
     )
     db.session.add(topic_ns_large)
@@ -324,6 +322,8 @@ def seed_data():
         is_open=False,
         teacher_id=teachers[6].id,  # Marek Nocny
         creation_date=datetime.now() - timedelta(days=7),
+        is_standard=False,
+        max_members=5,
         topic_justification="Rozbudowany projekt wymagający większego zespołu."
     )
     db.session.add(topic_pend_4)
@@ -411,6 +411,9 @@ def seed_data():
         teacher_loads[supervisor.id] += 1
         
         team_size = random.choice([3, 4, 5])
+        if team_size > STANDARD_TEAM_SIZE:
+            t.is_standard = False
+            t.max_members = team_size
         for _ in range(team_size):
             if students:
                 s = students.pop()
@@ -422,6 +425,9 @@ def seed_data():
             db.session.flush()
             t.teacher_declaration_id = d.id
 
+    db.session.flush()
+    recount_loads()
+    recount_members()
     db.session.commit()
     print("Seeding complete.")
     print("Teacher Loads:")
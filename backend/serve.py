@@ -0,0 +1,48 @@
+"""
+Production server for clients following the topic change feed.
+
+Runs the app on gevent, where every connection is a greenlet instead of a
+thread, so thousands of idle long polls and event streams stay cheap; see
+app/services/serving.py. Uses the production config and SERVER_HOST,
+SERVER_PORT and SERVER_MAX_CONNECTIONS; the process needs a file descriptor
+limit (ulimit -n) above SERVER_MAX_CONNECTIONS.
+
+Database calls block the process while they run, PostgreSQL is made
+cooperative with psycogreen when it is installed.
+
+Run with: python serve.py
+"""
+from gevent import monkey
+
+# Before anything else imports socket, threading or time
+monkey.patch_all()
+
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+from app import create_app
+
+
+def make_server(app):
+    return WSGIServer(
+        (app.config['SERVER_HOST'], app.config['SERVER_PORT']),
+        app,
+        spawn=Pool(app.config['SERVER_MAX_CONNECTIONS'])
+    )
+
+
+def _patch_psycopg():
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        return
+    patch_psycopg()
+
+
+if __name__ == '__main__':
+    _patch_psycopg()
+    app = create_app('production')
+    server = make_server(app)
+    app.logger.info('Serving on %s:%s, at most %s connections, %s change feed subscribers',
+                    app.config['SERVER_HOST'], app.config['SERVER_PORT'],
+                    app.config['SERVER_MAX_CONNECTIONS'], app.config['CHANGES_MAX_SUBSCRIBERS'])
+    server.serve_forever()
@@ -0,0 +1,61 @@
+"""
+Helpers shared by the test modules, imported with `from tests.conftest import ...`.
+"""
+import threading
+from sqlalchemy import event
+from app import db
+
+
+class QueryCounter:
+    """Records the SQL statements run on an engine, from any thread, inside the with block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def recorded_statements(func):
+    """Calls func, returns the statements it ran on db.engine and its result."""
+    with QueryCounter(db.engine) as counter:
+        result = func()
+    return counter.statements, result
+
+
+def count_statements(func):
+    """Calls func, returns the number of statements it ran on db.engine and its result."""
+    statements, result = recorded_statements(func)
+    return len(statements), result
+
+
+def run_concurrently(app, requests):
+    """
+    Runs every request(client) on its own thread and test client, released
+    together by a barrier. Returns the sorted status codes.
+    """
+    statuses = []
+    barrier = threading.Barrier(len(requests))
+
+    def worker(request):
+        barrier.wait()
+        statuses.append(request(app.test_client()).status_code)
+
+    threads = [threading.Thread(target=worker, args=(r,)) for r in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(statuses)
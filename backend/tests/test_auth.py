@@ -0,0 +1,266 @@
+"""
+Tests for the login endpoint, the password worker pool and signed tokens.
+
+Run with: python -m pytest tests/test_auth.py -v
+"""
+import threading
+import time
+import pytest
+from werkzeug.security import generate_password_hash
+from config import TestingConfig
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.student import Student
+from app.models.teacher import Teacher, Title, Position
+from app.models.topic import Topic
+from app.services.auth_tokens import Principal, issue_token, read_token
+from app.services.passwords import needs_rehash, verify_password, PasswordHasherBusy
+from tests.conftest import recorded_statements
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        teacher_acc = Account(full_name="Jan Kowalski", login="j.kowalski", user_type=UserType.TEACHER)
+        teacher_acc.set_password('tajne')
+        # Hashed with older parameters than PASSWORD_HASH_METHOD
+        student_acc = Account(full_name="Anna Nowak", login="a.nowak", user_type=UserType.STUDENT,
+                              password=generate_password_hash('haslo', method='pbkdf2:sha256:500'))
+        db.session.add_all([teacher_acc, student_acc])
+        db.session.flush()
+        teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT)
+        student = Student(account_id=student_acc.id, index_number="123456")
+        db.session.add_all([teacher, student])
+        db.session.commit()
+        return {
+            'teacher_account_id': teacher_acc.id,
+            'teacher_id': teacher.id,
+            'student_account_id': student_acc.id,
+            'student_id': student.id
+        }
+
+
+def login(client, login_name, password):
+    return client.post('/api/auth/login', json={'login': login_name, 'password': password})
+
+
+def bearer(client, login_name, password):
+    return {'Authorization': f"Bearer {login(client, login_name, password).get_json()['token']}"}
+
+
+class TestLogin:
+
+    def test_teacher_login(self, client, setup_test_data):
+        response = login(client, 'j.kowalski', 'tajne')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data.pop('token')
+        assert data.pop('expiresAt') > time.time()
+        assert data == {
+            'id': setup_test_data['teacher_account_id'],
+            'login': 'j.kowalski',
+            'fullName': "Jan Kowalski",
+            'role': 'TEACHER',
+            'teacherId': setup_test_data['teacher_id'],
+            'studentId': None
+        }
+
+    def test_wrong_password_and_unknown_login(self, client, setup_test_data):
+        assert login(client, 'j.kowalski', 'zle').status_code == 401
+        assert login(client, 'nikt', 'tajne').status_code == 401
+
+    def test_invalid_requests(self, client, setup_test_data):
+        assert client.post('/api/auth/login', json={'login': 'j.kowalski'}).status_code == 400
+        assert client.post('/api/auth/login', json={'login': 1, 'password': 'x'}).status_code == 400
+        assert client.post('/api/auth/login', data='x').status_code == 400
+
+    def test_old_hash_is_upgraded_on_login(self, app, client, setup_test_data):
+        with app.app_context():
+            old_hash = db.session.get(Account, setup_test_data['student_account_id']).password
+
+        assert login(client, 'a.nowak', 'haslo').get_json()['studentId'] == setup_test_data['student_id']
+
+        with app.app_context():
+            new_hash = db.session.get(Account, setup_test_data['student_account_id']).password
+            assert new_hash != old_hash
+            assert new_hash.startswith('pbkdf2:sha256:1000$')
+            assert not needs_rehash(new_hash, app.config['PASSWORD_HASH_METHOD'])
+        assert login(client, 'a.nowak', 'haslo').status_code == 200
+
+    def test_failed_login_keeps_old_hash(self, app, client, setup_test_data):
+        with app.app_context():
+            old_hash = db.session.get(Account, setup_test_data['student_account_id']).password
+
+        assert login(client, 'a.nowak', 'zle').status_code == 401
+
+        with app.app_context():
+            assert db.session.get(Account, setup_test_data['student_account_id']).password == old_hash
+
+    def test_imported_account_cannot_log_in(self, app, client):
+        with app.app_context():
+            db.session.add(Account(full_name="Import", login="imp", password='!', user_type=UserType.STUDENT))
+            db.session.commit()
+
+        assert login(client, 'imp', '!').status_code == 401
+
+
+class TestPasswordPool:
+
+    def test_concurrent_logins(self, app, client, setup_test_data):
+        statuses = []
+
+        def worker():
+            statuses.append(login(app.test_client(), 'j.kowalski', 'tajne').status_code)
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert statuses == [200] * 20
+
+    def test_busy_pool_rejects_logins(self, app, client, setup_test_data):
+        app.config['PASSWORD_HASH_WAIT_SECONDS'] = 0.01
+        slots = app.extensions['password_pool'].slots
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        try:
+            response = login(client, 'j.kowalski', 'tajne')
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            with app.app_context(), pytest.raises(PasswordHasherBusy):
+                verify_password(None, 'x')
+        finally:
+            for _ in range(taken):
+                slots.release()
+
+        assert taken == app.config['PASSWORD_HASH_WORKERS'] + app.config['PASSWORD_HASH_QUEUE']
+        assert login(client, 'j.kowalski', 'tajne').status_code == 200
+
+    def test_checks_run_in_the_pool(self, app, setup_test_data):
+        with app.app_context():
+            pwhash = db.session.get(Account, setup_test_data['teacher_account_id']).password
+            names = []
+            original = app.extensions['password_pool'].executor.submit
+
+            def submit(fn, *args):
+                names.append(fn.__name__)
+                return original(fn, *args)
+
+            app.extensions['password_pool'].executor.submit = submit
+            assert verify_password(pwhash, 'tajne') == (True, None)
+            assert names == ['_verify']
+
+
+class TestTokens:
+
+    def test_me_without_queries(self, app, client, setup_test_data):
+        headers = bearer(client, 'a.nowak', 'haslo')
+
+        statements, response = recorded_statements(lambda: client.get('/api/auth/me', headers=headers))
+
+        assert statements == []
+        assert response.get_json() == {
+            'id': setup_test_data['student_account_id'],
+            'role': 'STUDENT',
+            'teacherId': None,
+            'studentId': setup_test_data['student_id']
+        }
+
+    def test_invalid_tokens(self, app, client, setup_test_data):
+        token = login(client, 'j.kowalski', 'tajne').get_json()['token']
+        assert client.get('/api/auth/me').status_code == 401
+        assert client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}x'}).status_code == 401
+        assert client.get('/api/auth/me', headers={'Authorization': 'Bearer abc'}).status_code == 401
+
+        app.config['AUTH_TOKEN_TTL_SECONDS'] = -1
+        with app.app_context():
+            expired, _ = issue_token(Principal(1, UserType.ADMIN, None, None))
+            assert read_token(expired) is None
+        assert client.get('/api/auth/me', headers={'Authorization': f'Bearer {expired}'}).status_code == 401
+
+        app.config['SECRET_KEY'] = 'another-secret'
+        assert client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+
+    def test_create_topic_uses_token_supervisor(self, app, client, setup_test_data):
+        headers = bearer(client, 'j.kowalski', 'tajne')
+        client.get('/api/topics/supervisor/me', headers=headers)
+
+        statements, response = recorded_statements(lambda: client.post('/api/topics', headers=headers, json={
+            # Ignored, the supervisor is the token's account
+            'supervisor_id': setup_test_data['student_account_id'],
+            'title': "Nowy temat"
+        }))
+
+        assert response.status_code == 201
+        assert response.get_json()['supervisor']['accountId'] == setup_test_data['teacher_account_id']
+        assert not [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+
+    def test_roles_are_enforced(self, client, setup_test_data):
+        headers = bearer(client, 'a.nowak', 'haslo')
+
+        assert client.post('/api/topics', headers=headers, json={'title': "Temat"}).status_code == 403
+        assert client.get('/api/topics/supervisor/me', headers=headers).status_code == 403
+
+    def test_declaration_without_account_lookup(self, app, client, setup_test_data):
+        with app.app_context():
+            topic = Topic(title="Temat", teacher_id=setup_test_data['teacher_id'])
+            db.session.add(topic)
+            db.session.flush()
+            db.session.get(Student, setup_test_data['student_id']).topic_id = topic.id
+            db.session.commit()
+            topic_id = topic.id
+        headers = bearer(client, 'a.nowak', 'haslo')
+
+        statements, response = recorded_statements(
+            lambda: client.post(f'/api/topics/{topic_id}/declare', headers=headers)
+        )
+
+        assert response.status_code == 200
+        assert response.get_json()['user_id'] == setup_test_data['student_account_id']
+        assert not [s for s in statements if 'FROM account' in s]
+
+        teacher_headers = bearer(client, 'j.kowalski', 'tajne')
+        response = client.post(f'/api/topics/{topic_id}/declare', headers=teacher_headers)
+        assert response.get_json()['students_approved'] == [setup_test_data['student_id']]
+
+    def test_token_can_be_required(self, app, client, setup_test_data):
+        app.config['AUTH_REQUIRE_TOKEN'] = True
+
+        response = client.get(f"/api/topics/supervisor/me?supervisor_id={setup_test_data['teacher_account_id']}")
+        assert response.status_code == 401
+        headers = bearer(client, 'j.kowalski', 'tajne')
+        assert client.get('/api/topics/supervisor/me', headers=headers).get_json()['id'] == setup_test_data['teacher_id']
+
+    def test_secret_key_is_required(self, monkeypatch):
+        monkeypatch.setattr(TestingConfig, 'SECRET_KEY', None)
+        with pytest.raises(RuntimeError, match='SECRET_KEY'):
+            create_app('testing')
+
+    def test_debug_server_gets_a_random_key(self, monkeypatch):
+        monkeypatch.setattr(TestingConfig, 'SECRET_KEY', None)
+        monkeypatch.setattr(TestingConfig, 'DEBUG', True, raising=False)
+
+        keys = {create_app('testing').config['SECRET_KEY'] for _ in range(2)}
+
+        assert len(keys) == 2
+        assert all(len(key) == 64 for key in keys)
@@ -0,0 +1,318 @@
+"""
+Tests for the topic change feed: the in-process bus, long polling and server-sent events.
+
+Run with: python -m pytest tests/test_change_feed.py -v
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from config import TestingConfig
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.student import Student
+from app.models.teacher import Teacher, Title, Position
+from app.models.topic import Topic, TopicStatus
+from app.services.change_bus import ChangeBus
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'CHANGES_MAX_WAIT_SECONDS', 2, raising=False)
+    monkeypatch.setattr(TestingConfig, 'SSE_HEARTBEAT_SECONDS', 0.05, raising=False)
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        teacher_acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+        student_acc = Account(full_name="Anna Nowak", login="a.nowak", password="x", user_type=UserType.STUDENT)
+        db.session.add_all([teacher_acc, student_acc])
+        db.session.flush()
+        teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT)
+        db.session.add(teacher)
+        db.session.flush()
+        topics = [Topic(title=f"Temat {i}", status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id) for i in range(3)]
+        db.session.add_all(topics)
+        db.session.flush()
+        student = Student(account_id=student_acc.id, index_number="123456", topic_id=topics[0].id)
+        db.session.add(student)
+        db.session.commit()
+        return {
+            'teacher_account_id': teacher_acc.id,
+            'student_account_id': student_acc.id,
+            'student_id': student.id,
+            'topic_ids': [t.id for t in topics]
+        }
+
+
+def cursor(client):
+    return client.get('/api/topics/changes').get_json()['lastEventId']
+
+
+class TestChangeBus:
+
+    def test_wait_returns_published_events(self):
+        bus = ChangeBus()
+        bus.publish([{'type': 'a'}, {'type': 'b'}])
+
+        assert bus.wait(0, 0) == ([(1, {'type': 'a'}), (2, {'type': 'b'})], False)
+        assert bus.wait(1, 0) == ([(2, {'type': 'b'})], False)
+        assert bus.wait(2, 0) == ([], False)
+
+    def test_missed_events_ask_for_reset(self):
+        bus = ChangeBus(buffer_size=2)
+        bus.publish([{'type': 'a'}, {'type': 'b'}, {'type': 'c'}])
+
+        assert bus.wait(1, 0) == ([(2, {'type': 'b'}), (3, {'type': 'c'})], False)
+        assert bus.wait(0, 0) == ([], True)
+        # An id from before a restart is ahead of the bus
+        assert bus.wait(10, 0) == ([], True)
+
+    def test_many_idle_subscribers_wake_on_publish(self):
+        bus = ChangeBus()
+        received = []
+        threads = [threading.Thread(target=lambda: received.append(bus.wait(0, 5))) for _ in range(200)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while bus.waiting < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert bus.waiting == len(threads)
+
+        bus.publish([{'type': 'a'}])
+        for thread in threads:
+            thread.join()
+
+        assert bus.waiting == 0
+        assert received == [([(1, {'type': 'a'})], False)] * len(threads)
+
+
+class TestChangesEndpoint:
+
+    def test_approve_and_reject_publish_status(self, client, setup_test_data):
+        topic_ids = setup_test_data['topic_ids']
+        after = cursor(client)
+        client.patch(f'/api/topics/{topic_ids[0]}/approve')
+        client.patch(f'/api/topics/{topic_ids[1]}/reject', json={'rejection_reason': 'Za szeroki'})
+
+        data = client.get(f'/api/topics/changes?after={after}').get_json()
+
+        assert [(e['type'], e['topicId'], e['status']) for e in data['events']] == [
+            ('topic_status', topic_ids[0], 'ZATWIERDZONY'),
+            ('topic_status', topic_ids[1], 'ODRZUCONY'),
+        ]
+        assert data['lastEventId'] == data['events'][-1]['id']
+        assert data['reset'] is False
+
+    def test_bulk_operations_publish_each_topic(self, client, setup_test_data):
+        topic_ids = setup_test_data['topic_ids']
+        after = cursor(client)
+        client.patch('/api/topics/approve-bulk', json={'topic_ids': topic_ids[:2] + [999]})
+
+        events = client.get(f'/api/topics/changes?after={after}').get_json()['events']
+
+        assert sorted(e['topicId'] for e in events) == topic_ids[:2]
+        assert {e['status'] for e in events} == {'ZATWIERDZONY'}
+
+    def test_declarations_publish(self, client, setup_test_data):
+        topic_id = setup_test_data['topic_ids'][0]
+        after = cursor(client)
+        client.post(f'/api/topics/{topic_id}/declare', json={'user_id': setup_test_data['student_account_id']})
+
+        events = client.get(f'/api/topics/changes?after={after}').get_json()['events']
+
+        assert events == [{
+            'id': after + 1,
+            'type': 'declaration',
+            'topicId': topic_id,
+            'userType': 'student',
+            'studentId': setup_test_data['student_id'],
+            'approved': True
+        }]
+
+    def test_created_topic_is_published(self, client, setup_test_data):
+        after = cursor(client)
+        created = client.post('/api/topics', json={
+            'supervisor_id': setup_test_data['teacher_account_id'],
+            'title': "Nowy temat",
+            'description': "Opis",
+            'topicJustification': "Uzasadnienie"
+        }).get_json()
+
+        events = client.get(f'/api/topics/changes?after={after}').get_json()['events']
+
+        assert [(e['type'], e['topicId']) for e in events] == [('topic_created', created['id'])]
+
+    def test_rollback_publishes_nothing(self, app, client, setup_test_data):
+        after = cursor(client)
+        with app.app_context():
+            db.session.get(Topic, setup_test_data['topic_ids'][0]).status = TopicStatus.ZATWIERDZONY
+            db.session.flush()
+            db.session.rollback()
+
+        assert client.get(f'/api/topics/changes?after={after}&timeout=0').get_json()['events'] == []
+
+    def test_long_poll_waits_for_a_change(self, app, client, setup_test_data):
+        topic_id = setup_test_data['topic_ids'][0]
+        after = cursor(client)
+
+        def approve_later():
+            time.sleep(0.2)
+            app.test_client().patch(f'/api/topics/{topic_id}/approve')
+
+        thread = threading.Thread(target=approve_later)
+        thread.start()
+        start = time.monotonic()
+        data = client.get(f'/api/topics/changes?after={after}').get_json()
+        thread.join()
+
+        assert 0.1 < time.monotonic() - start < 2
+        assert [e['topicId'] for e in data['events']] == [topic_id]
+
+    def test_long_poll_times_out_empty(self, client, setup_test_data):
+        after = cursor(client)
+        data = client.get(f'/api/topics/changes?after={after}&timeout=0.05').get_json()
+
+        assert data == {'events': [], 'lastEventId': after, 'reset': False}
+
+    def test_invalid_parameters(self, client, setup_test_data):
+        assert client.get('/api/topics/changes?after=-1').status_code == 400
+        assert client.get('/api/topics/changes?after=x').status_code == 400
+        assert client.get('/api/topics/changes?after=0&timeout=x').status_code == 400
+
+    def test_subscriber_limit(self, app, client, setup_test_data):
+        app.config['CHANGES_MAX_SUBSCRIBERS'] = 0
+
+        assert client.get('/api/topics/changes?after=0').status_code == 503
+        assert client.get('/api/topics/events').status_code == 503
+
+
+class TestEventStream:
+
+    def test_open_streams_count_as_subscribers(self, app, client, setup_test_data):
+        app.config['CHANGES_MAX_SUBSCRIBERS'] = 1
+        bus = app.extensions['change_bus']
+
+        stream = client.get('/api/topics/events', buffered=False)
+        next(iter(stream.response))
+
+        # Connected, but not waiting in the bus right now
+        assert (bus.subscribers, bus.waiting) == (1, 0)
+        assert client.get('/api/topics/events').status_code == 503
+        assert client.get('/api/topics/changes?after=0&timeout=0').status_code == 503
+        stream.close()
+        assert bus.subscribers == 0
+        assert client.get('/api/topics/changes?after=0&timeout=0').status_code == 200
+        assert bus.subscribers == 0
+
+    def test_stream_sends_changes_after_last_event_id(self, app, client, setup_test_data):
+        topic_id = setup_test_data['topic_ids'][0]
+        after = cursor(client)
+        client.patch(f'/api/topics/{topic_id}/approve')
+
+        response = client.get('/api/topics/events', headers={'Last-Event-ID': str(after)}, buffered=False)
+        chunks = iter(response.response)
+
+        assert response.mimetype == 'text/event-stream'
+        assert next(chunks).startswith(b'retry:')
+        message = next(chunks).decode()
+        assert message.startswith(f'id: {after + 1}\nevent: topic_status\n')
+        assert f'"topicId": {topic_id}' in message
+        response.close()
+
+    def test_idle_stream_sends_heartbeats(self, client, setup_test_data):
+        response = client.get('/api/topics/events', buffered=False)
+        chunks = iter(response.response)
+        next(chunks)
+
+        assert next(chunks) == b': keep-alive\n\n'
+        response.close()
+
+    def test_stream_runs_no_queries(self, app, client, setup_test_data):
+        with QueryCounter(db.engine) as queries:
+            response = client.get('/api/topics/events', buffered=False)
+            chunks = iter(response.response)
+            for _ in range(3):
+                next(chunks)
+            response.close()
+
+        assert queries.statements == []
+
+
+# Holds idle long polls on serve.py's server in a patched process, then publishes one change
+COOPERATIVE_SERVER_SCRIPT = """
+import serve
+import json
+import gevent
+from gevent import monkey, socket
+from app import create_app
+from app.services.serving import cooperative
+
+SUBSCRIBERS = 1000
+app = create_app('testing')
+app.config.update(SERVER_HOST='127.0.0.1', SERVER_PORT=0)
+server = serve.make_server(app)
+server.start()
+bus = app.extensions['change_bus']
+
+def long_poll():
+    with socket.create_connection(('127.0.0.1', server.server_port)) as connection:
+        connection.sendall(b'GET /api/topics/changes?after=0 HTTP/1.1\\r\\nHost: test\\r\\n\\r\\n')
+        response = b''
+        while b'lastEventId' not in response:
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+        return response
+
+polls = [gevent.spawn(long_poll) for _ in range(SUBSCRIBERS)]
+with gevent.Timeout(20):
+    while bus.waiting < SUBSCRIBERS:
+        gevent.sleep(0.01)
+waiting, native_threads = bus.waiting, monkey.get_original('threading', 'active_count')()
+bus.publish([{'type': 'topic_status', 'topicId': 1, 'status': 'ZATWIERDZONY'}])
+gevent.joinall(polls, timeout=20)
+print(json.dumps({
+    'cooperative': cooperative(),
+    'max_subscribers': app.config['CHANGES_MAX_SUBSCRIBERS'],
+    'waiting': waiting,
+    'native_threads': native_threads,
+    'delivered': sum(b'"topicId":1' in poll.value.replace(b' ', b'') for poll in polls if poll.value)
+}))
+server.stop()
+"""
+
+
+class TestCooperativeServer:
+
+    def test_idle_subscribers_do_not_hold_threads(self):
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', COOPERATIVE_SERVER_SCRIPT], cwd=backend,
+                                capture_output=True, text=True, timeout=120)
+
+        assert result.returncode == 0, result.stderr
+        report = json.loads(result.stdout.splitlines()[-1])
+        assert report['cooperative'] is True
+        assert report['max_subscribers'] == 5000
+        assert report['waiting'] == 1000
+        # The main thread, no thread per subscriber
+        assert report['native_threads'] <= 2
+        assert report['delivered'] == 1000
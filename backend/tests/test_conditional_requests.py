@@ -0,0 +1,124 @@
+"""
+Tests for ETag / If-None-Match handling of the listing endpoints.
+
+Run with: python -m pytest tests/test_conditional_requests.py -v
+"""
+import pytest
+from config import TestingConfig
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.topic import Topic, TopicStatus
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_topic():
+    acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+    db.session.add(acc)
+    db.session.flush()
+    teacher = Teacher(account_id=acc.id, title=Title.dr, position=Position.ADIUNKT)
+    db.session.add(teacher)
+    db.session.flush()
+    topic = Topic(title="Temat", status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id)
+    db.session.add(topic)
+    db.session.commit()
+    return topic.id
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        return {'topic_id': add_topic()}
+
+
+def revalidate(client, url):
+    etag = client.get(url).headers['ETag']
+    with QueryCounter(db.engine) as queries:
+        response = client.get(url, headers={'If-None-Match': etag})
+    return etag, response, queries.count
+
+
+class TestConditionalListings:
+
+    @pytest.mark.parametrize('url', ['/api/topics', '/api/topics/pending', '/api/users'])
+    def test_unchanged_listing_returns_304(self, client, setup_test_data, url):
+        etag, response, statements = revalidate(client, url)
+
+        assert etag.startswith('W/"')
+        assert response.status_code == 304
+        assert response.get_data() == b''
+        assert response.headers['ETag'] == etag
+        # Only the change markers are read
+        assert statements == 1
+
+    def test_write_changes_etag(self, client, setup_test_data):
+        etag = client.get('/api/topics').headers['ETag']
+
+        client.patch(f"/api/topics/{setup_test_data['topic_id']}/approve")
+
+        response = client.get('/api/topics', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.get_json()[0]['status'] == 'ZATWIERDZONY'
+
+    def test_bulk_update_changes_etag(self, client, app, setup_test_data):
+        etag = client.get('/api/topics/pending').headers['ETag']
+
+        with app.app_context():
+            Topic.query.update({Topic.status: TopicStatus.ZATWIERDZONY}, synchronize_session=False)
+            db.session.commit()
+
+        response = client.get('/api/topics/pending', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()['count'] == 0
+
+    def test_unrelated_table_keeps_user_etag(self, client, setup_test_data):
+        etag = client.get('/api/users').headers['ETag']
+
+        client.patch(f"/api/topics/{setup_test_data['topic_id']}/approve")
+
+        assert client.get('/api/users', headers={'If-None-Match': etag}).status_code == 304
+
+    def test_query_string_is_part_of_etag(self, client, setup_test_data):
+        all_topics = client.get('/api/topics').headers['ETag']
+        pending = client.get('/api/topics?status=OCZEKUJACY').headers['ETag']
+
+        assert all_topics != pending
+
+    def test_write_of_another_process_is_not_served_from_cache(self, monkeypatch, tmp_path):
+        # Two worker processes: two apps, each with its own topic cache, on one database
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'shared.db'}")
+        writer, reader = create_app('testing'), create_app('testing')
+        with writer.app_context():
+            db.create_all()
+            topic_id = add_topic()
+        try:
+            client = reader.test_client()
+            etag = client.get('/api/topics').headers['ETag']
+
+            writer.test_client().patch(f'/api/topics/{topic_id}/reject', json={'rejection_reason': 'Nie'})
+
+            response = client.get('/api/topics', headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.get_json()[0]['status'] == 'ODRZUCONY'
+            revalidated = client.get('/api/topics', headers={'If-None-Match': response.headers['ETag']})
+            assert revalidated.status_code == 304
+        finally:
+            with writer.app_context():
+                db.drop_all()
@@ -0,0 +1,126 @@
+"""
+Tests for the connection pool configuration.
+
+Run with: python -m pytest tests/test_connection_pool.py -v
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.services.database import pool_settings
+from config import TestingConfig, engine_options_from_env
+
+
+@pytest.fixture
+def pooled_app(monkeypatch, tmp_path):
+    """The testing app on a SQLite file, which uses a QueuePool like a real database server."""
+    monkeypatch.setenv('DB_POOL_SIZE', '2')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '1')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '10')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "pool.db"}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_ENGINE_OPTIONS', engine_options_from_env(), raising=False)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Account(full_name=f"Student {i}", login=f"s{i}", password="x", user_type=UserType.STUDENT)
+            for i in range(20)
+        ])
+        db.session.commit()
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+class TestEngineOptions:
+
+    def test_defaults(self, monkeypatch):
+        for name in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE', 'DB_POOL_PRE_PING'):
+            monkeypatch.delenv(name, raising=False)
+        assert engine_options_from_env() == {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_timeout': 30.0,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True
+        }
+
+    def test_read_from_environment(self, monkeypatch):
+        monkeypatch.setenv('DB_POOL_RECYCLE', '300')
+        monkeypatch.setenv('DB_POOL_PRE_PING', '0')
+        options = engine_options_from_env()
+        assert options['pool_recycle'] == 300
+        assert options['pool_pre_ping'] is False
+
+    def test_effective_pool_settings(self, pooled_app):
+        with pooled_app.app_context():
+            settings = pool_settings(db.engine)
+
+        assert settings['pool'] == 'QueuePool'
+        assert settings['pool_size'] == 2
+        assert settings['max_overflow'] == 1
+        assert settings['pool_timeout'] == 10
+        assert settings['pool_pre_ping'] is True
+
+    def test_pool_settings_are_logged_by_default(self, pooled_app, caplog):
+        # No logging configuration, the app logger is set to INFO by itself
+        create_app('testing')
+
+        records = [r for r in caplog.records if r.name == pooled_app.logger.name]
+        assert pooled_app.logger.isEnabledFor(logging.INFO)
+        assert any(r.levelno == logging.INFO and r.getMessage().startswith('Database pool (primary): ')
+                   and 'pool_size=2' in r.getMessage() for r in records)
+
+    def test_log_level_is_configurable(self, monkeypatch, caplog):
+        monkeypatch.setattr(TestingConfig, 'LOG_LEVEL', 'WARNING')
+        app = create_app('testing')
+
+        assert not app.logger.isEnabledFor(logging.INFO)
+        assert not any(r.getMessage().startswith('Database pool') for r in caplog.records)
+
+
+class TestPoolingUnderConcurrency:
+
+    def test_concurrent_requests_stay_within_pool_limits(self, pooled_app):
+        with pooled_app.app_context():
+            engine = db.engine
+        checked_out = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def on_checkout(*args):
+            nonlocal checked_out, peak
+            with lock:
+                checked_out += 1
+                peak = max(peak, checked_out)
+
+        def on_checkin(*args):
+            nonlocal checked_out
+            with lock:
+                checked_out -= 1
+
+        event.listen(engine, 'checkout', on_checkout)
+        event.listen(engine, 'checkin', on_checkin)
+
+        def fetch(_):
+            response = pooled_app.test_client().get('/api/users')
+            return response.status_code, len(response.get_json())
+
+        try:
+            with ThreadPoolExecutor(max_workers=12) as executor:
+                results = list(executor.map(fetch, range(60)))
+        finally:
+            event.remove(engine, 'checkout', on_checkout)
+            event.remove(engine, 'checkin', on_checkin)
+
+        assert results == [(200, 20)] * 60
+        # pool_size + max_overflow
+        assert 1 <= peak <= 3
+        # Every request gave its connection back
+        assert checked_out == 0
+        assert engine.pool.checkedout() == 0
@@ -0,0 +1,160 @@
+"""
+Tests for batched declaration handling.
+
+Run with: python -m pytest tests/test_declarations.py -v
+"""
+import pytest
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.models.declaration import Declaration, Status
+from app.services.auth_tokens import Principal, issue_token
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    """Token of a coordinator, who declares on behalf of the accounts in the batch."""
+    with app.app_context():
+        token, _ = issue_token(Principal(1000, UserType.COORDINATOR, None, None))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def add_topic_with_team(number, team_size):
+    teacher_acc = Account(full_name=f"Prowadzący {number}", login=f"t{number}", password="x", user_type=UserType.TEACHER)
+    db.session.add(teacher_acc)
+    db.session.flush()
+    teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT)
+    db.session.add(teacher)
+    db.session.flush()
+    topic = Topic(title=f"Temat {number}", status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id)
+    db.session.add(topic)
+    db.session.flush()
+
+    student_account_ids = []
+    for i in range(team_size):
+        acc = Account(full_name=f"Student {number}-{i}", login=f"s{number}-{i}", password="x", user_type=UserType.STUDENT)
+        db.session.add(acc)
+        db.session.flush()
+        db.session.add(Student(account_id=acc.id, index_number=f"{number:03d}{i:03d}", topic_id=topic.id))
+        student_account_ids.append(acc.id)
+    db.session.commit()
+    return {'topic_id': topic.id, 'teacher_account_id': teacher_acc.id, 'student_account_ids': student_account_ids}
+
+
+@pytest.fixture
+def team(app):
+    with app.app_context():
+        return add_topic_with_team(1, 3)
+
+
+class TestBatchDeclarations:
+
+    def test_students_and_teacher_declare_in_one_request(self, client, app, team, headers):
+        items = [{'user_id': uid, 'topic_id': team['topic_id']} for uid in team['student_account_ids']]
+        items.append({'user_id': team['teacher_account_id'], 'topic_id': team['topic_id']})
+
+        response = client.post('/api/topics/declarations:batch', headers=headers, json={'items': items})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 4
+        assert data['succeeded'] == 4
+        assert [r['user_type'] for r in data['results']] == ['student'] * 3 + ['teacher']
+        declaration_ids = [r['declaration']['id'] for r in data['results']]
+        assert len(set(declaration_ids)) == 4
+
+        with app.app_context():
+            topic = db.session.get(Topic, team['topic_id'])
+            assert topic.status == TopicStatus.ZATWIERDZONY
+            assert topic.teacher_declaration_id == declaration_ids[-1]
+            for student in topic.students:
+                assert student.is_declaration_approved
+                assert db.session.get(Declaration, student.declaration_id).status == Status.ZLOZONA
+
+    def test_existing_declaration_is_updated(self, client, app, team, headers):
+        item = {'user_id': team['student_account_ids'][0], 'topic_id': team['topic_id']}
+        first = client.post('/api/topics/declarations:batch', headers=headers, json={'items': [item]}).get_json()
+        second = client.post('/api/topics/declarations:batch', headers=headers, json={'items': [item, item]}).get_json()
+
+        first_id = first['results'][0]['declaration']['id']
+        assert [r['declaration']['id'] for r in second['results']] == [first_id, first_id]
+        with app.app_context():
+            assert Declaration.query.count() == 1
+
+    def test_per_item_errors(self, client, app, team, headers):
+        with app.app_context():
+            other = add_topic_with_team(2, 1)
+
+        items = [
+            {'user_id': 99999, 'topic_id': team['topic_id']},
+            {'user_id': team['student_account_ids'][0], 'topic_id': 99999},
+            {'user_id': team['student_account_ids'][0], 'topic_id': other['topic_id']},
+            {'user_id': other['teacher_account_id'], 'topic_id': team['topic_id']},
+            {'user_id': 'abc'},
+            {'user_id': team['student_account_ids'][1], 'topic_id': team['topic_id']},
+        ]
+        data = client.post('/api/topics/declarations:batch', headers=headers, json={'items': items}).get_json()
+
+        errors = [r.get('error') for r in data['results']]
+        assert errors == [
+            'User not found',
+            'Topic not found',
+            'Student is not assigned to this topic',
+            'Teacher is not the supervisor of this topic',
+            'user_id and topic_id are required',
+            None
+        ]
+        assert data['succeeded'] == 1
+
+    def test_query_count_does_not_grow_with_batch_size(self, client, app, team, headers):
+        with app.app_context():
+            teams = [add_topic_with_team(n, 4) for n in range(2, 12)]
+
+        def run(teams_in_batch):
+            items = [{'user_id': uid, 'topic_id': t['topic_id']} for t in teams_in_batch for uid in t['student_account_ids']]
+            items += [{'user_id': t['teacher_account_id'], 'topic_id': t['topic_id']} for t in teams_in_batch]
+            with QueryCounter(db.engine) as queries:
+                response = client.post('/api/topics/declarations:batch', headers=headers, json={'items': items})
+            assert response.get_json()['succeeded'] == len(items)
+            return queries.count
+
+        # Warm up, the first write also creates the table_version rows
+        run(teams[:1])
+        assert run(teams[1:2]) == run(teams[2:])
+
+    def test_invalid_body_returns_400(self, client, team, headers):
+        assert client.post('/api/topics/declarations:batch', headers=headers, json={}).status_code == 400
+        assert client.post('/api/topics/declarations:batch', headers=headers, json={'items': []}).status_code == 400
+        too_many = [{'user_id': 1, 'topic_id': 1}] * 1001
+        assert client.post('/api/topics/declarations:batch', headers=headers, json={'items': too_many}).status_code == 400
+
+    def test_requires_coordinator_token(self, app, client, team):
+        with app.app_context():
+            student, _ = issue_token(Principal(team['student_account_ids'][0], UserType.STUDENT, None, 1))
+        items = [{'user_id': team['student_account_ids'][0], 'topic_id': team['topic_id']}]
+        url = '/api/topics/declarations:batch'
+
+        assert client.post(url, json={'items': items}).status_code == 401
+        assert client.post(url, json={'items': items},
+                           headers={'Authorization': f'Bearer {student}'}).status_code == 403
+        with app.app_context():
+            assert Declaration.query.count() == 0
@@ -0,0 +1,275 @@
+"""
+Tests for the students-by-topic export.
+
+Run with: python -m pytest tests/test_export.py -v
+"""
+import csv
+import json
+import os
+import time
+import pytest
+from io import BytesIO
+from openpyxl import load_workbook
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.routes.export import export_students_by_topic
+from app.services.export_jobs import get_or_build_artifact
+from app.services.reports import STUDENTS_BY_TOPIC_WRITERS
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing')
+    app.config['TESTING'] = True
+    app.config['EXPORT_CACHE_DIR'] = str(tmp_path)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_export_data(app):
+    with app.app_context():
+        teacher_acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+        db.session.add(teacher_acc)
+        db.session.flush()
+        teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT, is_declaration_approved=True)
+        db.session.add(teacher)
+        db.session.flush()
+
+        approved = Topic(title="Temat zatwierdzony", status=TopicStatus.ZATWIERDZONY, teacher_id=teacher.id)
+        pending = Topic(title="Temat oczekujący", status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id)
+        db.session.add_all([approved, pending])
+        db.session.flush()
+
+        assignments = [
+            ("100001", approved.id, True),
+            ("100002", approved.id, False),
+            ("100003", pending.id, False),
+            ("100004", None, False),
+        ]
+        for index, topic_id, student_approved in assignments:
+            acc = Account(full_name=f"Student {index}", login=f"s{index}", password="x", user_type=UserType.STUDENT)
+            db.session.add(acc)
+            db.session.flush()
+            db.session.add(Student(account_id=acc.id, index_number=index, topic_id=topic_id,
+                                   is_declaration_approved=student_approved))
+        db.session.commit()
+        return {'approved_id': approved.id, 'pending_id': pending.id}
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f'/api/export/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Export job {job_id} did not finish')
+
+
+def export_xlsx(client):
+    """The XLSX export; on a cache miss it waits for the queued job and downloads again."""
+    response = client.get('/api/export/students-by-topic')
+    if response.status_code == 202:
+        assert wait_for_job(client, response.get_json()['id'])['status'] == 'done'
+        response = client.get('/api/export/students-by-topic')
+    return response
+
+
+def artifacts(app):
+    return [name for name in os.listdir(app.config['EXPORT_CACHE_DIR']) if name.startswith('students-by-topic-')]
+
+
+def read_rows(response):
+    wb = load_workbook(BytesIO(response.get_data()))
+    return [list(row) for row in wb.active.iter_rows(values_only=True)]
+
+
+class TestStudentsByTopicExport:
+
+    def test_xlsx_contains_header_and_rows(self, client, setup_export_data):
+        response = export_xlsx(client)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        assert 'attachment' in response.headers['Content-Disposition']
+
+        rows = read_rows(response)
+        assert rows[0][:3] == ["Topic ID", "Temat", "Nr indeksu"]
+        assert rows[1] == [setup_export_data['approved_id'], "Temat zatwierdzony", "100001", "Student 100001", "Tak", "Tak", "Tak"]
+        assert rows[2] == [setup_export_data['approved_id'], "Temat zatwierdzony", "100002", "Student 100002", "Tak", "Tak", "Nie"]
+
+    def test_xlsx_separates_topics_and_lists_unassigned_last(self, client, setup_export_data):
+        rows = read_rows(export_xlsx(client))
+
+        # Blank separator rows between topic groups
+        assert rows[3] == [None] * 7
+        assert rows[4][0] == setup_export_data['pending_id']
+        assert rows[4][4] == "Nie"
+        assert rows[-1][:3] == ["Brak tematu", "Nie przypisany", "100004"]
+
+    def test_export_issues_single_query(self, client, app, setup_export_data):
+        export_xlsx(client).get_data()
+
+        with QueryCounter(db.engine) as queries:
+            csv_response = client.get('/api/export/students-by-topic?format=csv')
+            csv_response.get_data()
+            csv_statements = queries.count
+            # Cached XLSX only needs the change markers, the report is not read
+            xlsx_response = client.get('/api/export/students-by-topic')
+            xlsx_response.get_data()
+
+        assert csv_response.status_code == 200
+        assert xlsx_response.status_code == 200
+        assert csv_statements == 1
+        assert queries.count == 2
+
+    def test_csv_has_same_columns_as_xlsx(self, client, setup_export_data):
+        response = client.get('/api/export/students-by-topic?format=csv')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert response.headers['Content-Disposition'].endswith('.csv')
+
+        rows = list(csv.reader(response.get_data(as_text=True).splitlines()))
+        xlsx_rows = [r for r in read_rows(export_xlsx(client)) if any(r)]
+        assert rows[0] == xlsx_rows[0]
+        assert rows[1:] == [[str(v) for v in r] for r in xlsx_rows[1:]]
+
+    def test_ndjson_one_object_per_student(self, client, setup_export_data):
+        response = client.get('/api/export/students-by-topic?format=ndjson')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert len(records) == 4
+        assert records[0] == {
+            'topic_id': setup_export_data['approved_id'],
+            'topic_title': 'Temat zatwierdzony',
+            'index_number': '100001',
+            'full_name': 'Student 100001',
+            'topic_approved': 'Tak',
+            'teacher_declaration_approved': 'Tak',
+            'student_declaration_approved': 'Tak'
+        }
+        assert records[-1]['topic_id'] == 'Brak tematu'
+
+    def test_unknown_format_returns_400(self, client, setup_export_data):
+        response = client.get('/api/export/students-by-topic?format=pdf')
+        assert response.status_code == 400
+
+
+class TestExportCache:
+
+    def test_xlsx_reused_until_data_changes(self, client, app, setup_export_data):
+        first = export_xlsx(client).get_data()
+        second = client.get('/api/export/students-by-topic').get_data()
+
+        assert first == second
+        assert len(artifacts(app)) == 1
+
+        with app.app_context():
+            student = Student.query.filter_by(index_number="100004").first()
+            student.topic_id = setup_export_data['pending_id']
+            db.session.commit()
+
+        third = export_xlsx(client)
+        assert len(artifacts(app)) == 2
+        assert read_rows(third)[-1][2] == "100004"
+        assert read_rows(third)[-1][0] == setup_export_data['pending_id']
+
+    def test_file_evicted_after_the_view_returns_is_still_sent(self, client, app, setup_export_data):
+        expected = export_xlsx(client).get_data()
+
+        with app.test_request_context('/api/export/students-by-topic'):
+            response = export_students_by_topic()
+        # Another request evicts the file before the server reads the body
+        for name in artifacts(app):
+            os.remove(os.path.join(app.config['EXPORT_CACHE_DIR'], name))
+
+        assert b''.join(response.response) == expected
+
+    def test_artifact_built_during_a_change_is_not_cached(self, app, setup_export_data, monkeypatch):
+        build = STUDENTS_BY_TOPIC_WRITERS['csv']
+
+        def build_racing_a_commit(f):
+            build(f)
+            Student.query.filter_by(index_number="100004").first().topic_id = setup_export_data['pending_id']
+            db.session.commit()
+
+        with app.app_context():
+            monkeypatch.setitem(STUDENTS_BY_TOPIC_WRITERS, 'csv', build_racing_a_commit)
+            raced_path, fingerprint, cached = get_or_build_artifact('csv')
+            assert (fingerprint, cached) == (None, False)
+
+            monkeypatch.setitem(STUDENTS_BY_TOPIC_WRITERS, 'csv', build)
+            path, fingerprint, cached = get_or_build_artifact('csv')
+            assert fingerprint is not None and not cached
+            assert path != raced_path
+            assert get_or_build_artifact('csv') == (path, fingerprint, True)
+
+
+class TestExportJobs:
+
+    def test_cache_miss_queues_a_job(self, client, setup_export_data):
+        response = client.get('/api/export/students-by-topic')
+
+        assert response.status_code == 202
+        job = response.get_json()
+        assert response.headers['Location'].endswith(f"/api/export/jobs/{job['id']}")
+        assert wait_for_job(client, job['id'])['status'] == 'done'
+        download = client.get(f"/api/export/jobs/{job['id']}/file")
+        assert download.status_code == 200
+        assert read_rows(download)[0][:3] == ["Topic ID", "Temat", "Nr indeksu"]
+        # Built by the job, now served from the cache
+        assert client.get('/api/export/students-by-topic').status_code == 200
+
+    def test_job_is_served_by_other_workers(self, app, client, setup_export_data):
+        # Another worker process: an app of its own sharing the export directory
+        other = create_app('testing')
+        other.config['EXPORT_CACHE_DIR'] = app.config['EXPORT_CACHE_DIR']
+        job_id = client.post('/api/export/students-by-topic/jobs', json={'format': 'csv'}).get_json()['id']
+
+        job = wait_for_job(other.test_client(), job_id)
+        assert job['status'] == 'done'
+        download = other.test_client().get(job['download_url'])
+        assert download.status_code == 200
+        assert len(list(csv.reader(download.get_data(as_text=True).splitlines()))) == 5
+
+    def test_job_generates_downloadable_file(self, client, setup_export_data):
+        response = client.post('/api/export/students-by-topic/jobs', json={'format': 'csv'})
+
+        assert response.status_code == 202
+        job = wait_for_job(client, response.get_json()['id'])
+        assert job['status'] == 'done'
+        assert job['cached'] is False
+
+        download = client.get(job['download_url'])
+        assert download.status_code == 200
+        rows = list(csv.reader(download.get_data(as_text=True).splitlines()))
+        assert len(rows) == 5
+
+    def test_identical_export_is_served_from_cache(self, client, setup_export_data):
+        first = wait_for_job(client, client.post('/api/export/students-by-topic/jobs', json={}).get_json()['id'])
+        second = wait_for_job(client, client.post('/api/export/students-by-topic/jobs', json={}).get_json()['id'])
+
+        assert second['cached'] is True
+        assert second['fingerprint'] == first['fingerprint']
+
+    def test_unknown_job_and_format(self, client, setup_export_data):
+        assert client.get('/api/export/jobs/unknown').status_code == 404
+        assert client.get('/api/export/jobs/unknown/file').status_code == 404
+        assert client.post('/api/export/students-by-topic/jobs', json={'format': 'pdf'}).status_code == 400
@@ -0,0 +1,59 @@
+"""
+Tests for the synthetic data generator.
+
+Run with: python -m pytest tests/test_generate_data.py -v
+"""
+import pytest
+from sqlalchemy import func
+from app import create_app, db
+from app.models.account import Account
+from app.models.teacher import Teacher, get_max_teams_for_position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from generate_data import generate
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+class TestGenerateData:
+
+    def test_creates_requested_rows(self, app):
+        counts = generate(students=200, teachers=20, topics=30, batch_size=50)
+
+        assert counts['teacher'] == Teacher.query.count() == 20
+        assert counts['student'] == Student.query.count() == 200
+        assert counts['topic'] == Topic.query.count() == 30
+        assert Account.query.count() == 220
+        assert counts['declaration'] == Topic.query.filter(Topic.status == TopicStatus.ZATWIERDZONY).count()
+
+    def test_non_standard_topics_are_justified(self, app):
+        generate(students=200, teachers=20, topics=30)
+
+        assert Topic.query.filter(Topic.is_standard.is_(False)).count() > 0
+        for topic in Topic.query:
+            assert (topic.topic_justification is not None) == (not topic.is_standard)
+
+    def test_respects_team_limits(self, app):
+        generate(students=10, teachers=5, topics=1000)
+
+        topic_counts = dict(db.session.query(Topic.teacher_id, func.count(Topic.id)).group_by(Topic.teacher_id))
+        for teacher in Teacher.query:
+            assert topic_counts.get(teacher.id, 0) <= get_max_teams_for_position(teacher.position)
+        assert Topic.query.count() == sum(get_max_teams_for_position(t.position) for t in Teacher.query)
+
+    def test_can_run_twice(self, app):
+        generate(students=20, teachers=2, topics=2)
+        generate(students=20, teachers=2, topics=2)
+
+        assert Student.query.count() == 40
+        assert db.session.query(func.count(func.distinct(Student.index_number))).scalar() == 40
+        assert all(3 <= len(t.students) <= 5 for t in Topic.query)
@@ -3,8 +3,9 @@ from unittest.mock import patch, MagicMock
 from datetime import datetime
 from flask import Flask
 from app.routes.topics import topics_bp
-from app.models.topic import Topic, TopicStatus
-from app.models.teacher import Teacher
+from app.services.topic_cache import init_topic_cache
+from app.models.topic import TopicStatus
+from app.models.teacher import Teacher, Title
 from app.models.account import Account
 
 """
@@ -12,6 +13,7 @@ TESTED ENDPOINTS:
 
 1. GET /api/topics/pending - get_pending_topics()
    Success case: Returns list of pending topics with teacher info and student count
+   Without teacher: teacher fields are null when the topic has no supervisor
    Empty list: Returns empty array when no pending topics exist
    Exception handling: Returns 500 error when database query fails
    
@@ -26,40 +28,18 @@ class TestTopicsEndpoints(unittest.TestCase):
     def setUp(self):
         self.app = Flask(__name__)
         self.app.register_blueprint(topics_bp)
+        self.app.config.update(TOPIC_CACHE_SIZE=100, TOPIC_CACHE_TTL=30)
+        init_topic_cache(self.app)
         self.client = self.app.test_client()
         self.app.config['TESTING'] = True
     
-    @patch('app.routes.topics.Topic')
-    def test_get_pending_topics_success(self, mock_topic):
-        mock_account = MagicMock(spec=Account)
-        mock_account.full_name = "Dr. Jan Kowalski"
-        
-        mock_teacher = MagicMock(spec=Teacher)
-        mock_teacher.title.value = "dr"
-        mock_teacher.account = mock_account
-        
-        mock_topic1 = MagicMock(spec=Topic)
-        mock_topic1.id = 1
-        mock_topic1.title = "Machine Learning in Healthcare"
-        mock_topic1.description = "Research on ML applications"
-        mock_topic1.status.value = "OCZEKUJACY"
-        mock_topic1.topic_justification = "Important research area"
-        mock_topic1.creation_date = datetime(2024, 1, 15)
-        mock_topic1.teacher = mock_teacher
-        mock_topic1.students = []
-        
-        mock_topic2 = MagicMock(spec=Topic)
-        mock_topic2.id = 2
-        mock_topic2.title = "Blockchain Technology"
-        mock_topic2.description = "Decentralized systems"
-        mock_topic2.status.value = "OCZEKUJACY"
-        mock_topic2.topic_justification = "Emerging technology"
-        mock_topic2.creation_date = datetime(2024, 1, 20)
-        mock_topic2.teacher = mock_teacher
-        mock_topic2.students = [MagicMock(), MagicMock()]
-        
-        mock_topic.query.filter_by.return_value.all.return_value = [
-            mock_topic1, mock_topic2
+    @patch('app.routes.topics._pending_topic_rows')
+    def test_get_pending_topics_success(self, mock_rows):
+        mock_rows.return_value = [
+            (1, "Machine Learning in Healthcare", "Research on ML applications", TopicStatus.OCZEKUJACY,
+             "Important research area", datetime(2024, 1, 15), Title.dr, "Dr. Jan Kowalski", 0),
+            (2, "Blockchain Technology", "Decentralized systems", TopicStatus.OCZEKUJACY,
+             "Emerging technology", datetime(2024, 1, 20), Title.dr, "Dr. Jan Kowalski", 2),
         ]
         
 
@@ -73,6 +53,7 @@ class TestTopicsEndpoints(unittest.TestCase):
         
         self.assertEqual(data['topics'][0]['id'], 1)
         self.assertEqual(data['topics'][0]['title'], "Machine Learning in Healthcare")
+        self.assertEqual(data['topics'][0]['status'], "OCZEKUJACY")
         self.assertEqual(data['topics'][0]['teacher_title'], "dr")
         self.assertEqual(data['topics'][0]['teacher_full_name'], "Dr. Jan Kowalski")
         self.assertEqual(data['topics'][0]['student_count'], 0)
@@ -80,11 +61,24 @@ class TestTopicsEndpoints(unittest.TestCase):
         self.assertEqual(data['topics'][1]['id'], 2)
         self.assertEqual(data['topics'][1]['student_count'], 2)
         
-        mock_topic.query.filter_by.assert_called_once_with(status=TopicStatus.OCZEKUJACY)
+        mock_rows.assert_called_once_with()
     
-    @patch('app.routes.topics.Topic')
-    def test_get_pending_topics_empty_list(self, mock_topic):
-        mock_topic.query.filter_by.return_value.all.return_value = []
+    @patch('app.routes.topics._pending_topic_rows')
+    def test_get_pending_topics_without_teacher(self, mock_rows):
+        mock_rows.return_value = [
+            (3, "Orphan topic", None, TopicStatus.OCZEKUJACY, None, datetime(2024, 2, 1), None, None, 1),
+        ]
+        
+        response = self.client.get('/api/topics/pending')
+        
+        self.assertEqual(response.status_code, 200)
+        topic = response.get_json()['topics'][0]
+        self.assertIsNone(topic['teacher_title'])
+        self.assertIsNone(topic['teacher_full_name'])
+    
+    @patch('app.routes.topics._pending_topic_rows')
+    def test_get_pending_topics_empty_list(self, mock_rows):
+        mock_rows.return_value = []
         
         response = self.client.get('/api/topics/pending')
         
@@ -94,9 +88,9 @@ class TestTopicsEndpoints(unittest.TestCase):
         self.assertEqual(data['topics'], [])
     
     
-    @patch('app.routes.topics.Topic')
-    def test_get_pending_topics_exception(self, mock_topic):
-        mock_topic.query.filter_by.side_effect = Exception("Database connection error")
+    @patch('app.routes.topics._pending_topic_rows')
+    def test_get_pending_topics_exception(self, mock_rows):
+        mock_rows.side_effect = Exception("Database connection error")
         
         response = self.client.get('/api/topics/pending')
         
@@ -106,24 +100,17 @@ class TestTopicsEndpoints(unittest.TestCase):
         self.assertEqual(data['error'], 'Failed to fetch pending topics')
         self.assertIn('message', data)
     
+    @patch('app.routes.topics.topic_dicts')
     @patch('app.routes.topics.Topic')
-    def test_get_topics_without_filter(self, mock_topic):
-        mock_topic1 = MagicMock(spec=Topic)
-        mock_topic1.to_dict.return_value = {
-            'id': 1,
-            'title': 'Topic 1',
-            'status': 'OCZEKUJACY'
-        }
-        
-        mock_topic2 = MagicMock(spec=Topic)
-        mock_topic2.to_dict.return_value = {
-            'id': 2,
-            'title': 'Topic 2',
-            'status': 'ZATWIERDZONY'
-        }
-        
-        mock_topic.query.all.return_value = [mock_topic1, mock_topic2]
-        
+    def test_get_topics_without_filter(self, mock_topic, mock_topic_dicts):
+        mock_topic.query.with_entities.return_value.order_by.return_value.all.return_value = [
+            MagicMock(id=1, creation_date=datetime(2024, 1, 20)),
+            MagicMock(id=2, creation_date=datetime(2024, 1, 15)),
+        ]
+        mock_topic_dicts.return_value = [
+            {'id': 1, 'title': 'Topic 1', 'status': 'OCZEKUJACY'},
+            {'id': 2, 'title': 'Topic 2', 'status': 'ZATWIERDZONY'},
+        ]
         
         response = self.client.get('/api/topics')
         
@@ -132,17 +119,20 @@ class TestTopicsEndpoints(unittest.TestCase):
         self.assertEqual(len(data), 2)
         self.assertEqual(data[0]['id'], 1)
         self.assertEqual(data[1]['id'], 2)
+        mock_topic_dicts.assert_called_once_with([1, 2])
     
+    @patch('app.routes.topics.topic_dicts')
     @patch('app.routes.topics.Topic')
-    def test_get_topics_empty_list(self, mock_topic):
-        mock_topic.query.all.return_value = []
+    def test_get_topics_empty_list(self, mock_topic, mock_topic_dicts):
+        mock_topic.query.with_entities.return_value.order_by.return_value.all.return_value = []
+        mock_topic_dicts.return_value = []
         
         response = self.client.get('/api/topics')
         
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
         self.assertEqual(data, [])
-
+        mock_topic_dicts.assert_called_once_with([])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Tests for per-request SQL instrumentation.
+
+Run with: python -m pytest tests/test_instrumentation.py -v
+"""
+import json
+import logging
+import pytest
+from flask import jsonify, stream_with_context
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.services.instrumentation import statement_shape
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    @app.route('/test/n-plus-one')
+    def n_plus_one():
+        names = [db.session.get(Account, account_id, populate_existing=True).full_name for account_id in range(1, 13)]
+        return jsonify(names)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Account(full_name=f"Student {i}", login=f"s{i}", password="x", user_type=UserType.STUDENT)
+            for i in range(1, 13)
+        ])
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def server_timing(response):
+    return {
+        metric.split(';')[0]: metric
+        for metric in (part.strip() for part in response.headers['Server-Timing'].split(','))
+    }
+
+
+class TestInstrumentation:
+
+    def test_server_timing_counts_statements(self, client):
+        response = client.get('/api/users')
+
+        timing = server_timing(response)
+        # ETag markers and the account query
+        assert 'desc="2 queries"' in timing['db']
+        assert set(timing) == {'db', 'app', 'total'}
+        assert 'X-N-Plus-One' not in response.headers
+
+    def test_statement_shape_ignores_parameters(self):
+        assert statement_shape('SELECT * FROM t WHERE id IN (?, ?, ?)') == 'SELECT * FROM t WHERE id IN (?)'
+        assert statement_shape('SELECT *\n  FROM t WHERE id = %(id_1)s') == 'SELECT * FROM t WHERE id = ?'
+        assert statement_shape('SELECT * FROM t WHERE id = :id') == 'SELECT * FROM t WHERE id = ?'
+
+    def test_n_plus_one_is_logged(self, client, caplog):
+        with caplog.at_level(logging.WARNING, logger='app.slow_requests'):
+            response = client.get('/test/n-plus-one')
+
+        assert response.headers['X-N-Plus-One'] == '1'
+        entry = json.loads(caplog.records[-1].getMessage())
+        assert entry['event'] == 'n_plus_one'
+        assert entry['statements'] == 12
+        assert entry['repeated_statements'][0]['count'] == 12
+        assert 'FROM account' in entry['repeated_statements'][0]['statement']
+
+    def test_slow_request_is_logged(self, app, client, caplog):
+        app.config['SLOW_REQUEST_MS'] = 0
+        with caplog.at_level(logging.WARNING, logger='app.slow_requests'):
+            # Buffered, so the streamed body is read and the response closed like a server does
+            client.get('/api/users?page=1', buffered=True)
+
+        entry = json.loads(caplog.records[-1].getMessage())
+        assert entry['event'] == 'slow_request'
+        assert entry['path'] == '/api/users?page=1'
+        assert entry['endpoint'] == 'users.list_users'
+        assert entry['status'] == 200
+        assert entry['statements'] == 2
+
+    def test_request_without_queries(self, client):
+        timing = server_timing(client.get('/api/health'))
+        assert timing['db'].startswith('db;dur=0.00;')
+        assert 'desc="0 queries"' in timing['db']
+
+    def test_streamed_body_is_counted_until_closed(self, app, client, caplog):
+        @app.route('/test/streamed')
+        def streamed():
+            def body():
+                for account_id in range(1, 13):
+                    yield db.session.get(Account, account_id, populate_existing=True).full_name
+            return app.response_class(stream_with_context(body()))
+
+        with caplog.at_level(logging.WARNING, logger='app.slow_requests'):
+            response = client.get('/test/streamed')
+            assert 'desc="0 queries"' in server_timing(response)['db']
+            assert not caplog.records
+            response.get_data()
+            response.close()
+
+        entry = json.loads(caplog.records[-1].getMessage())
+        assert entry['event'] == 'n_plus_one'
+        assert entry['endpoint'] == 'streamed'
+        assert entry['statements'] == 12
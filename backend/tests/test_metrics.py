@@ -0,0 +1,88 @@
+"""
+Tests for the Prometheus metrics endpoint and the deep health check.
+
+Run with: python -m pytest tests/test_metrics.py -v
+"""
+import time
+import pytest
+from app import create_app, db
+from config import TestingConfig
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def metric_lines(client):
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    return response.get_data(as_text=True).splitlines()
+
+
+class TestMetrics:
+
+    def test_request_latency_histogram(self, client):
+        client.get('/api/topics')
+        client.get('/api/topics')
+        client.get('/api/topics/12345')
+
+        lines = metric_lines(client)
+        labels = 'blueprint="topics",route="/api/topics",method="GET"'
+        assert f'http_request_duration_seconds_count{{{labels}}} 2' in lines
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+        assert f'http_requests_total{{{labels},status="200"}} 2' in lines
+        assert ('http_requests_total{blueprint="topics",route="/api/topics/<int:id>",method="GET",status="404"} 1'
+                in lines)
+
+    def test_in_flight_counts_the_scrape(self, client):
+        assert 'http_requests_in_flight 1' in metric_lines(client)
+
+    def test_export_job_duration(self, app, client, tmp_path):
+        app.config['EXPORT_CACHE_DIR'] = str(tmp_path)
+        job_id = client.post('/api/export/students-by-topic/jobs', json={'format': 'csv'}).get_json()['id']
+        for _ in range(100):
+            if client.get(f'/api/export/jobs/{job_id}').get_json()['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.05)
+
+        assert 'export_job_duration_seconds_count{format="csv",status="done"} 1' in metric_lines(client)
+
+    def test_pool_metrics_with_queue_pool(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "pool.db"}')
+        app = create_app('testing')
+
+        lines = metric_lines(app.test_client())
+        assert 'db_pool_checked_out 0' in lines
+        assert any(line.startswith('db_pool_overflow ') for line in lines)
+
+
+class TestDeepHealth:
+
+    def test_shallow_health_does_not_touch_database(self, client):
+        data = client.get('/api/health').get_json()
+        assert data['status'] == 'healthy'
+        assert 'db_latency_ms' not in data
+
+    def test_deep_health_measures_database(self, client):
+        response = client.get('/api/health?deep=1')
+        assert response.status_code == 200
+        assert response.get_json()['db_latency_ms'] >= 0
+
+    def test_slow_database_is_degraded(self, app, client):
+        app.config['HEALTH_DB_MAX_LATENCY_MS'] = -1
+        response = client.get('/api/health?deep=1')
+        assert response.status_code == 503
+        assert response.get_json()['status'] == 'degraded'
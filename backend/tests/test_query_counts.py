@@ -0,0 +1,124 @@
+"""
+Query count tests for the topic listing endpoints.
+Checks that the number of SQL statements per request does not grow with the data.
+
+Run with: python -m pytest tests/test_query_counts.py -v
+"""
+import pytest
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.models.declaration import Declaration, Status
+from app.services.teacher_identity import get_teacher_identity_cache
+from tests.conftest import QueryCounter
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def seed_topics(count, offset=0, students_per_topic=4):
+    """Adds `count` topics, each with its own supervisor, declaration and full team."""
+    for i in range(offset, offset + count):
+        teacher_acc = Account(full_name=f"Prowadzący {i}", login=f"t{i}", password="x", user_type=UserType.TEACHER)
+        db.session.add(teacher_acc)
+        db.session.flush()
+        teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT)
+        declaration = Declaration(status=Status.ZLOZONA)
+        db.session.add_all([teacher, declaration])
+        db.session.flush()
+
+        topic = Topic(
+            title=f"Temat {i}",
+            status=TopicStatus.ZATWIERDZONY,
+            teacher_id=teacher.id,
+            teacher_declaration_id=declaration.id
+        )
+        db.session.add(topic)
+        db.session.flush()
+
+        for j in range(students_per_topic):
+            student_acc = Account(full_name=f"Student {i}-{j}", login=f"s{i}-{j}", password="x", user_type=UserType.STUDENT)
+            student_decl = Declaration(status=Status.ZLOZONA)
+            db.session.add_all([student_acc, student_decl])
+            db.session.flush()
+            db.session.add(Student(
+                account_id=student_acc.id,
+                index_number=f"{i:03d}{j:03d}",
+                topic_id=topic.id,
+                declaration_id=student_decl.id
+            ))
+    db.session.commit()
+
+
+def count_queries(client, url):
+    with QueryCounter(db.engine) as counter:
+        response = client.get(url)
+    assert response.status_code == 200
+    return counter.count, response.get_json()
+
+
+class TestTopicListingQueryCount:
+
+    def test_listing_query_count_is_constant(self, client, app):
+        seed_topics(5)
+        small_count, small_data = count_queries(client, '/api/topics')
+
+        seed_topics(45, offset=5)
+        large_count, large_data = count_queries(client, '/api/topics')
+
+        assert len(small_data) == 5
+        assert len(large_data) == 50
+        assert large_count == small_count
+        assert large_count <= 4
+
+    def test_listing_serializes_relations(self, client, app):
+        seed_topics(2)
+        _, data = count_queries(client, '/api/topics')
+
+        topic = next(t for t in data if t['title'] == 'Temat 0')
+        assert topic['supervisor']['fullName'] == 'Prowadzący 0'
+        assert topic['declaration']['status'] == 'ZLOZONA'
+        assert len(topic['team']) == 4
+        assert all(member['declaration'] for member in topic['team'])
+
+    def test_supervisor_filter_query_count_is_constant(self, client, app):
+        seed_topics(3)
+        with app.app_context():
+            account_id = Teacher.query.first().account_id
+        small_count, _ = count_queries(client, f'/api/topics?supervisor_id={account_id}')
+
+        seed_topics(30, offset=3)
+        with app.app_context():
+            # Measure the uncached path again, the teacher lookup is cached after the first request
+            get_teacher_identity_cache().invalidate_all()
+        large_count, _ = count_queries(client, f'/api/topics?supervisor_id={account_id}')
+
+        assert large_count == small_count
+
+    def test_single_topic_query_count_does_not_depend_on_team_size(self, client, app):
+        seed_topics(1, students_per_topic=2)
+        seed_topics(1, offset=1, students_per_topic=8)
+
+        with app.app_context():
+            small_id, large_id = [t.id for t in Topic.query.order_by(Topic.id).all()]
+
+        small_count, _ = count_queries(client, f'/api/topics/{small_id}')
+        large_count, data = count_queries(client, f'/api/topics/{large_id}')
+
+        assert len(data['team']) == 8
+        assert large_count == small_count
@@ -0,0 +1,160 @@
+"""
+Tests for read-replica routing, with two SQLite files standing in for the
+primary and the replica. Nothing replicates between them, so the tests can
+tell which database a request read from.
+
+Run with: python -m pytest tests/test_read_replica.py -v
+"""
+import time
+import pytest
+from sqlalchemy.orm import Session
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.services.database import READ_PRIMARY_COOKIE, READ_PRIMARY_HEADER
+from app.services.topic_cache import get_topic_cache
+from app.session import REPLICA_BIND_KEY
+from config import TestingConfig
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primary.db"}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_REPLICA_URI', f'sqlite:///{tmp_path / "replica.db"}')
+    app = create_app('testing')
+    app.config['EXPORT_CACHE_DIR'] = str(tmp_path / 'exports')
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND_KEY])
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(db.engines[REPLICA_BIND_KEY])
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_topic(title, engine=None, student=None):
+    """Adds a teacher with a topic to the primary, or with engine= directly to another database."""
+    session = db.session if engine is None else Session(bind=engine)
+    acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+    session.add(acc)
+    session.flush()
+    teacher = Teacher(account_id=acc.id, title=Title.dr, position=Position.ADIUNKT)
+    session.add(teacher)
+    session.flush()
+    topic = Topic(title=title, status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id)
+    session.add(topic)
+    if student:
+        session.flush()
+        student_acc = Account(full_name=student, login="student", password="x", user_type=UserType.STUDENT)
+        session.add(student_acc)
+        session.flush()
+        session.add(Student(account_id=student_acc.id, index_number="123456", topic_id=topic.id))
+    session.commit()
+    topic_id = topic.id
+    if engine is not None:
+        session.close()
+    return topic_id
+
+
+class TestReadReplica:
+
+    def test_get_requests_read_from_replica(self, app, client):
+        add_topic("Na primary")
+        add_topic("Na replice", engine=db.engines[REPLICA_BIND_KEY])
+
+        assert [t['title'] for t in client.get('/api/topics').get_json()] == ["Na replice"]
+        assert client.get('/api/topics/pending').get_json()['topics'][0]['title'] == "Na replice"
+        assert [u['name'] for u in client.get('/api/users').get_json()] == ["Jan Kowalski"]
+
+    def test_streamed_user_listing_reads_from_replica(self, app, client):
+        add_topic("Temat")
+        replica = Session(bind=db.engines[REPLICA_BIND_KEY])
+        replica.add(Account(full_name="Anna Replika", login="a.replika", password="x", user_type=UserType.STUDENT))
+        replica.commit()
+        replica.close()
+
+        # Without a limit the listing is streamed
+        assert [u['name'] for u in client.get('/api/users').get_json()] == ["Anna Replika"]
+        assert [u['name'] for u in client.get('/api/users?limit=10').get_json()] == ["Anna Replika"]
+
+    def test_writes_go_to_primary(self, app, client):
+        topic_id = add_topic("Temat")
+        add_topic("Temat", engine=db.engines[REPLICA_BIND_KEY])
+
+        response = client.patch(f'/api/topics/{topic_id}/approve')
+
+        assert response.status_code == 200
+        assert response.get_json()['topic']['status'] == 'ZATWIERDZONY'
+        db.session.expire_all()
+        assert db.session.get(Topic, topic_id).status == TopicStatus.ZATWIERDZONY
+
+    def test_read_your_writes_window(self, app, client):
+        topic_id = add_topic("Temat")
+        add_topic("Temat", engine=db.engines[REPLICA_BIND_KEY])
+        client.patch(f'/api/topics/{topic_id}/approve')
+
+        # The writer sees its change, another client still reads the lagging replica
+        assert client.get('/api/topics/pending').get_json()['count'] == 0
+        assert app.test_client().get('/api/topics/pending').get_json()['count'] == 1
+
+        client.set_cookie(READ_PRIMARY_COOKIE, f'{time.time() - 1:.3f}')
+        assert client.get('/api/topics/pending').get_json()['count'] == 1
+
+    def test_read_your_writes_window_without_cookies(self, app, client):
+        topic_id = add_topic("Temat")
+        add_topic("Temat", engine=db.engines[REPLICA_BIND_KEY])
+        until = client.patch(f'/api/topics/{topic_id}/approve').headers[READ_PRIMARY_HEADER]
+
+        # A cross-origin client sends no cookies, it echoes the header back
+        other = app.test_client(use_cookies=False)
+        assert other.get('/api/topics/pending', headers={READ_PRIMARY_HEADER: until}).get_json()['count'] == 0
+        assert other.get('/api/topics/pending').get_json()['count'] == 1
+        expired = {READ_PRIMARY_HEADER: f'{time.time() - 1:.3f}'}
+        assert other.get('/api/topics/pending', headers=expired).get_json()['count'] == 1
+
+    def test_replica_reads_are_not_cached(self, app, client):
+        add_topic("Temat", engine=db.engines[REPLICA_BIND_KEY])
+        client.get('/api/topics')
+        assert len(get_topic_cache()) == 0
+
+    def test_export_job_reads_from_replica(self, app, client):
+        add_topic("Temat z primary", student="Anna Nowak")
+        add_topic("Temat z repliki", engine=db.engines[REPLICA_BIND_KEY], student="Anna Nowak")
+
+        job_id = client.post('/api/export/students-by-topic/jobs', json={'format': 'csv'}).get_json()['id']
+        for _ in range(100):
+            if client.get(f'/api/export/jobs/{job_id}').get_json()['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.05)
+
+        csv = client.get(f'/api/export/jobs/{job_id}/file').get_data(as_text=True)
+        assert "Temat z repliki" in csv
+        assert "Temat z primary" not in csv
+
+    def test_health_uses_primary(self, client):
+        assert client.get('/api/health?deep=1').status_code == 200
+
+
+class TestWithoutReplica:
+
+    def test_reads_fall_back_to_primary(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primary.db"}')
+        app = create_app('testing')
+        with app.app_context():
+            db.create_all()
+            add_topic("Temat")
+            assert REPLICA_BIND_KEY not in db.engines
+
+        client = app.test_client()
+        assert [t['title'] for t in client.get('/api/topics').get_json()] == ["Temat"]
+        response = client.patch('/api/topics/1/approve')
+        assert READ_PRIMARY_COOKIE not in response.headers.get('Set-Cookie', '')
+        assert READ_PRIMARY_HEADER not in response.headers
@@ -0,0 +1,117 @@
+"""
+Tests for the cached teacher lookup by account id.
+
+Run with: python -m pytest tests/test_teacher_identity.py -v
+"""
+import time
+import pytest
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.services.teacher_identity import TeacherIdentityCache, get_teacher_identity_cache, teacher_identity
+from tests.conftest import recorded_statements
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        teacher_acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+        student_acc = Account(full_name="Anna Nowak", login="a.nowak", password="x", user_type=UserType.STUDENT)
+        db.session.add_all([teacher_acc, student_acc])
+        db.session.flush()
+        teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT)
+        db.session.add(teacher)
+        db.session.commit()
+        return {
+            'teacher_id': teacher.id,
+            'teacher_account_id': teacher_acc.id,
+            'student_account_id': student_acc.id
+        }
+
+
+class TestTeacherIdentity:
+
+    def test_lookup_is_cached(self, client, setup_test_data):
+        url = f"/api/topics/supervisor/me?supervisor_id={setup_test_data['teacher_account_id']}"
+        first = client.get(url).get_json()
+        statements, response = recorded_statements(lambda: client.get(url))
+
+        assert statements == []
+        assert response.get_json() == first
+        assert first['id'] == setup_test_data['teacher_id']
+        assert first['fullName'] == "Jan Kowalski"
+        assert first['title'] == 'dr'
+        assert first['position'] == 'ADIUNKT'
+
+    def test_unknown_or_non_teacher_account(self, client, setup_test_data):
+        assert client.get(f"/api/topics/supervisor/me?supervisor_id={setup_test_data['student_account_id']}").status_code == 404
+        assert client.get('/api/topics/supervisor/me?supervisor_id=abc').status_code == 404
+        assert client.get('/api/topics/supervisor/me').status_code == 404
+
+    def test_create_topic_without_lazy_loads(self, client, setup_test_data):
+        account_id = setup_test_data['teacher_account_id']
+        client.get(f'/api/topics/supervisor/me?supervisor_id={account_id}')
+
+        statements, response = recorded_statements(lambda: client.post('/api/topics', json={
+            'supervisor_id': account_id,
+            'title': "Nowy temat",
+            'description': "Opis",
+            'topicJustification': "Uzasadnienie"
+        }))
+
+        assert response.status_code == 201
+        assert not [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+        created = response.get_json()
+        assert created['supervisor']['fullName'] == "Jan Kowalski"
+        assert created['team'] == []
+        assert created == client.get(f"/api/topics/{created['id']}").get_json()
+
+    def test_account_rename_invalidates(self, client, app, setup_test_data):
+        account_id = setup_test_data['teacher_account_id']
+        client.get(f'/api/topics/supervisor/me?supervisor_id={account_id}')
+
+        with app.app_context():
+            db.session.get(Account, account_id).full_name = "Jan Nowak"
+            db.session.commit()
+
+        assert client.get(f'/api/topics/supervisor/me?supervisor_id={account_id}').get_json()['fullName'] == "Jan Nowak"
+
+    def test_teacher_change_invalidates(self, client, app, setup_test_data):
+        account_id = setup_test_data['teacher_account_id']
+        client.get(f'/api/topics/supervisor/me?supervisor_id={account_id}')
+
+        with app.app_context():
+            db.session.get(Teacher, setup_test_data['teacher_id']).title = Title.dr_hab
+            db.session.commit()
+
+        assert client.get(f'/api/topics/supervisor/me?supervisor_id={account_id}').get_json()['title'] == 'dr hab'
+
+    def test_bulk_update_clears_cache(self, app, setup_test_data):
+        with app.app_context():
+            teacher_identity(setup_test_data['teacher_account_id'])
+            Teacher.query.update({Teacher.position: Position.ASYSTENT}, synchronize_session=False)
+            db.session.commit()
+            assert len(get_teacher_identity_cache()) == 0
+            assert teacher_identity(setup_test_data['teacher_account_id']).position == Position.ASYSTENT
+
+    def test_entries_expire_after_ttl(self):
+        cache = TeacherIdentityCache(ttl=0.01)
+        cache.put(1, cache.version(1), 'identity')
+        time.sleep(0.02)
+        assert cache.get(1) is None
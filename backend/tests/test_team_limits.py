@@ -0,0 +1,216 @@
+"""
+Tests for the supervisor team limits and the per-teacher active topic counter.
+
+Run with: python -m pytest tests/test_team_limits.py -v
+"""
+import pytest
+from config import TestingConfig
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.topic import Topic, TopicStatus
+from app.services.auth_tokens import Principal, issue_token
+from app.services.team_limits import recount_loads
+from tests.conftest import run_concurrently
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # A file database, so concurrent requests get connections of their own
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'limits.db'}")
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        accounts = [
+            Account(full_name="Anna Asystent", login="a.asystent", password="x", user_type=UserType.TEACHER),
+            Account(full_name="Jan Adiunkt", login="j.adiunkt", password="x", user_type=UserType.TEACHER),
+        ]
+        db.session.add_all(accounts)
+        db.session.flush()
+        assistant = Teacher(account_id=accounts[0].id, title=Title.mgr, position=Position.ASYSTENT)
+        adjunct = Teacher(account_id=accounts[1].id, title=Title.dr, position=Position.ADIUNKT)
+        db.session.add_all([assistant, adjunct])
+        db.session.commit()
+        return {
+            'assistant_account_id': accounts[0].id,
+            'assistant_id': assistant.id,
+            'adjunct_account_id': accounts[1].id,
+            'adjunct_id': adjunct.id
+        }
+
+
+def coordinator_headers():
+    token, _ = issue_token(Principal(1000, UserType.COORDINATOR, None, None))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def add_topics(teacher_id, *statuses):
+    """Topics inserted around the API, with the counter recomputed afterwards."""
+    topics = [Topic(title=f"Temat {i}", status=status, teacher_id=teacher_id) for i, status in enumerate(statuses)]
+    db.session.add_all(topics)
+    db.session.flush()
+    recount_loads()
+    db.session.commit()
+    return [t.id for t in topics]
+
+
+def load(teacher_id):
+    db.session.expire_all()
+    return db.session.get(Teacher, teacher_id).active_topic_count
+
+
+def create(client, account_id, title="Nowy temat"):
+    return client.post('/api/topics', json={'supervisor_id': account_id, 'title': title})
+
+
+class TestTeamLimits:
+
+    def test_create_up_to_the_limit(self, app, client, setup_test_data):
+        assert create(client, setup_test_data['assistant_account_id']).status_code == 201
+        response = create(client, setup_test_data['assistant_account_id'])
+
+        assert response.status_code == 409
+        assert response.get_json()['teacherIds'] == [setup_test_data['assistant_id']]
+        with app.app_context():
+            assert load(setup_test_data['assistant_id']) == 1
+            assert Topic.query.count() == 1
+
+    def test_rejection_frees_a_slot(self, app, client, setup_test_data):
+        topic_id = create(client, setup_test_data['assistant_account_id']).get_json()['id']
+        client.patch(f'/api/topics/{topic_id}/reject', json={'rejection_reason': 'Nie'})
+
+        with app.app_context():
+            assert load(setup_test_data['assistant_id']) == 0
+        assert create(client, setup_test_data['assistant_account_id']).status_code == 201
+
+    def test_approving_a_rejected_topic_needs_a_slot(self, app, client, setup_test_data):
+        with app.app_context():
+            rejected, pending = add_topics(setup_test_data['assistant_id'], TopicStatus.ODRZUCONY, TopicStatus.OCZEKUJACY)
+
+        assert client.patch(f'/api/topics/{rejected}/approve').status_code == 409
+        # A pending topic already holds its slot
+        assert client.patch(f'/api/topics/{pending}/approve').status_code == 200
+        client.patch(f'/api/topics/{pending}/reject', json={'rejection_reason': 'Nie'})
+        assert client.patch(f'/api/topics/{rejected}/approve').status_code == 200
+
+        with app.app_context():
+            assert load(setup_test_data['assistant_id']) == 1
+            assert db.session.get(Topic, rejected).status == TopicStatus.ZATWIERDZONY
+
+    def test_bulk_approve_is_all_or_nothing(self, app, client, setup_test_data):
+        with app.app_context():
+            topic_ids = add_topics(setup_test_data['adjunct_id'], TopicStatus.ZATWIERDZONY,
+                                   TopicStatus.ODRZUCONY, TopicStatus.ODRZUCONY)
+
+        response = client.patch('/api/topics/approve-bulk', json={'topic_ids': topic_ids})
+
+        assert response.status_code == 409
+        with app.app_context():
+            assert load(setup_test_data['adjunct_id']) == 1
+            assert [db.session.get(Topic, i).status for i in topic_ids] == [
+                TopicStatus.ZATWIERDZONY, TopicStatus.ODRZUCONY, TopicStatus.ODRZUCONY
+            ]
+
+        assert client.patch('/api/topics/approve-bulk', json={'topic_ids': topic_ids[:2]}).status_code == 200
+        with app.app_context():
+            assert load(setup_test_data['adjunct_id']) == 2
+
+    def test_bulk_reject_releases(self, app, client, setup_test_data):
+        with app.app_context():
+            topic_ids = add_topics(setup_test_data['adjunct_id'], TopicStatus.ZATWIERDZONY, TopicStatus.OCZEKUJACY)
+
+        client.patch('/api/topics/reject-bulk', json={'topic_ids': topic_ids, 'rejection_reason': 'Nie'})
+
+        with app.app_context():
+            assert load(setup_test_data['adjunct_id']) == 0
+
+    def test_teacher_declaration_respects_limit(self, app, client, setup_test_data):
+        with app.app_context():
+            pending, rejected = add_topics(setup_test_data['assistant_id'], TopicStatus.OCZEKUJACY, TopicStatus.ODRZUCONY)
+        account_id = setup_test_data['assistant_account_id']
+
+        assert client.post(f'/api/topics/{rejected}/declare', json={'user_id': account_id}).status_code == 409
+        assert client.post(f'/api/topics/{pending}/declare', json={'user_id': account_id}).status_code == 200
+
+        with app.app_context():
+            headers = coordinator_headers()
+        results = client.post('/api/topics/declarations:batch', headers=headers, json={'items': [
+            {'user_id': account_id, 'topic_id': rejected}
+        ]}).get_json()['results']
+        assert results[0]['status'] == 'error'
+        assert results[0]['error'] == 'Teacher has reached the team limit'
+        with app.app_context():
+            assert load(setup_test_data['assistant_id']) == 1
+            assert db.session.get(Topic, rejected).teacher_declaration_id is None
+
+    def test_recount(self, app, setup_test_data):
+        with app.app_context():
+            add_topics(setup_test_data['adjunct_id'], TopicStatus.ZATWIERDZONY, TopicStatus.ODRZUCONY,
+                       TopicStatus.OCZEKUJACY)
+            assert load(setup_test_data['adjunct_id']) == 2
+            assert load(setup_test_data['assistant_id']) == 0
+
+
+class TestConcurrentSubmissions:
+
+    def test_concurrent_creates_stop_at_the_limit(self, app, client, setup_test_data):
+        account_id = setup_test_data['adjunct_account_id']
+        # Warm the teacher identity cache, so the requests only write
+        client.get(f'/api/topics/supervisor/me?supervisor_id={account_id}')
+
+        statuses = run_concurrently(app, [
+            lambda c, i=i: create(c, account_id, f"Temat {i}") for i in range(30)
+        ])
+
+        assert statuses == [201] * 2 + [409] * 28
+        with app.app_context():
+            assert load(setup_test_data['adjunct_id']) == 2
+            assert Topic.query.filter_by(teacher_id=setup_test_data['adjunct_id']).count() == 2
+
+    def test_concurrent_approvals_stop_at_the_limit(self, app, setup_test_data):
+        with app.app_context():
+            topic_ids = add_topics(setup_test_data['adjunct_id'], *[TopicStatus.ODRZUCONY] * 10)
+
+        statuses = run_concurrently(app, [
+            lambda c, i=i: c.patch(f'/api/topics/{i}/approve') for i in topic_ids
+        ])
+
+        assert statuses == [200] * 2 + [409] * 8
+        with app.app_context():
+            approved = Topic.query.filter_by(status=TopicStatus.ZATWIERDZONY).count()
+            assert approved == load(setup_test_data['adjunct_id']) == 2
+
+    def test_declarations_racing_rejections_keep_the_counter(self, app, setup_test_data):
+        account_id = setup_test_data['adjunct_account_id']
+        with app.app_context():
+            topic_ids = add_topics(setup_test_data['adjunct_id'], TopicStatus.OCZEKUJACY, TopicStatus.OCZEKUJACY)
+            headers = coordinator_headers()
+
+        requests = []
+        for topic_id in topic_ids:
+            requests += [
+                lambda c, t=topic_id: c.patch(f'/api/topics/{t}/reject', json={'rejection_reason': 'Nie'}),
+                lambda c, t=topic_id: c.post(f'/api/topics/{t}/declare', json={'user_id': account_id}),
+                lambda c, t=topic_id: c.post('/api/topics/declarations:batch', headers=headers, json={'items': [
+                    {'user_id': account_id, 'topic_id': t}
+                ]}),
+            ] * 4
+        run_concurrently(app, requests)
+
+        with app.app_context():
+            active = Topic.query.filter(Topic.status.in_([TopicStatus.OCZEKUJACY, TopicStatus.ZATWIERDZONY])).count()
+            assert load(setup_test_data['adjunct_id']) == active
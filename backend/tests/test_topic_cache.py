@@ -0,0 +1,152 @@
+"""
+Tests for the cached Topic serialization and its invalidation on writes.
+
+Run with: python -m pytest tests/test_topic_cache.py -v
+"""
+import time
+import pytest
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
+from app.models.topic import Topic, TopicStatus
+from app.services.topic_cache import TopicCache, get_topic_cache
+from tests.conftest import count_statements
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        teacher_acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+        student_acc = Account(full_name="Anna Nowak", login="a.nowak", password="x", user_type=UserType.STUDENT)
+        db.session.add_all([teacher_acc, student_acc])
+        db.session.flush()
+        teacher = Teacher(account_id=teacher_acc.id, title=Title.dr, position=Position.ADIUNKT)
+        db.session.add(teacher)
+        db.session.flush()
+        first = Topic(title="Temat A", status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id)
+        second = Topic(title="Temat B", status=TopicStatus.OCZEKUJACY, teacher_id=teacher.id)
+        db.session.add_all([first, second])
+        db.session.flush()
+        student = Student(account_id=student_acc.id, index_number="123456", topic_id=first.id)
+        db.session.add(student)
+        db.session.commit()
+        return {
+            'first_id': first.id,
+            'second_id': second.id,
+            'student_id': student.id,
+            'student_account_id': student_acc.id
+        }
+
+
+class TestTopicCacheUnit:
+
+    def test_lru_eviction(self):
+        cache = TopicCache(max_size=2)
+        for topic_id in (1, 2):
+            cache.put(topic_id, cache.version(topic_id), {'id': topic_id})
+        cache.get(1)
+        cache.put(3, cache.version(3), {'id': 3})
+
+        assert cache.get(2) is None
+        assert cache.get(1) == {'id': 1}
+        assert cache.get(3) == {'id': 3}
+
+    def test_put_with_outdated_version_is_ignored(self):
+        cache = TopicCache()
+        version = cache.version(1)
+        cache.invalidate([1])
+        cache.put(1, version, {'id': 1})
+        assert cache.get(1) is None
+
+        version = cache.version(1)
+        cache.invalidate_all()
+        cache.put(1, version, {'id': 1})
+        assert cache.get(1) is None
+
+    def test_entries_expire_after_ttl(self):
+        cache = TopicCache(ttl=0.01)
+        cache.put(1, cache.version(1), {'id': 1})
+        time.sleep(0.02)
+        assert cache.get(1) is None
+
+
+class TestTopicCacheInvalidation:
+
+    def test_second_listing_is_served_from_cache(self, client, setup_test_data):
+        first_count, first = count_statements(lambda: client.get('/api/topics').get_json())
+        second_count, second = count_statements(lambda: client.get('/api/topics').get_json())
+
+        assert first == second
+        # ETag markers and the page query
+        assert second_count == 2
+        assert first_count > second_count
+
+    def test_single_topic_served_without_queries(self, client, setup_test_data):
+        topic_id = setup_test_data['first_id']
+        client.get(f'/api/topics/{topic_id}')
+        count, response = count_statements(lambda: client.get(f'/api/topics/{topic_id}'))
+
+        assert response.status_code == 200
+        assert count == 0
+
+    def test_reject_invalidates_cached_topic(self, client, setup_test_data):
+        topic_id = setup_test_data['first_id']
+        client.get(f'/api/topics/{topic_id}')
+
+        response = client.patch(f'/api/topics/{topic_id}/reject', json={'rejection_reason': 'Powód'})
+        assert response.get_json()['topic']['status'] == 'ODRZUCONY'
+
+        data = client.get(f'/api/topics/{topic_id}').get_json()
+        assert data['status'] == 'ODRZUCONY'
+        assert data['rejectionReason'] == 'Powód'
+
+    def test_student_move_invalidates_both_topics(self, client, app, setup_test_data):
+        client.get('/api/topics')
+
+        with app.app_context():
+            student = db.session.get(Student, setup_test_data['student_id'])
+            student.topic_id = setup_test_data['second_id']
+            db.session.commit()
+
+        teams = {t['id']: t['team'] for t in client.get('/api/topics').get_json()}
+        assert teams[setup_test_data['first_id']] == []
+        assert [s['studentIndex'] for s in teams[setup_test_data['second_id']]] == ['123456']
+
+    def test_account_rename_invalidates_team_members(self, client, app, setup_test_data):
+        topic_id = setup_test_data['first_id']
+        client.get(f'/api/topics/{topic_id}')
+
+        with app.app_context():
+            db.session.get(Account, setup_test_data['student_account_id']).full_name = "Anna Kowalska"
+            db.session.commit()
+
+        data = client.get(f'/api/topics/{topic_id}').get_json()
+        assert data['team'][0]['fullName'] == "Anna Kowalska"
+
+    def test_bulk_update_clears_cache(self, client, app, setup_test_data):
+        client.get('/api/topics')
+
+        with app.app_context():
+            Topic.query.update({Topic.status: TopicStatus.ZATWIERDZONY}, synchronize_session=False)
+            db.session.commit()
+            assert len(get_topic_cache()) == 0
+
+        statuses = {t['status'] for t in client.get('/api/topics').get_json()}
+        assert statuses == {'ZATWIERDZONY'}
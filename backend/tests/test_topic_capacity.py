@@ -0,0 +1,249 @@
+"""
+Tests for topic team capacity and the student join / leave endpoints.
+
+Run with: python -m pytest tests/test_topic_capacity.py -v
+"""
+import pytest
+from config import TestingConfig
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.student import Student
+from app.models.teacher import Teacher, Title, Position
+from app.models.topic import Topic
+from app.services.auth_tokens import Principal, issue_token
+from app.services.enrollment import recount_members
+from tests.conftest import run_concurrently
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # A file database, so concurrent requests get connections of their own
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'capacity.db'}")
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_students(count, first=0):
+    accounts = [Account(full_name=f"Student {i}", login=f"s{i}", password="x", user_type=UserType.STUDENT)
+                for i in range(first, first + count)]
+    db.session.add_all(accounts)
+    db.session.flush()
+    students = [Student(account_id=a.id, index_number=f"{100000 + first + i}") for i, a in enumerate(accounts)]
+    db.session.add_all(students)
+    db.session.flush()
+    return [(a.id, s.id) for a, s in zip(accounts, students)]
+
+
+@pytest.fixture
+def setup_test_data(app):
+    with app.app_context():
+        account = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+        db.session.add(account)
+        db.session.flush()
+        teacher = Teacher(account_id=account.id, title=Title.dr, position=Position.ADIUNKT)
+        db.session.add(teacher)
+        db.session.flush()
+        topics = [
+            Topic(title="Otwarty", is_open=True, teacher_id=teacher.id),
+            Topic(title="Zamknięty", is_open=False, teacher_id=teacher.id),
+            Topic(title="Duży", is_open=True, is_standard=False, max_members=5, teacher_id=teacher.id),
+        ]
+        db.session.add_all(topics)
+        students = add_students(6)
+        db.session.commit()
+        return {
+            'teacher_account_id': account.id,
+            'open_id': topics[0].id,
+            'closed_id': topics[1].id,
+            'large_id': topics[2].id,
+            'students': students
+        }
+
+
+def student_headers(account_id, student_id):
+    token, _ = issue_token(Principal(account_id, UserType.STUDENT, None, student_id))
+    return {'Authorization': f'Bearer {token}'}
+
+
+def join(client, topic_id, account_id):
+    return client.post(f'/api/topics/{topic_id}/join', json={'user_id': account_id})
+
+
+def leave(client, topic_id, account_id):
+    return client.post(f'/api/topics/{topic_id}/leave', json={'user_id': account_id})
+
+
+def team(topic_id):
+    """(member_count, students of the topic) from the database."""
+    db.session.expire_all()
+    topic = db.session.get(Topic, topic_id)
+    return topic.member_count, Student.query.filter_by(topic_id=topic_id).count()
+
+
+class TestCapacityColumns:
+
+    def test_to_dict_uses_columns(self, app, client, setup_test_data):
+        data = client.get(f"/api/topics/{setup_test_data['large_id']}").get_json()
+        assert data['isStandard'] is False
+        assert data['maxMembers'] == 5
+
+        data = client.get(f"/api/topics/{setup_test_data['open_id']}").get_json()
+        assert data['isStandard'] is True
+        assert data['maxMembers'] == 4
+
+    def test_create_topic_with_team_size(self, client, setup_test_data):
+        def create(**fields):
+            return client.post('/api/topics', json={
+                'supervisor_id': setup_test_data['teacher_account_id'], 'title': "Temat", **fields
+            })
+
+        response = create(isStandard=False, maxMembers=6, topicJustification="Duży zespół")
+        assert response.status_code == 201
+        assert response.get_json()['maxMembers'] == 6
+        assert response.get_json()['isStandard'] is False
+
+        for size in (0, 11, '4', True):
+            assert create(maxMembers=size).status_code == 400
+        for standard in ('false', '0', 1, None):
+            assert create(isStandard=standard, maxMembers=4).status_code == 400
+        # The flag has to match the size, and other sizes need a justification
+        assert create(isStandard=True, maxMembers=6, topicJustification="Duży zespół").status_code == 400
+        assert create(isStandard=False, maxMembers=4, topicJustification="Duży zespół").status_code == 400
+        assert create(maxMembers=6).status_code == 400
+        assert create(maxMembers=6, topicJustification="  ").status_code == 400
+
+    def test_recount(self, app, setup_test_data):
+        with app.app_context():
+            for _, student_id in setup_test_data['students'][:2]:
+                db.session.get(Student, student_id).topic_id = setup_test_data['closed_id']
+            db.session.flush()
+            recount_members()
+            db.session.commit()
+            assert team(setup_test_data['closed_id']) == (2, 2)
+            assert team(setup_test_data['open_id']) == (0, 0)
+
+
+class TestJoinLeave:
+
+    def test_join_and_leave(self, app, client, setup_test_data):
+        topic_id = setup_test_data['open_id']
+        account_id, student_id = setup_test_data['students'][0]
+        # Cached before the join, the cached team must follow
+        assert client.get(f'/api/topics/{topic_id}').get_json()['team'] == []
+
+        response = join(client, topic_id, account_id)
+        assert response.status_code == 200
+        assert [s['id'] for s in response.get_json()['topic']['team']] == [student_id]
+        assert join(client, topic_id, account_id).status_code == 409
+
+        response = leave(client, topic_id, account_id)
+        assert response.status_code == 200
+        assert response.get_json()['topic']['team'] == []
+        assert leave(client, topic_id, account_id).status_code == 409
+        with app.app_context():
+            assert team(topic_id) == (0, 0)
+
+    def test_join_with_token(self, app, client, setup_test_data):
+        account_id, student_id = setup_test_data['students'][0]
+        with app.app_context():
+            headers = student_headers(account_id, student_id)
+
+        response = client.post(f"/api/topics/{setup_test_data['open_id']}/join", headers=headers)
+
+        assert response.status_code == 200
+        with app.app_context():
+            assert db.session.get(Student, student_id).topic_id == setup_test_data['open_id']
+
+    def test_full_topic(self, app, client, setup_test_data):
+        topic_id = setup_test_data['open_id']
+        students = setup_test_data['students']
+
+        assert [join(client, topic_id, a).status_code for a, _ in students[:4]] == [200] * 4
+        response = join(client, topic_id, students[4][0])
+        assert response.status_code == 409
+        assert response.get_json()['error'] == 'Topic is full'
+
+        # Leaving frees the place
+        leave(client, topic_id, students[0][0])
+        assert join(client, topic_id, students[4][0]).status_code == 200
+        with app.app_context():
+            assert team(topic_id) == (4, 4)
+
+    def test_refused_joins(self, app, client, setup_test_data):
+        account_id, student_id = setup_test_data['students'][0]
+
+        response = join(client, setup_test_data['closed_id'], account_id)
+        assert response.status_code == 409
+        assert response.get_json()['error'] == 'Topic is not open'
+        assert join(client, 9999, account_id).status_code == 404
+        assert join(client, setup_test_data['open_id'], setup_test_data['teacher_account_id']).status_code == 403
+
+        assert join(client, setup_test_data['open_id'], account_id).status_code == 200
+        response = join(client, setup_test_data['large_id'], account_id)
+        assert response.get_json()['error'] == 'Student is already a member of another topic'
+        with app.app_context():
+            assert team(setup_test_data['large_id']) == (0, 0)
+            assert team(setup_test_data['open_id']) == (1, 1)
+
+    def test_rejected_topic_is_closed(self, app, client, setup_test_data):
+        topic_id = setup_test_data['open_id']
+        client.patch(f'/api/topics/{topic_id}/reject', json={'rejection_reason': 'Nie'})
+
+        assert join(client, topic_id, setup_test_data['students'][0][0]).status_code == 409
+
+
+class TestConcurrentJoins:
+
+    def test_hundreds_of_joins_never_overfill(self, app, setup_test_data):
+        topic_id = setup_test_data['open_id']
+        with app.app_context():
+            headers = [student_headers(a, s) for a, s in add_students(200, first=100)]
+            db.session.commit()
+
+        statuses = run_concurrently(app, [
+            lambda c, h=h: c.post(f'/api/topics/{topic_id}/join', headers=h) for h in headers
+        ])
+
+        assert statuses == [200] * 4 + [409] * 196
+        with app.app_context():
+            assert team(topic_id) == (4, 4)
+
+    def test_same_student_joins_many_topics(self, app, setup_test_data):
+        account_id, student_id = setup_test_data['students'][0]
+        topic_ids = [setup_test_data['open_id'], setup_test_data['large_id']] * 10
+
+        statuses = run_concurrently(app, [lambda c, t=t: join(c, t, account_id) for t in topic_ids])
+
+        assert statuses == [200] + [409] * 19
+        with app.app_context():
+            assert sorted([team(setup_test_data['open_id']), team(setup_test_data['large_id'])]) == [(0, 0), (1, 1)]
+
+    def test_joins_and_leaves(self, app, client, setup_test_data):
+        topic_id = setup_test_data['large_id']
+        members = setup_test_data['students'][:5]
+        for account_id, _ in members:
+            join(client, topic_id, account_id)
+        with app.app_context():
+            newcomers = add_students(50, first=100)
+            db.session.commit()
+
+        statuses = run_concurrently(app, [
+            lambda c, a=a: leave(c, topic_id, a) for a, _ in members[:2]
+        ] + [
+            lambda c, a=a: join(c, topic_id, a) for a, _ in newcomers
+        ])
+
+        assert statuses.count(200) <= 4
+        with app.app_context():
+            count, students = team(topic_id)
+            assert count == students <= 5
@@ -0,0 +1,117 @@
+"""
+Tests for the full-text topic search (FTS5 on SQLite).
+
+Run with: python -m pytest tests/test_topic_search.py -v
+"""
+import pytest
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.teacher import Teacher, Title, Position
+from app.models.topic import Topic, TopicStatus
+from app.services.topic_search import search_terms
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def topics(app):
+    with app.app_context():
+        acc = Account(full_name="Jan Kowalski", login="j.kowalski", password="x", user_type=UserType.TEACHER)
+        db.session.add(acc)
+        db.session.flush()
+        teacher = Teacher(account_id=acc.id, title=Title.dr, position=Position.ADIUNKT)
+        db.session.add(teacher)
+        db.session.flush()
+        rows = [
+            Topic(title="System rekomendacji filmów", description="Aplikacja webowa polecająca filmy.",
+                  status=TopicStatus.ZATWIERDZONY, is_open=True, teacher_id=teacher.id),
+            Topic(title="Aplikacja mobilna", description="Moduł rekomendacji dla sklepu internetowego.",
+                  status=TopicStatus.OCZEKUJACY, is_open=False, teacher_id=teacher.id),
+            Topic(title="Analiza danych", description="Przetwarzanie <b>dużych</b> zbiorów danych.",
+                  topic_justification="Rozwój kompetencji w zakresie uczenia maszynowego.",
+                  status=TopicStatus.OCZEKUJACY, is_open=True, teacher_id=teacher.id),
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [t.id for t in rows]
+
+
+def search(client, query_string):
+    response = client.get(f'/api/topics/search?{query_string}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+class TestTopicSearch:
+
+    def test_title_matches_rank_first(self, client, topics):
+        data = search(client, 'q=rekomendacji')
+
+        assert [r['id'] for r in data['results']] == [topics[0], topics[1]]
+        assert data['results'][0]['rank'] > data['results'][1]['rank']
+        assert data['results'][0]['title'] == "System rekomendacji filmów"
+        assert data['results'][0]['supervisor']['fullName'] == "Jan Kowalski"
+        assert data['nextOffset'] is None
+
+    def test_prefix_and_diacritics(self, client, topics):
+        assert [r['id'] for r in search(client, 'q=rekom')['results']] == [topics[0], topics[1]]
+        # Polish characters are folded, "duzych" finds "dużych"
+        assert [r['id'] for r in search(client, 'q=duzych')['results']] == [topics[2]]
+
+    def test_justification_is_searched(self, client, topics):
+        assert [r['id'] for r in search(client, 'q=maszynowego')['results']] == [topics[2]]
+
+    def test_all_words_must_match(self, client, topics):
+        assert [r['id'] for r in search(client, 'q=aplikacja+sklepu')['results']] == [topics[1]]
+
+    def test_snippet_is_highlighted_and_escaped(self, client, topics):
+        snippet = search(client, 'q=zbiorow')['results'][0]['snippet']
+        assert '<mark>zbiorów</mark>' in snippet
+        assert '&lt;b&gt;' in snippet
+        assert '<b>' not in snippet
+
+    def test_pagination(self, client, topics):
+        first = search(client, 'q=rekomendacji&limit=1')
+        second = search(client, f"q=rekomendacji&limit=1&offset={first['nextOffset']}")
+
+        assert [r['id'] for r in first['results']] == [topics[0]]
+        assert [r['id'] for r in second['results']] == [topics[1]]
+        assert second['nextOffset'] is None
+
+    def test_filters(self, client, topics):
+        assert [r['id'] for r in search(client, 'q=rekomendacji&status=OCZEKUJACY')['results']] == [topics[1]]
+        assert [r['id'] for r in search(client, 'q=rekomendacji&is_open=true')['results']] == [topics[0]]
+
+    def test_index_follows_updates_and_deletes(self, client, app, topics):
+        with app.app_context():
+            topic = db.session.get(Topic, topics[0])
+            topic.title = "System wyszukiwania"
+            db.session.delete(db.session.get(Topic, topics[1]))
+            db.session.commit()
+
+        assert search(client, 'q=rekomendacji')['results'] == []
+        assert [r['id'] for r in search(client, 'q=wyszukiwania')['results']] == [topics[0]]
+
+    def test_search_operators_are_not_interpreted(self, client, topics):
+        assert search(client, 'q=%22rekomendacji%22+OR+NEAR(')['results'] == []
+        assert search_terms('"rekomendacji" OR*') == ['rekomendacji', 'OR']
+
+    def test_invalid_requests(self, client, topics):
+        assert client.get('/api/topics/search').status_code == 400
+        assert client.get('/api/topics/search?q=%21%21').status_code == 400
+        assert client.get('/api/topics/search?q=a&offset=-1').status_code == 400
+        assert client.get('/api/topics/search?q=a&status=X').status_code == 400
@@ -8,6 +8,7 @@ import pytest
 from app import create_app, db
 from app.models.account import Account, UserType
 from app.models.teacher import Teacher, Title, Position
+from app.models.student import Student
 from app.models.topic import Topic, TopicStatus
 from werkzeug.security import generate_password_hash
 from datetime import datetime
@@ -100,6 +101,7 @@ def setup_test_data(app):
             'teacher2_id': teacher2.id,
             'topic_pending_id': topic_pending.id,
             'topic_approved_id': topic_approved.id,
+            'topic_rejected_id': topic_rejected.id,
             'topic_pending2_id': topic_pending2.id
         }
 
@@ -226,3 +228,162 @@ class TestBulkApproveTopics:
         )
         
         assert response.status_code == 400
+
+
+    def test_bulk_approve_clears_rejection_reason_and_returns_topics(self, client, app, setup_test_data):
+        topic_ids = [setup_test_data['topic_rejected_id'], setup_test_data['topic_pending_id']]
+
+        response = client.patch('/api/topics/approve-bulk', json={'topic_ids': topic_ids})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [t['id'] for t in data['topics']] == sorted(topic_ids)
+        assert all(t['status'] == 'ZATWIERDZONY' for t in data['topics'])
+        assert all(t['rejectionReason'] is None for t in data['topics'])
+
+        with app.app_context():
+            assert Topic.query.get(setup_test_data['topic_rejected_id']).rejection_reason is None
+
+    def test_bulk_approve_ignores_unknown_ids(self, client, setup_test_data):
+        response = client.patch(
+            '/api/topics/approve-bulk',
+            json={'topic_ids': [setup_test_data['topic_pending_id'], 99999]}
+        )
+
+        assert response.status_code == 200
+        assert response.get_json()['count'] == 1
+
+    def test_bulk_approve_chunks_large_id_lists(self, client, app, setup_test_data, monkeypatch):
+        monkeypatch.setattr('app.routes.topics.BULK_CHUNK_SIZE', 1)
+        topic_ids = [setup_test_data['topic_pending_id'], setup_test_data['topic_pending2_id']]
+
+        response = client.patch('/api/topics/approve-bulk', json={'topic_ids': topic_ids})
+
+        assert response.get_json()['count'] == 2
+        with app.app_context():
+            assert all(Topic.query.get(i).status == TopicStatus.ZATWIERDZONY for i in topic_ids)
+
+    def test_bulk_approve_refreshes_cached_topic(self, client, setup_test_data):
+        topic_id = setup_test_data['topic_pending_id']
+        assert client.get(f'/api/topics/{topic_id}').get_json()['status'] == 'OCZEKUJACY'
+
+        client.patch('/api/topics/approve-bulk', json={'topic_ids': [topic_id]})
+
+        assert client.get(f'/api/topics/{topic_id}').get_json()['status'] == 'ZATWIERDZONY'
+
+    def test_bulk_approve_invalid_ids_returns_400(self, client, setup_test_data):
+        assert client.patch('/api/topics/approve-bulk', json={'topic_ids': 'abc'}).status_code == 400
+        assert client.patch('/api/topics/approve-bulk', json={'topic_ids': ['1']}).status_code == 400
+
+
+class TestBulkRejectTopics:
+
+    def test_bulk_reject_sets_status_and_reason(self, client, app, setup_test_data):
+        topic_ids = [setup_test_data['topic_pending_id'], setup_test_data['topic_pending2_id']]
+
+        response = client.patch(
+            '/api/topics/reject-bulk',
+            json={'topic_ids': topic_ids, 'rejection_reason': 'Zbyt ogólny opis'}
+        )
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 2
+        assert {t['rejectionReason'] for t in data['topics']} == {'Zbyt ogólny opis'}
+
+        with app.app_context():
+            for topic_id in topic_ids:
+                topic = Topic.query.get(topic_id)
+                assert topic.status == TopicStatus.ODRZUCONY
+                assert topic.rejection_reason == 'Zbyt ogólny opis'
+
+    def test_bulk_reject_requires_reason(self, client, setup_test_data):
+        response = client.patch(
+            '/api/topics/reject-bulk',
+            json={'topic_ids': [setup_test_data['topic_pending_id']]}
+        )
+        assert response.status_code == 400
+
+    def test_bulk_reject_empty_array_returns_400(self, client, setup_test_data):
+        response = client.patch(
+            '/api/topics/reject-bulk',
+            json={'topic_ids': [], 'rejection_reason': 'Powód'}
+        )
+        assert response.status_code == 400
+
+
+class TestTopicListingPagination:
+
+    def test_without_limit_returns_all_topics(self, client, setup_test_data):
+        response = client.get('/api/topics')
+
+        assert response.status_code == 200
+        assert len(response.get_json()) == 4
+        assert 'X-Next-Cursor' not in response.headers
+
+    def test_cursor_pages_cover_all_topics_once(self, client, setup_test_data):
+        seen = []
+        url = '/api/topics?limit=3'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            page = response.get_json()
+            assert len(page) <= 3
+            seen.extend(t['id'] for t in page)
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/api/topics?limit=3&cursor={cursor}' if cursor else None
+
+        assert sorted(seen) == sorted(set(seen))
+        assert len(seen) == 4
+
+    def test_filter_by_status(self, client, setup_test_data):
+        response = client.get('/api/topics?status=OCZEKUJACY')
+
+        data = response.get_json()
+        assert {t['id'] for t in data} == {
+            setup_test_data['topic_pending_id'],
+            setup_test_data['topic_pending2_id']
+        }
+
+    def test_filter_by_is_open_and_text(self, client, setup_test_data):
+        assert len(client.get('/api/topics?is_open=true').get_json()) == 1
+
+        data = client.get('/api/topics?q=e-learning').get_json()
+        assert [t['id'] for t in data] == [setup_test_data['topic_approved_id']]
+
+    def test_invalid_parameters_return_400(self, client, setup_test_data):
+        assert client.get('/api/topics?status=NIEZNANY').status_code == 400
+        assert client.get('/api/topics?limit=abc').status_code == 400
+        assert client.get('/api/topics?limit=0').status_code == 400
+        assert client.get('/api/topics?cursor=not-a-cursor').status_code == 400
+
+
+class TestPendingTopics:
+
+    def test_returns_only_pending_topics_with_teacher_data(self, client, setup_test_data):
+        response = client.get('/api/topics/pending')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 2
+        by_id = {t['id']: t for t in data['topics']}
+        assert set(by_id) == {setup_test_data['topic_pending_id'], setup_test_data['topic_pending2_id']}
+
+        topic = by_id[setup_test_data['topic_pending2_id']]
+        assert topic['teacher_title'] == 'mgr'
+        assert topic['teacher_full_name'] == 'Anna Nowak'
+        assert topic['student_count'] == 0
+
+    def test_student_count_comes_from_grouped_count(self, client, app, setup_test_data):
+        with app.app_context():
+            for i in range(3):
+                acc = Account(full_name=f"Student {i}", login=f"s{i}", password="x", user_type=UserType.STUDENT)
+                db.session.add(acc)
+                db.session.flush()
+                db.session.add(Student(account_id=acc.id, index_number=f"10000{i}", topic_id=setup_test_data['topic_pending_id']))
+            db.session.commit()
+
+        data = client.get('/api/topics/pending').get_json()
+        counts = {t['id']: t['student_count'] for t in data['topics']}
+        assert counts[setup_test_data['topic_pending_id']] == 3
+        assert counts[setup_test_data['topic_pending2_id']] == 0
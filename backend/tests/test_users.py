@@ -0,0 +1,118 @@
+"""
+Tests for the /api/users listing.
+
+Run with: python -m pytest tests/test_users.py -v
+"""
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models.account import Account, UserType
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def accounts(app):
+    with app.app_context():
+        people = [
+            ("Anna Nowak", UserType.STUDENT),
+            ("Adam Kowalski", UserType.STUDENT),
+            ("Jan Kowalski", UserType.TEACHER),
+            ("Anna_Zielińska", UserType.STUDENT),
+            ("Annabella Wiśniewska", UserType.KPK_MEMBER),
+            ("Piotr Zieliński", UserType.STUDENT),
+        ]
+        db.session.add_all([
+            Account(full_name=name, login=f"user{i}", password="x", user_type=user_type)
+            for i, (name, user_type) in enumerate(people, start=1)
+        ])
+        db.session.commit()
+
+
+def all_pages(client, url):
+    users = []
+    cursor = None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        users += response.get_json()
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return users
+
+
+class TestListUsers:
+
+    def test_lists_all_users_by_id(self, client, accounts):
+        response = client.get('/api/users')
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        data = response.get_json()
+        assert [u['user_id'] for u in data] == [1, 2, 3, 4, 5, 6]
+        assert data[0] == {'user_id': 1, 'name': "Anna Nowak", 'role': 'STUDENT'}
+
+    def test_empty_listing(self, client):
+        assert client.get('/api/users').get_json() == []
+
+    def test_role_filter(self, client, accounts):
+        names = [u['name'] for u in client.get('/api/users?role=student').get_json()]
+        assert names == ["Anna Nowak", "Adam Kowalski", "Anna_Zielińska", "Piotr Zieliński"]
+
+        assert client.get('/api/users?role=NOBODY').status_code == 400
+
+    def test_prefix_search_orders_by_name(self, client, accounts):
+        names = [u['name'] for u in client.get('/api/users?q=Anna').get_json()]
+        assert names == ["Anna Nowak", "Anna_Zielińska", "Annabella Wiśniewska"]
+
+        # LIKE wildcards in the prefix are matched literally
+        assert [u['name'] for u in client.get('/api/users?q=Anna_').get_json()] == ["Anna_Zielińska"]
+        assert client.get('/api/users?q=Anna%25').get_json() == []
+
+    def test_prefix_search_with_role(self, client, accounts):
+        names = [u['name'] for u in client.get('/api/users?q=Anna&role=STUDENT').get_json()]
+        assert names == ["Anna Nowak", "Anna_Zielińska"]
+
+    def test_cursor_pagination(self, client, accounts):
+        first = client.get('/api/users?limit=4')
+        assert len(first.get_json()) == 4
+        assert first.headers['X-Next-Cursor']
+
+        assert [u['user_id'] for u in all_pages(client, '/api/users?limit=4')] == [1, 2, 3, 4, 5, 6]
+        assert [u['user_id'] for u in all_pages(client, '/api/users?limit=1&role=STUDENT')] == [1, 2, 4, 6]
+
+    def test_cursor_pagination_of_search(self, client, accounts):
+        names = [u['name'] for u in all_pages(client, '/api/users?q=Anna&limit=2')]
+        assert names == ["Anna Nowak", "Anna_Zielińska", "Annabella Wiśniewska"]
+
+    def test_invalid_cursor(self, client, accounts):
+        assert client.get('/api/users?cursor=abc').status_code == 400
+        assert client.get('/api/users?limit=x').status_code == 400
+
+    def test_selects_only_projected_columns(self, client, accounts):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            client.get('/api/users').get_data()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        listing = [s for s in statements if s.startswith('SELECT account.')]
+        assert len(listing) == 1
+        assert 'password' not in listing[0]
+        assert 'login' not in listing[0]
@@ -0,0 +1,207 @@
+"""
+Tests for the bulk USOS import, its CLI command and admin endpoint.
+
+Run with: python -m pytest tests/test_usos_import.py -v
+"""
+import io
+import json
+import pytest
+from config import TestingConfig
+from app import create_app, db
+from app.models.account import Account, UserType
+from app.models.student import Student
+from app.models.teacher import Teacher, Title, Position
+from app.services.auth_tokens import Principal, issue_token
+from app.services.teacher_identity import teacher_identity
+from app.services.usos_import import import_usos, UNUSABLE_PASSWORD
+
+IMPORT_TOKEN = 'secret-import-token'
+
+CSV_DUMP = """type,login,full_name,index_number,title,position
+student,a.nowak,Anna Nowak,123456,,
+student,b.wisniewski,Bartosz Wiśniewski,123457,,
+teacher,j.kowalski,Jan Kowalski,,dr hab,ADIUNKT
+"""
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'USOS_IMPORT_TOKEN', IMPORT_TOKEN, raising=False)
+    app = create_app('testing')
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def run_import(text, fmt='csv', **kwargs):
+    return import_usos(io.BytesIO(text.encode()), fmt, **kwargs)
+
+
+def students_by_login():
+    return dict(db.session.query(Account.login, Student.index_number).join(Student).all())
+
+
+class TestUsosImport:
+
+    def test_csv_creates_accounts(self, app):
+        with app.app_context():
+            report = run_import(CSV_DUMP)
+
+            assert report['rows'] == 3
+            assert (report['created'], report['updated'], report['errorCount']) == (3, 0, 0)
+            assert report['rowsPerSecond'] > 0
+            assert students_by_login() == {'a.nowak': '123456', 'b.wisniewski': '123457'}
+            teacher = db.session.query(Teacher).join(Account).filter(Account.login == 'j.kowalski').one()
+            assert (teacher.title, teacher.position) == (Title.dr_hab, Position.ADIUNKT)
+            account = Account.query.filter_by(login='a.nowak').one()
+            assert account.user_type == UserType.STUDENT
+            assert account.password == UNUSABLE_PASSWORD
+            assert not account.check_password('')
+
+    def test_reimport_updates_in_place(self, app):
+        with app.app_context():
+            run_import(CSV_DUMP)
+            teacher_account = Account.query.filter_by(login='j.kowalski').one()
+            teacher_account.set_password('haslo')
+            db.session.commit()
+            # Cached before the import, the upsert has to invalidate it
+            assert teacher_identity(teacher_account.id).position == Position.ADIUNKT
+
+            report = run_import(CSV_DUMP.replace('Anna Nowak', 'Anna Nowak-Kowalska')
+                                .replace('dr hab,ADIUNKT', 'prof,PROFESOR_UCZELNI'))
+
+            assert (report['created'], report['updated'], report['errorCount']) == (0, 3, 0)
+            assert Account.query.count() == 3
+            assert Student.query.count() == 2
+            assert Account.query.filter_by(login='a.nowak').one().full_name == 'Anna Nowak-Kowalska'
+            assert teacher_identity(teacher_account.id).position == Position.PROFESOR_UCZELNI
+            assert db.session.get(Account, teacher_account.id).check_password('haslo')
+
+    def test_per_row_errors(self, app):
+        with app.app_context():
+            run_import(CSV_DUMP)
+            report = run_import(
+                "type,login,full_name,index_number,title,position\n"
+                "student,c.ok,Celina Ok,200001,,\n"
+                "student,,Brak Loginu,200002,,\n"
+                "student,d.bad,Zły Indeks,12ab,,\n"
+                "teacher,e.bad,Zły Tytuł,,doktor,ADIUNKT\n"
+                "admin,f.bad,Zły Typ,,,\n"
+                "student,c.ok,Powtórzony,200003,,\n"
+                "student,g.bad,Cudzy Indeks,123456,,\n"
+                "teacher,a.nowak,Zmiana Roli,,dr,ADIUNKT\n"
+                "student,a.nowak,Nowy Indeks,200004,,\n"
+            )
+
+            assert (report['rows'], report['created'], report['errorCount']) == (9, 1, 8)
+            assert [(e['line'], e['login']) for e in report['errors']] == [
+                (3, ''), (4, 'd.bad'), (5, 'e.bad'), (6, 'f.bad'), (7, 'c.ok'), (8, 'g.bad'), (9, 'a.nowak'),
+                (10, 'a.nowak')
+            ]
+            assert report['errors'][5]['error'] == 'index_number belongs to another account'
+            assert report['errors'][6]['error'] == 'Account exists as STUDENT'
+            assert students_by_login()['a.nowak'] == '123456'
+            assert 'c.ok' in students_by_login()
+
+    def test_json_lines_and_array(self, app):
+        rows = [
+            {'type': 'student', 'login': 'a.nowak', 'full_name': 'Anna Nowak', 'index_number': '123456'},
+            {'type': 'teacher', 'login': 'j.kowalski', 'full_name': 'Jan Kowalski', 'title': 'dr', 'position': 'asystent'},
+        ]
+        with app.app_context():
+            report = run_import('\n'.join(json.dumps(r) for r in rows) + '\nnot json\n', fmt='jsonl')
+            assert (report['created'], report['errorCount']) == (2, 1)
+            assert report['errors'][0]['line'] == 3
+
+            report = run_import(json.dumps(rows), fmt='json')
+            assert (report['updated'], report['errorCount']) == (2, 0)
+
+    def test_batches(self, app):
+        dump = 'type,login,full_name,index_number\n' + ''.join(
+            f'student,s{i},Student {i},{300000 + i}\n' for i in range(25)
+        )
+        with app.app_context():
+            report = run_import(dump, batch_size=10)
+
+            assert report['created'] == 25
+            assert Student.query.count() == 25
+
+
+class TestUsosImportEndpoint:
+
+    def test_import_from_body(self, client):
+        response = client.post('/api/admin/import/usos', data=CSV_DUMP.encode(), content_type='text/csv',
+                               headers={'X-Import-Token': IMPORT_TOKEN})
+
+        assert response.status_code == 200
+        assert response.get_json()['created'] == 3
+        users = client.get('/api/users').get_json()
+        assert sorted(u['name'] for u in users) == ['Anna Nowak', 'Bartosz Wiśniewski', 'Jan Kowalski']
+
+    def test_import_from_upload(self, client):
+        response = client.post('/api/admin/import/usos', data={'file': (io.BytesIO(CSV_DUMP.encode()), 'usos.csv')},
+                               headers={'X-Import-Token': IMPORT_TOKEN})
+
+        assert response.status_code == 200
+        assert response.get_json()['created'] == 3
+
+    def test_requires_token(self, app, client):
+        url = '/api/admin/import/usos'
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv').status_code == 403
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv',
+                           headers={'X-Import-Token': 'wrong'}).status_code == 403
+        app.config['USOS_IMPORT_TOKEN'] = None
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv',
+                           headers={'X-Import-Token': IMPORT_TOKEN}).status_code == 403
+
+    def test_admin_token(self, app, client):
+        with app.app_context():
+            admin, _ = issue_token(Principal(1, UserType.ADMIN, None, None))
+            student, _ = issue_token(Principal(2, UserType.STUDENT, None, 1))
+        url = '/api/admin/import/usos'
+
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv',
+                           headers={'Authorization': f'Bearer {admin}'}).status_code == 200
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv',
+                           headers={'Authorization': f'Bearer {student}'}).status_code == 403
+
+    def test_import_token_when_tokens_are_required(self, app, client):
+        app.config['AUTH_REQUIRE_TOKEN'] = True
+        url = '/api/admin/import/usos'
+
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv',
+                           headers={'X-Import-Token': IMPORT_TOKEN}).status_code == 200
+        assert client.post(url, data=CSV_DUMP, content_type='text/csv',
+                           headers={'X-Import-Token': 'wrong'}).status_code == 401
+
+    def test_invalid_requests(self, client):
+        headers = {'X-Import-Token': IMPORT_TOKEN}
+        url = '/api/admin/import/usos'
+        assert client.post(url, data=CSV_DUMP, content_type='text/plain', headers=headers).status_code == 400
+        assert client.post(url + '?format=csv', data='name,surname\n', headers=headers).status_code == 400
+        assert client.post(url + '?format=json', data='{"a": 1}', headers=headers).status_code == 400
+        assert client.post(url + '?format=csv&batch_size=0', data=CSV_DUMP, headers=headers).status_code == 400
+
+
+class TestUsosImportCommand:
+
+    def test_cli_import(self, app, tmp_path):
+        dump = tmp_path / 'usos.csv'
+        dump.write_text(CSV_DUMP + 'student,x,X,bad,,\n', encoding='utf-8')
+
+        result = app.test_cli_runner().invoke(args=['import-usos', str(dump)])
+
+        assert result.exit_code == 0
+        assert '4 rows' in result.output
+        assert '3 created, 0 updated, 1 errors' in result.output
+        assert 'line 5: x: index_number must have 6 digits' in result.output
+        with app.app_context():
+            assert Account.query.count() == 3
@@ -0,0 +1,23 @@
+// The backend keeps a client's reads on the primary database for a few seconds
+// after it writes, so it sees its own changes while the replicas catch up. It
+// marks that window in a response header, which is sent back with every request
+// because the app runs on another origin and the backend's cookie never reaches it.
+const READ_PRIMARY_HEADER = "X-Read-Primary-Until";
+
+let readPrimaryUntil: string | null = null;
+
+export async function apiFetch(
+    input: RequestInfo | URL,
+    init: RequestInit = {},
+): Promise<Response> {
+    const headers = new Headers(init.headers);
+    if (readPrimaryUntil) {
+        headers.set(READ_PRIMARY_HEADER, readPrimaryUntil);
+    }
+    const response = await fetch(input, { ...init, headers });
+    const until = response.headers.get(READ_PRIMARY_HEADER);
+    if (until) {
+        readPrimaryUntil = until;
+    }
+    return response;
+}
@@ -1,12 +1,38 @@
+import { apiFetch } from "~/services/api";
+
 class ExportService {
     private baseUrl = "http://localhost:5000/api/export";
 
+    private async waitForJob(jobId: string): Promise<void> {
+        while (true) {
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+            const response = await apiFetch(`${this.baseUrl}/jobs/${jobId}`);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const job = await response.json();
+            if (job.status === "done") {
+                return;
+            }
+            if (job.status === "failed") {
+                throw new Error(`Export failed: ${job.error}`);
+            }
+        }
+    }
+
     async exportStudentsByTopic(): Promise<void> {
         try {
-            const response = await fetch(`${this.baseUrl}/students-by-topic`, {
+            let response = await apiFetch(`${this.baseUrl}/students-by-topic`, {
                 method: "GET",
             });
 
+            // Not cached yet: the export is built by a background job
+            if (response.status === 202) {
+                const job = await response.json();
+                await this.waitForJob(job.id);
+                response = await apiFetch(`${this.baseUrl}/jobs/${job.id}/file`);
+            }
+
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
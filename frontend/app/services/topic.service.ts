@@ -1,3 +1,5 @@
+import { apiFetch } from "~/services/api";
+
 export interface Declaration {
     id: number;
     status: string;
@@ -59,7 +61,7 @@ class TopicService {
     private baseUrl = "http://localhost:5000/api/topics";
 
     async getSupervisor(supervisorId: number): Promise<Supervisor> {
-        const res = await fetch(
+        const res = await apiFetch(
             `${this.baseUrl}/supervisor/me?supervisor_id=${supervisorId}`,
         );
         if (!res.ok) throw new Error("Failed to fetch supervisor");
@@ -67,7 +69,7 @@ class TopicService {
     }
 
     async getTopics(supervisorId: number): Promise<Topic[]> {
-        const res = await fetch(
+        const res = await apiFetch(
             `${this.baseUrl}?supervisor_id=${supervisorId}`,
         );
         if (!res.ok) throw new Error("Failed to fetch topics");
@@ -75,13 +77,13 @@ class TopicService {
     }
 
     async getAllTopics(): Promise<Topic[]> {
-        const res = await fetch(this.baseUrl);
+        const res = await apiFetch(this.baseUrl);
         if (!res.ok) throw new Error("Failed to fetch topics");
         return res.json();
     }
 
     async getTopic(id: string): Promise<Topic | undefined> {
-        const res = await fetch(`${this.baseUrl}/${id}`);
+        const res = await apiFetch(`${this.baseUrl}/${id}`);
         // Handle 404 naturally
         if (res.status === 404) return undefined;
         if (!res.ok) throw new Error("Failed to fetch topic");
@@ -95,7 +97,7 @@ class TopicService {
         >,
         supervisorId: number,
     ) {
-        const res = await fetch(this.baseUrl, {
+        const res = await apiFetch(this.baseUrl, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ ...topic, supervisor_id: supervisorId }),
@@ -106,7 +108,7 @@ class TopicService {
 
     async getPendingTopics(): Promise<PendingTopic[]> {
         try {
-            const response = await fetch(`${this.baseUrl}/pending`);
+            const response = await apiFetch(`${this.baseUrl}/pending`);
 
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -122,7 +124,7 @@ class TopicService {
 
     async approveTopic(topicId: number): Promise<void> {
         try {
-            const response = await fetch(`${this.baseUrl}/${topicId}/approve`, {
+            const response = await apiFetch(`${this.baseUrl}/${topicId}/approve`, {
                 method: "PATCH",
             });
 
@@ -137,7 +139,7 @@ class TopicService {
 
     async approveTopics(topicIds: number[]): Promise<void> {
         try {
-            const response = await fetch(`${this.baseUrl}/approve-bulk`, {
+            const response = await apiFetch(`${this.baseUrl}/approve-bulk`, {
                 method: "PATCH",
                 headers: {
                     "Content-Type": "application/json",
@@ -156,7 +158,7 @@ class TopicService {
 
     async rejectTopic(topicId: number, rejectionReason: string): Promise<void> {
         try {
-            const response = await fetch(`${this.baseUrl}/${topicId}/reject`, {
+            const response = await apiFetch(`${this.baseUrl}/${topicId}/reject`, {
                 method: "PATCH",
                 headers: {
                     "Content-Type": "application/json",
@@ -175,7 +177,7 @@ class TopicService {
 
     async submitDeclaration(topicId: string, userId: number): Promise<void> {
         try {
-            const response = await fetch(`${this.baseUrl}/${topicId}/declare`, {
+            const response = await apiFetch(`${this.baseUrl}/${topicId}/declare`, {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
@@ -1,3 +1,5 @@
+import { apiFetch } from "~/services/api";
+
 export type BackendUser = {
     user_id: number;
     name: string | null;
@@ -8,7 +10,7 @@ export class UserService {
     private baseUrl = "http://localhost:5000/api/users";
 
     async getAll(): Promise<BackendUser[]> {
-        const res = await fetch(this.baseUrl);
+        const res = await apiFetch(this.baseUrl);
         if (!res.ok) throw new Error("Failed to fetch users");
         return res.json();
     }